@@ -0,0 +1,9 @@
+from .memory_cache import LRUCache
+from .disk_cache import DiskCache
+from .tiered_cache import TieredCache
+
+__all__ = [
+    "LRUCache",
+    "DiskCache",
+    "TieredCache"
+]
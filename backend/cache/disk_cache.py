@@ -0,0 +1,159 @@
+"""
+Content-addressed on-disk byte store.
+Files are named by the SHA-256 of their key and evicted least-recently-used past a size budget.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Una sola instancia por directorio en cada proceso: el presupuesto y la evicción tienen un único dueño
+_shared_caches: Dict[str, "DiskCache"] = {}
+_shared_lock = threading.Lock()
+
+
+class DiskCache:
+    """
+    Size-bounded byte store on the local filesystem.
+
+    Each key is hashed to `<root>/<aa>/<sha256>.bin`. The file modification time
+    records when the value was stored (used for TTLs); last access times are
+    tracked in memory for LRU eviction, starting from the modification times
+    found when the directory is first scanned.
+
+    Args:
+        root (str): Directory holding the cache files.
+        max_bytes (int): Total size budget; the least recently used files are removed beyond it.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 512 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Tuple[int, float]]] = None  # path -> (size, last_access)
+        self._total_bytes = 0
+
+    @classmethod
+    def shared(cls, root: str, max_bytes: int = 512 * 1024 * 1024) -> "DiskCache":
+        """Return the process-wide cache for `root`, creating it on first use.
+
+        Two caches on the same directory would each enforce `max_bytes` on their
+        own view of the files and race when evicting; callers that may be
+        instantiated more than once should use this instead of the constructor.
+        The budget of the first caller wins.
+        """
+        key = os.path.realpath(root)
+        with _shared_lock:
+            cache = _shared_caches.get(key)
+            if cache is None:
+                cache = cls(root, max_bytes=max_bytes)
+                _shared_caches[key] = cache
+            return cache
+
+    @staticmethod
+    def key_digest(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        digest = self.key_digest(key)
+        return os.path.join(self.root, digest[:2], f"{digest}.bin")
+
+    def get_entry(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """Return `(value, stored_at)` for a key, or None if it is not on disk."""
+        path = self.path_for(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            with open(path, "rb") as f:
+                value = f.read()
+        except OSError:
+            return None
+
+        with self._lock:
+            index = self._load_index()
+            index[path] = (len(value), time.time())
+        return value, stored_at
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: bytes):
+        """Store a value atomically (write to a temporary file and rename)."""
+        if len(value) > self.max_bytes:
+            return
+        path = self.path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"DiskCache: failed to write {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            index = self._load_index()
+            previous = index.get(path)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            index[path] = (len(value), time.time())
+            self._total_bytes += len(value)
+            self._evict()
+
+    def delete(self, key: str):
+        path = self.path_for(key)
+        with self._lock:
+            index = self._load_index()
+            previous = index.pop(path, None)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._load_index()
+            return self._total_bytes
+
+    def _load_index(self) -> Dict[str, Tuple[int, float]]:
+        # Se recorre el directorio una sola vez, la primera vez que se necesita
+        if self._index is not None:
+            return self._index
+
+        self._index = {}
+        self._total_bytes = 0
+        if os.path.isdir(self.root):
+            for dirpath, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    if not filename.endswith(".bin"):
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    self._index[path] = (stat.st_size, stat.st_mtime)
+                    self._total_bytes += stat.st_size
+        return self._index
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for path, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            del self._index[path]
+            self._total_bytes -= size
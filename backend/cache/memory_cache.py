@@ -0,0 +1,87 @@
+"""
+Thread-safe in-memory LRU cache.
+Bounded by number of entries and, optionally, by total size in bytes.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Least-recently-used cache that remembers when each value was stored.
+
+    Args:
+        max_entries (int): Maximum number of entries kept.
+        max_bytes (Optional[int]): Optional budget for the sum of `size_of(value)`.
+        size_of (Callable[[Any], int]): Size function used with `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        size_of: Callable[[Any], int] = len
+    ):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_entry(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Return `(value, stored_at)` and mark the key as recently used, or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+            return entry[0], entry[1]
+
+    def get(self, key: Hashable) -> Any:
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: Hashable, value: Any, stored_at: Optional[float] = None):
+        size = self.size_of(value) if self.max_bytes is not None else 0
+        # Un valor mayor que todo el presupuesto no se guarda
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[2]
+            self._data[key] = (value, stored_at if stored_at is not None else time.time(), size)
+            self._total_bytes += size
+            self._evict()
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def _evict(self):
+        while len(self._data) > self.max_entries or (
+            self.max_bytes is not None and self._total_bytes > self.max_bytes
+        ):
+            _, (_, _, size) = self._data.popitem(last=False)
+            self._total_bytes -= size
@@ -0,0 +1,175 @@
+"""
+Two-level cache (memory LRU + disk) with TTL and stale-while-revalidate.
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from backend.cache.disk_cache import DiskCache
+from backend.cache.memory_cache import LRUCache
+
+# Hilos compartidos para revalidar entradas caducadas en segundo plano
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+
+class TieredCache:
+    """
+    Byte cache that checks memory first, then disk, then calls the fetch function.
+
+    Freshness rules for an entry of age `age`:
+        - `age <= ttl`: fresh, returned as is.
+        - `ttl < age <= ttl + stale_ttl`: stale, returned immediately while a
+          background refresh fetches a new value (stale-while-revalidate).
+        - older: treated as a miss and fetched synchronously.
+
+    A fetch function returning None means "could not fetch" and is never cached,
+    so transient errors are retried on the next request. Concurrent misses on the
+    same key share a single fetch: the first caller runs it and the others wait
+    for its result.
+
+    Args:
+        memory (LRUCache): First level.
+        disk (Optional[DiskCache]): Optional second level.
+        ttl (float): Seconds an entry is fresh.
+        stale_ttl (float): Extra seconds a stale entry may still be served.
+    """
+
+    def __init__(
+        self,
+        memory: LRUCache,
+        disk: Optional[DiskCache] = None,
+        ttl: float = 7 * 24 * 3600,
+        stale_ttl: float = 30 * 24 * 3600
+    ):
+        self.memory = memory
+        self.disk = disk
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._refreshing = set()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """Return the cached value for `key`, fetching and storing it on a miss.
+
+        Args:
+            key (str): Cache key.
+            fetch (Callable[[], Optional[bytes]]): Loads the value from the source.
+
+        Returns:
+            Optional[bytes]: The value, or None if it is not cached and could not be fetched.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age <= self.ttl:
+                self.hits += 1
+                return value
+            if age <= self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._schedule_refresh(key, fetch)
+                return value
+
+        self.misses += 1
+        return self._fetch_once(key, fetch)
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[bytes]:
+        """Return the cached value for `key` without fetching, or None if absent or expired.
+
+        Follows the freshness rules of `get_or_fetch`, except that a stale entry is
+        returned without a background refresh (there is nothing to fetch with).
+
+        Args:
+            key (str): Cache key.
+            count_miss (bool): Count a miss in `misses`; pass False when a `get_or_fetch`
+                of the same key follows, so the request is not counted twice.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age <= self.ttl:
+                self.hits += 1
+                return value
+            if age <= self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                return value
+        if count_miss:
+            self.misses += 1
+        return None
+
+    def __contains__(self, key: str) -> bool:
+        """True if `key` is stored at any age. Not counted as a hit or a miss."""
+        return self._lookup(key) is not None
+
+    def set(self, key: str, value: bytes):
+        now = time.time()
+        self.memory.set(key, value, stored_at=now)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def _lookup(self, key: str) -> Optional[Tuple[bytes, float]]:
+        entry = self.memory.get_entry(key)
+        if entry is not None:
+            return entry
+        if self.disk is None:
+            return None
+        entry = self.disk.get_entry(key)
+        if entry is not None:
+            # Promover a memoria conservando la fecha original para respetar el TTL
+            self.memory.set(key, entry[0], stored_at=entry[1])
+        return entry
+
+    def _fetch_once(self, key: str, fetch: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        # Single-flight: una sola llamada a `fetch` por clave aunque lleguen varias peticiones a la vez
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            # Otra llamada pudo terminar de guardarlo entre nuestra consulta y la reserva
+            entry = self._lookup(key)
+            if entry is not None and time.time() - entry[1] <= self.ttl:
+                value = entry[0]
+            else:
+                value = fetch()
+                if value is not None:
+                    self.set(key, value)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _schedule_refresh(self, key: str, fetch: Callable[[], Optional[bytes]]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                value = fetch()
+                if value is not None:
+                    self.set(key, value)
+            except Exception as e:
+                print(f"Cache refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        _refresh_executor.submit(refresh)
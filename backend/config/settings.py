@@ -18,6 +18,7 @@ Convenciones:
      final para que otras partes de la aplicación la importen y usen.
 """
 import os
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -51,10 +52,28 @@ class Settings(BaseSettings):
         app_version: str = "0.1.0"
     
         text_model_checkpoint: str = "Qwen/Qwen2.5-1.5B-Instruct"
+        # Precisión del modelo de texto: "auto" usa fp16 en GPU y bf16/fp32 en CPU;
+        # "int8" aplica cuantización dinámica a las capas lineales (solo CPU)
+        text_model_precision: Literal["auto", "fp32", "bf16", "fp16", "int8"] = "auto"
         voice_model_name: str = "tts_models/multilingual/multi-dataset/xtts_v2"
     
         default_speaker_wav: str = os.path.join(os.getcwd(), "resources/audio/speaker.wav")
         audio_output_dir: str = os.path.join(os.getcwd(), "resources/audio/output")
+        # Latentes de condicionamiento de XTTS: se calculan una vez por voz y se guardan en disco.
+        # Las voces incluidas los guardan junto al WAV; las voces personalizadas, aquí por hash
+        voice_latents_cache_dir: str = os.path.join(os.getcwd(), "resources/cache/voices")
+        voice_latents_precompute: bool = True
+        voice_custom_latents_entries: int = 32
+        # Tokens GPT por fragmento en /voice/stream (menos = primer audio antes, más sobrecarga)
+        voice_stream_chunk_size: int = 20
+        # Formato en el que se entregan los audios generados (audio_url); se transcodifican una vez
+        audio_delivery_format: Literal["wav", "flac", "ogg", "opus"] = "opus"
+        # Cuota de disco de audio_output_dir: se eliminan primero los audios usados hace más tiempo
+        audio_max_disk_bytes: int = 1024 * 1024 * 1024
+        # Antigüedad máxima (desde el último acceso) de un audio; 0 = sin límite
+        audio_max_age_seconds: int = 30 * 24 * 3600
+        # Cada cuánto se aplica la retención en segundo plano; 0 = desactivada
+        audio_retention_interval_seconds: int = 600
     
         cors_origins: list = [
                 "http://localhost",
@@ -69,6 +88,76 @@ class Settings(BaseSettings):
         # URL base del servicio de pictogramas. Se puede configurar con la variable
         # de entorno PICTOGRAMS_API_BASE_URL o sobrescribir en un archivo .env.
         pictograms_api_base_url: str = "https://api.arasaac.org/api/"
+        # Extraer las palabras clave de todas las frases en un solo lote del modelo de texto
+        pictogram_batch_keywords: bool = True
+        # Origen de los pictogramas: "api" (ARASAAC en línea), "local" (solo el índice
+        # importado con `python -m backend.models.pictogram_index`) o "hybrid" (índice
+        # local y, si no hay coincidencias, la API)
+        pictogram_source: Literal["api", "local", "hybrid"] = "api"
+        pictogram_index_path: str = os.path.join(os.getcwd(), "resources/pictograms/index.json")
+        # Cliente HTTP de pictogramas: conexiones persistentes, reintentos con espera
+        # exponencial y número de frases resueltas en paralelo por historia
+        pictogram_http_pool_size: int = 16
+        pictogram_http_retries: int = 2
+        pictogram_http_backoff_seconds: float = 0.25
+        pictogram_fetch_concurrency: int = 8
+        # Caché de resultados de búsqueda e imágenes de ARASAAC (memoria LRU + disco)
+        pictogram_cache_enabled: bool = True
+        pictogram_cache_dir: str = os.path.join(os.getcwd(), "resources/cache/pictograms")
+        pictogram_cache_memory_entries: int = 2048
+        pictogram_cache_max_disk_bytes: int = 512 * 1024 * 1024
+        # Edad máxima de una entrada fresca y margen extra en el que se sirve caducada
+        # mientras se revalida en segundo plano
+        pictogram_cache_ttl_seconds: int = 7 * 24 * 3600
+        pictogram_cache_stale_seconds: int = 30 * 24 * 3600
+        # Miniaturas ya codificadas en memoria (0 entradas = desactivada)
+        pictogram_thumbnail_cache_entries: int = 1024
+        pictogram_thumbnail_cache_max_bytes: int = 64 * 1024 * 1024
+
+        # Ejecutor de inferencia: hilos dedicados por tipo de carga para no bloquear
+        # el event loop. TTS es intensivo en CPU, por eso por defecto 1 hilo. Con el
+        # micro-batching activo los hilos LLM solo esperan al planificador, así que su
+        # número limita cuántas peticiones pueden agruparse.
+        llm_executor_workers: int = 4
+        tts_executor_workers: int = 1
+        io_executor_workers: int = 8
+        # Hilos intra-op de torch (0 = valor por defecto de torch)
+        torch_num_threads: int = 0
+
+        # Micro-batching del modelo de texto: agrupa prompts concurrentes en un solo generate
+        text_batching_enabled: bool = True
+        text_batch_max_size: int = 4
+        text_batch_max_wait_ms: int = 20
+
+        # Caché de KV del prefijo fijo (system + instrucciones) para no recalcularlo en cada historia
+        text_prefix_cache_enabled: bool = True
+        text_prefix_cache_max_entries: int = 72
+        text_prefix_cache_max_bytes: int = 512 * 1024 * 1024
+
+        # Caché de historias en modo determinista (mismo prompt y parámetros -> misma historia)
+        story_cache_enabled: bool = True
+        story_cache_memory_entries: int = 512
+        story_cache_ttl_seconds: int = 7 * 24 * 3600
+        # Persistencia opcional en disco (vacío = solo memoria)
+        story_cache_dir: str = ""
+        story_cache_max_disk_bytes: int = 64 * 1024 * 1024
+
+        # Modelos que se cargan al arrancar ("text", "voice"); /health/ready responde 503
+        # hasta que estén listos. Lista vacía = carga perezosa en la primera petición.
+        # En producción se activa con PRELOAD_MODELS='["text","voice"]' (dockerfile, gunicorn.conf.py)
+        preload_models: list = []
+        # Ejecuta una generación corta tras cargar cada modelo para calentar kernels y cachés
+        warmup_models: bool = False
+
+        # Cola de trabajos asíncronos (/jobs)
+        job_workers: int = 2
+        job_queue_max_size: int = 256
+        # Máximo de trabajos "bulk" ejecutándose a la vez; siempre por debajo de job_workers
+        # para que los trabajos interactivos nunca esperen a que termine un bulk
+        job_bulk_max_in_flight: int = 1
+        # Segundos que se conservan los trabajos terminados para poder consultar su resultado
+        job_retention_seconds: int = 3600
+
         class Config:
                 """Configuración adicional de Pydantic para `Settings`.
                 - env_file: nombre del archivo desde el que se cargarán variables de entorno si existe.
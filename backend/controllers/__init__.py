@@ -1,9 +1,17 @@
 from .text_controller import router as text_router
 from .voice_controller import router as voice_router
 from .pictogram_controller import router as pictogram_router
+from .job_controller import router as job_router
+from .health_controller import router as health_router
+from .story_controller import router as story_router
+from .metrics_controller import router as metrics_router
 
 __all__ = [
     "text_router",
     "voice_router",
-    "pictogram_router"
+    "pictogram_router",
+    "job_router",
+    "health_router",
+    "story_router",
+    "metrics_router"
 ]
@@ -0,0 +1,25 @@
+"""
+Controller for health probes.
+`/health/live` reports that the process is serving requests; `/health/ready` reports
+whether the preloaded models are loaded and warm, with the state of each model.
+"""
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from backend.models.model_registry import model_registry
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live")
+async def live():
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def ready():
+    is_ready = model_registry.is_ready()
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"status": "ready" if is_ready else "starting", "models": model_registry.status()}
+    )
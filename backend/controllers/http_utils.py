@@ -0,0 +1,75 @@
+"""
+HTTP caching and range helpers shared by the controllers that serve binary content.
+"""
+import hashlib
+import os
+from typing import Optional, Tuple
+
+from fastapi import Request
+
+# Contenido direccionado por clave: nunca cambia para la misma URL
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Archivos que pueden regenerarse con la misma URL: se guardan, pero se revalidan con el ETag
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+def etag_for(data: bytes) -> str:
+    """Strong ETag derived from the content bytes."""
+    return f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """True if the request's `If-None-Match` already matches `etag`."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # If-None-Match usa comparación débil: se ignora el prefijo W/
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def etag_for_file(stat: os.stat_result) -> str:
+    """Strong ETag for a file version, from its size and modification time.
+
+    Files are written to a temporary name and renamed into place, so new bytes
+    under the same path always come with a new modification time.
+    """
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `Range: bytes=...` header.
+
+    Args:
+        range_header (Optional[str]): Value of the `Range` header.
+        size (int): Size of the full resource in bytes.
+
+    Returns:
+        Optional[Tuple[int, int]]: Inclusive `(start, end)`, or None to send the whole
+        resource (no header, other units, malformed or multiple ranges).
+
+    Raises:
+        ValueError: The range cannot be satisfied (respond 416).
+    """
+    if not range_header or not range_header.strip().startswith("bytes="):
+        return None
+    spec = range_header.strip()[len("bytes="):]
+    if "," in spec or "-" not in spec:
+        return None
+
+    start_text, end_text = (part.strip() for part in spec.split("-", 1))
+    if not (start_text or end_text) or any(text and not text.isdigit() for text in (start_text, end_text)):
+        return None
+
+    if not start_text:
+        # Sufijo: los últimos N bytes
+        length = int(end_text)
+        if length == 0 or size == 0:
+            raise ValueError(f"Range {range_header} not satisfiable for {size} bytes")
+        return max(0, size - length), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        raise ValueError(f"Range {range_header} not satisfiable for {size} bytes")
+    return start, min(end, size - 1)
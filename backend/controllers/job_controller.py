@@ -0,0 +1,217 @@
+"""
+Controller for asynchronous generation jobs.
+Provides routes to queue text, voice and pictogram jobs and to poll their status and result.
+"""
+from typing import Any, Callable, Dict
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from backend.schemas.job_schemas import JobPriority, JobStatusResponse, JobSubmissionResponse
+from backend.schemas.pictogram_schemas import PictogramData, PictogramGenerationRequest, PictogramImageMode
+from backend.schemas.text_schemas import TextGenerationRequest, TextGenerationResponse
+from backend.schemas.voice_schemas import VoiceGenerationRequest, VoiceGenerationResponse
+from backend.services.job_manager import JobQueueFullError, job_manager
+from backend.services.pictogram_service import pictogram_service
+from backend.services.text_service import text_service
+from backend.services.voice_service import voice_service
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def _generate_story(payload: Dict[str, Any]) -> str:
+    return text_service.generate_story(
+        prompt=payload["prompt"],
+        max_tokens=payload["max_tokens"],
+        tone=payload["tone"],
+        complexity=payload["complexity"],
+        sensory_friendly=payload["sensory_friendly"],
+        story_type=payload["story_type"],
+        protagonist_name=payload.get("protagonist_name") or "Protagonist",
+        deterministic=payload.get("deterministic", False)
+    )
+
+
+def _run_text_job(payload: Dict[str, Any], progress: Callable[[float], None]) -> dict:
+    text = _generate_story(payload)
+    return TextGenerationResponse(
+        text=text,
+        metadata={
+            "tone": payload["tone"],
+            "complexity": payload["complexity"],
+            "story_type": payload["story_type"]
+        }
+    ).model_dump()
+
+
+def _run_voice_job(payload: Dict[str, Any], progress: Callable[[float], None]) -> dict:
+    result = voice_service.generate_audio(
+        text=payload["text"],
+        speaker_wav=payload.get("speaker_wav") or "",
+        language=payload["language"],
+        speed=payload["voice_speed"]
+    )
+    return VoiceGenerationResponse(**result).model_dump()
+
+
+def _run_pictogram_job(payload: Dict[str, Any], progress: Callable[[float], None]) -> dict:
+    pictogram_data = pictogram_service.generate_pictograms(
+        text=payload["text"], progress_callback=progress, image_mode=payload.get("image_mode", "base64")
+    )
+    return {"pictogram_data": PictogramData(**pictogram_data).model_dump()}
+
+
+def _run_pictogram_from_prompt_job(payload: Dict[str, Any], progress: Callable[[float], None]) -> dict:
+    story = _generate_story(payload)
+    progress(0.5)
+    # La segunda mitad del progreso corresponde a los pictogramas
+    pictogram_data = pictogram_service.generate_pictograms(
+        text=story,
+        progress_callback=lambda value: progress(0.5 + value / 2),
+        image_mode=payload.get("image_mode", "base64")
+    )
+    return {"story": story, "pictograms": PictogramData(**pictogram_data).model_dump()}
+
+
+job_manager.register_handler("text", "llm", _run_text_job)
+job_manager.register_handler("voice", "tts", _run_voice_job)
+job_manager.register_handler("pictogram", "llm", _run_pictogram_job)
+job_manager.register_handler("pictogram_from_prompt", "llm", _run_pictogram_from_prompt_job)
+
+
+def _submit(kind: str, request: BaseModel, priority: str, **extra: Any) -> JobSubmissionResponse:
+    try:
+        job = job_manager.submit(kind, {**request.model_dump(), **extra}, priority)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return JobSubmissionResponse(
+        job_id=job.id,
+        status=job.status,
+        status_url=f"{router.prefix}/{job.id}",
+        result_url=f"{router.prefix}/{job.id}/result"
+    )
+
+
+@router.post("/text", response_model=JobSubmissionResponse, status_code=202)
+async def submit_text_job(request: TextGenerationRequest, priority: JobPriority = "interactive"):
+    """
+    Queues a story generation job.
+
+    Args:
+        request (TextGenerationRequest): Same parameters as `/text/generate`.
+        priority (JobPriority): "interactive" (default) or "bulk".
+
+    Returns:
+        JobSubmissionResponse: Job id and polling URLs.
+    """
+    return _submit("text", request, priority)
+
+
+@router.post("/voice", response_model=JobSubmissionResponse, status_code=202)
+async def submit_voice_job(request: VoiceGenerationRequest, priority: JobPriority = "interactive"):
+    """
+    Queues an audio generation job.
+
+    Args:
+        request (VoiceGenerationRequest): Same parameters as `/voice/generate`.
+        priority (JobPriority): "interactive" (default) or "bulk".
+
+    Returns:
+        JobSubmissionResponse: Job id and polling URLs.
+    """
+    return _submit("voice", request, priority)
+
+
+@router.post("/pictogram", response_model=JobSubmissionResponse, status_code=202)
+async def submit_pictogram_job(
+    request: PictogramGenerationRequest,
+    priority: JobPriority = "interactive",
+    image_mode: PictogramImageMode = "base64"
+):
+    """
+    Queues a pictogram generation job.
+
+    Args:
+        request (PictogramGenerationRequest): Same parameters as `/pictogram/generate`.
+        priority (JobPriority): "interactive" (default) or "bulk".
+        image_mode (PictogramImageMode): "base64" (default) or "url".
+
+    Returns:
+        JobSubmissionResponse: Job id and polling URLs.
+    """
+    return _submit("pictogram", request, priority, image_mode=image_mode)
+
+
+@router.post("/pictogram/from_prompt", response_model=JobSubmissionResponse, status_code=202)
+async def submit_pictogram_from_prompt_job(
+    request: TextGenerationRequest,
+    priority: JobPriority = "interactive",
+    image_mode: PictogramImageMode = "base64"
+):
+    """
+    Queues a story + pictograms job.
+
+    Args:
+        request (TextGenerationRequest): Same parameters as `/pictogram/from_prompt`.
+        priority (JobPriority): "interactive" (default) or "bulk".
+        image_mode (PictogramImageMode): "base64" (default) or "url".
+
+    Returns:
+        JobSubmissionResponse: Job id and polling URLs.
+    """
+    return _submit("pictogram_from_prompt", request, priority, image_mode=image_mode)
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    """
+    Returns the current status and progress of a job.
+
+    Args:
+        job_id (str): Job identifier returned on submission.
+
+    Returns:
+        JobStatusResponse: Status, progress and timestamps.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return JobStatusResponse(
+        job_id=job.id,
+        kind=job.kind,
+        priority=job.priority,
+        status=job.status,
+        progress=job.progress,
+        queue_position=job_manager.queue_position(job),
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        error=job.error
+    )
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    Returns the result of a completed job.
+
+    The body has the same shape as the synchronous endpoint for that job kind.
+    Responds 409 while the job is still queued or running and 500 if it failed.
+
+    Args:
+        job_id (str): Job identifier returned on submission.
+
+    Returns:
+        dict: The job result.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error or "Job failed")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+
+    return job.result
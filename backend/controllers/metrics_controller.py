@@ -0,0 +1,31 @@
+"""
+Controller for the metrics endpoint.
+Exposes stage latencies, counters and gauges in the Prometheus text format.
+"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from backend.models.model_registry import model_registry
+from backend.monitoring.metrics import JOB_QUEUE_DEPTH, MODEL_STATE, REGISTRY
+from backend.services.job_manager import job_manager
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+# Los gauges se leen al generar la respuesta: no hay que actualizarlos en cada petición
+JOB_QUEUE_DEPTH.set_function(job_manager.queue_depth)
+MODEL_STATE.set_function(lambda: {
+    (kind, name, state): 1
+    for kind, models in model_registry.status().items()
+    for name, state in models.items()
+})
+
+
+@router.get("", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Returns every metric in the Prometheus text exposition format.
+
+    Returns:
+        PlainTextResponse: `text/plain; version=0.0.4` body.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
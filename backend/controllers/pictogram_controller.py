@@ -1,20 +1,25 @@
-from fastapi import APIRouter
+import functools
+import json
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from backend.controllers.http_utils import IMMUTABLE_CACHE_CONTROL, etag_for, is_not_modified
 from backend.schemas.pictogram_schemas import (
     PictogramGenerationRequest,
     PictogramGenerationResponse,
     PictogramData,
+    PictogramImageMode,
 )
 from backend.schemas.text_schemas import TextGenerationRequest
-from backend.services.pictogram_service import PictogramGenerationService
-from backend.services.text_service import TextGenerationService
+from backend.services.pictogram_service import pictogram_service
+from backend.services.text_service import text_service
+from backend.services.inference_executor import inference_executor
 
 router = APIRouter(prefix="/pictogram", tags=["Pictogram Generation"])
-pictogram_service = PictogramGenerationService()
-text_service = TextGenerationService()
 
 
 @router.post("/generate", response_model=PictogramGenerationResponse)
-async def generate_pictogram(request: PictogramGenerationRequest):
+async def generate_pictogram(request: PictogramGenerationRequest, image_mode: PictogramImageMode = "base64"):
     """Generate pictograms from provided text.
 
     Note: The service may return a dict (serializable form). To avoid
@@ -23,11 +28,16 @@ async def generate_pictogram(request: PictogramGenerationRequest):
 
     Args:
         request (PictogramGenerationRequest): The request containing the text.
+        image_mode (PictogramImageMode): "base64" (default) inlines the images;
+            "url" returns `image_url` links to `/pictogram/image/{key}` instead.
 
     Returns:
         PictogramGenerationResponse: The response with generated pictograms.
     """
-    pictogram_data = pictogram_service.generate_pictograms(text=request.text)
+    # La extracción de palabras clave usa el modelo de texto, por eso va al pool LLM
+    pictogram_data = await inference_executor.run_llm(
+        pictogram_service.generate_pictograms, text=request.text, image_mode=image_mode
+    )
 
     # Aceptar tanto dict como ya-instanciado PictogramData
     if isinstance(pictogram_data, dict):
@@ -40,7 +50,7 @@ async def generate_pictogram(request: PictogramGenerationRequest):
 
 
 @router.post("/from_prompt")
-async def generate_pictogram_from_prompt(request: TextGenerationRequest):
+async def generate_pictogram_from_prompt(request: TextGenerationRequest, image_mode: PictogramImageMode = "base64"):
     """Generate pictograms from a prompt by first generating text.
 
     Simple flow that takes a `prompt` (same as text endpoint),
@@ -49,12 +59,14 @@ async def generate_pictogram_from_prompt(request: TextGenerationRequest):
 
     Args:
         request (TextGenerationRequest): The request containing the prompt and parameters.
+        image_mode (PictogramImageMode): "base64" (default) or "url", as in `/pictogram/generate`.
 
     Returns:
         dict: A dictionary containing the generated story and pictograms.
     """
     # 1) Generar la historia usando el servicio de texto
-    story = text_service.generate_story(
+    story = await inference_executor.run_llm(
+        text_service.generate_story,
         prompt=request.prompt,
         max_tokens=request.max_tokens,
         tone=request.tone,
@@ -62,10 +74,13 @@ async def generate_pictogram_from_prompt(request: TextGenerationRequest):
         sensory_friendly=request.sensory_friendly,
         story_type=request.story_type,
         protagonist_name=request.protagonist_name or "Protagonist",
+        deterministic=request.deterministic,
     )
 
     # 2) Generar pictogramas a partir del texto generado
-    pictogram_data = pictogram_service.generate_pictograms(text=story)
+    pictogram_data = await inference_executor.run_llm(
+        pictogram_service.generate_pictograms, text=story, image_mode=image_mode
+    )
 
     # Normalizar la forma de los pictogramas a PictogramData para consistencia
     if isinstance(pictogram_data, dict):
@@ -74,4 +89,77 @@ async def generate_pictogram_from_prompt(request: TextGenerationRequest):
         pictogram = pictogram_data
 
     # 3) Devolver ambos para que el cliente pueda mostrar la historia y las imágenes
-    return {"story": story, "pictograms": pictogram.dict()}
+    return {"story": story, "pictograms": pictogram.model_dump()}
+
+
+@router.post("/from_prompt/stream")
+async def stream_pictogram_from_prompt(request: TextGenerationRequest, image_mode: PictogramImageMode = "base64"):
+    """Stream a story and its pictograms as NDJSON while the story is generated.
+
+    Each sentence starts its keyword extraction and pictogram lookup as soon as
+    the text model completes it, so the first pictogram arrives long before the
+    story is finished. Every line is a JSON object:
+    `{"type": "text", "text": ...}` for story chunks, `{"type": "pictogram", "item": ...}`
+    for pictograms (in story order, at most 8), and finally `{"type": "done", "story": ...}`
+    or `{"type": "error", "detail": ...}`.
+
+    Args:
+        request (TextGenerationRequest): The request containing the prompt and parameters.
+        image_mode (PictogramImageMode): "base64" (default) or "url", as in `/pictogram/generate`.
+
+    Returns:
+        StreamingResponse: `application/x-ndjson` response.
+    """
+    stream_story = functools.partial(
+        text_service.stream_story,
+        prompt=request.prompt,
+        max_tokens=request.max_tokens,
+        tone=request.tone,
+        complexity=request.complexity,
+        sensory_friendly=request.sensory_friendly,
+        story_type=request.story_type,
+        protagonist_name=request.protagonist_name or "Protagonist",
+        deterministic=request.deterministic,
+    )
+
+    async def lines():
+        try:
+            async for event in inference_executor.stream(
+                "llm", pictogram_service.stream_pictograms_from_story, stream_story=stream_story, image_mode=image_mode
+            ):
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as e:
+            print(f"Error during pictogram streaming: {e}")
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/image/{image_key:path}")
+async def get_pictogram_image(image_key: str, request: Request):
+    """Serve a pictogram thumbnail by the `image_key` returned with each item.
+
+    Keys identify the image content, so responses carry a strong ETag and
+    `Cache-Control: immutable`; repeat visits are served from the browser cache
+    or answered with `304 Not Modified`.
+
+    Args:
+        image_key (str): Image key ("arasaac-<id>" or "fallback-<text>").
+        request (Request): Incoming request (used for `If-None-Match`).
+
+    Returns:
+        Response: PNG image.
+    """
+    image = await inference_executor.run_io(pictogram_service.get_pictogram_image, image_key)
+    if image is None:
+        raise HTTPException(status_code=404, detail="Pictogram image not found")
+
+    etag = etag_for(image)
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=image, media_type="image/png", headers=headers)
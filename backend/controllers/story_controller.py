@@ -0,0 +1,81 @@
+"""
+Controller for the story bundle endpoint.
+Generates a story and then its pictograms and narration concurrently, in a single request.
+"""
+import asyncio
+import time
+
+from fastapi import APIRouter
+from backend.schemas.pictogram_schemas import PictogramData, PictogramImageMode
+from backend.schemas.story_schemas import StoryBundleRequest, StoryBundleResponse
+from backend.schemas.voice_schemas import VoiceGenerationResponse
+from backend.services.inference_executor import inference_executor
+from backend.services.pictogram_service import pictogram_service
+from backend.services.text_service import text_service
+from backend.services.voice_service import voice_service
+
+router = APIRouter(prefix="/story", tags=["Story Bundle"])
+
+
+async def _timed(coro, timings: dict, stage: str):
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[stage] = round(time.perf_counter() - start, 3)
+
+
+@router.post("/bundle", response_model=StoryBundleResponse)
+async def generate_story_bundle(request: StoryBundleRequest, image_mode: PictogramImageMode = "base64"):
+    """Generate a story, its pictograms and its narration.
+
+    The story is generated once; pictograms (LLM pool, for the keyword
+    extraction) and audio (TTS pool) are then produced at the same time, so the
+    total latency is the story plus the slower of the two branches instead of
+    the sum of every stage and an extra round trip.
+
+    Args:
+        request (StoryBundleRequest): Story and voice parameters.
+        image_mode (PictogramImageMode): "base64" (default) or "url", as in `/pictogram/generate`.
+
+    Returns:
+        StoryBundleResponse: Story, pictograms, audio and per-stage timings.
+    """
+    timings = {}
+    started = time.perf_counter()
+
+    story = await _timed(inference_executor.run_llm(
+        text_service.generate_story,
+        prompt=request.prompt,
+        max_tokens=request.max_tokens,
+        tone=request.tone,
+        complexity=request.complexity,
+        sensory_friendly=request.sensory_friendly,
+        story_type=request.story_type,
+        protagonist_name=request.protagonist_name or "Protagonist",
+        deterministic=request.deterministic,
+    ), timings, "story")
+
+    pictogram_data, audio = await asyncio.gather(
+        _timed(inference_executor.run_llm(
+            pictogram_service.generate_pictograms, text=story, image_mode=image_mode
+        ), timings, "pictograms"),
+        _timed(inference_executor.run_tts(
+            voice_service.generate_audio,
+            text=story,
+            speaker_wav=request.speaker_wav or "",
+            language=request.language,
+            speed=request.voice_speed
+        ), timings, "audio"),
+    )
+    timings["total"] = round(time.perf_counter() - started, 3)
+
+    if isinstance(pictogram_data, dict):
+        pictogram_data = PictogramData(**pictogram_data)
+
+    return StoryBundleResponse(
+        story=story,
+        pictograms=pictogram_data,
+        audio=VoiceGenerationResponse(**audio),
+        metadata={"timings": timings}
+    )
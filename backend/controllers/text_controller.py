@@ -2,12 +2,40 @@
 Controller for text generation endpoints.
 Provides routes to generate personalized stories from a prompt and optional parameters.
 """
+import json
+from typing import Optional
+
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from backend.schemas.text_schemas import TextGenerationRequest, TextGenerationResponse
-from backend.services.text_service import TextGenerationService
+from backend.services.text_service import text_service
+from backend.services.inference_executor import inference_executor
 
 router = APIRouter(prefix="/text", tags=["Text Generation"])
-text_service = TextGenerationService()
+
+
+def _metadata(request: TextGenerationRequest) -> dict:
+    return {
+        "tone": request.tone,
+        "complexity": request.complexity,
+        "story_type": request.story_type
+    }
+
+
+async def _cached_story(request: TextGenerationRequest) -> Optional[str]:
+    # Un acierto de la caché solo lee memoria o disco: no debe esperar detrás de las generaciones
+    if not request.deterministic:
+        return None
+    return await inference_executor.run_io(
+        text_service.cached_story,
+        prompt=request.prompt,
+        max_tokens=request.max_tokens,
+        tone=request.tone,
+        complexity=request.complexity,
+        sensory_friendly=request.sensory_friendly,
+        story_type=request.story_type,
+        protagonist_name=request.protagonist_name or "Protagonist"
+    )
 
 
 @router.post("/generate", response_model=TextGenerationResponse)
@@ -15,27 +43,78 @@ async def generate_text(request: TextGenerationRequest):
     """
     Generates a personalized story from a prompt and optional parameters.
 
+    A deterministic request already in the story cache is answered from the io
+    pool, without waiting for a free LLM worker.
+
     Args:
         request (TextGenerationRequest): Object with parameters for text generation.
 
     Returns:
         TextGenerationResponse: Response with the generated text and associated metadata.
     """
-    generated_text = text_service.generate_story(
-        prompt=request.prompt,
-        max_tokens=request.max_tokens,
-        tone=request.tone,
-        complexity=request.complexity,
-        sensory_friendly=request.sensory_friendly,
-        story_type=request.story_type,
-        protagonist_name=request.protagonist_name or "Protagonist"
+    generated_text = await _cached_story(request)
+    if generated_text is None:
+        generated_text = await inference_executor.run_llm(
+            text_service.generate_story,
+            prompt=request.prompt,
+            max_tokens=request.max_tokens,
+            tone=request.tone,
+            complexity=request.complexity,
+            sensory_friendly=request.sensory_friendly,
+            story_type=request.story_type,
+            protagonist_name=request.protagonist_name or "Protagonist",
+            deterministic=request.deterministic
+        )
+
+    return TextGenerationResponse(text=generated_text, metadata=_metadata(request))
+
+
+@router.post("/stream")
+async def stream_text(request: TextGenerationRequest):
+    """
+    Streams a personalized story over Server-Sent Events while it is generated.
+
+    Each `message` event carries a JSON object `{"text": chunk}` with the next
+    sentence-sized chunk of the story; chunks concatenate to the same text that
+    `/text/generate` would return. A final `done` event carries the metadata,
+    or an `error` event if generation fails midway.
+
+    Args:
+        request (TextGenerationRequest): Object with parameters for text generation.
+
+    Returns:
+        StreamingResponse: `text/event-stream` response.
+    """
+    async def events():
+        cached = await _cached_story(request)
+        if cached is not None:
+            yield f"data: {json.dumps({'text': cached}, ensure_ascii=False)}\n\n"
+            yield f"event: done\ndata: {json.dumps({'metadata': _metadata(request)})}\n\n"
+            return
+
+        try:
+            async for chunk in inference_executor.stream(
+                "llm",
+                text_service.stream_story,
+                prompt=request.prompt,
+                max_tokens=request.max_tokens,
+                tone=request.tone,
+                complexity=request.complexity,
+                sensory_friendly=request.sensory_friendly,
+                story_type=request.story_type,
+                protagonist_name=request.protagonist_name or "Protagonist",
+                deterministic=request.deterministic
+            ):
+                yield f"data: {json.dumps({'text': chunk}, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            print(f"Error during story streaming: {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            return
+
+        yield f"event: done\ndata: {json.dumps({'metadata': _metadata(request)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    
-    return TextGenerationResponse(
-        text=generated_text,
-        metadata={
-            "tone": request.tone,
-            "complexity": request.complexity,
-            "story_type": request.story_type
-        }
-    )
\ No newline at end of file
@@ -2,12 +2,20 @@
 Controller for voice generation endpoints.
 Provides routes to convert text to audio using custom parameters.
 """
-from fastapi import APIRouter
-from backend.schemas.voice_schemas import VoiceGenerationRequest, VoiceGenerationResponse
-from backend.services.voice_service import VoiceGenerationService
+import os
+import re
+from typing import BinaryIO, Iterator, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from backend.controllers.http_utils import REVALIDATE_CACHE_CONTROL, etag_for_file, is_not_modified, parse_range
+from backend.schemas.voice_schemas import AudioFormat, VoiceGenerationRequest, VoiceGenerationResponse
+from backend.services.voice_service import voice_service
+from backend.services.inference_executor import inference_executor
 
 router = APIRouter(prefix="/voice", tags=["Voice Generation"])
-voice_service = VoiceGenerationService()
+# Tamaño de los bloques en que se envía un audio: la memoria no depende del rango pedido
+AUDIO_CHUNK_BYTES = 64 * 1024
 
 @router.post("/generate", response_model=VoiceGenerationResponse)
 async def generate_voice(request: VoiceGenerationRequest):
@@ -20,10 +28,141 @@ async def generate_voice(request: VoiceGenerationRequest):
     Returns:
         VoiceGenerationResponse: Response with generated audio and metadata.
     """
-    result = voice_service.generate_audio(
+    result = await inference_executor.run_tts(
+        voice_service.generate_audio,
         text=request.text,
         speaker_wav=request.speaker_wav or "",
         language=request.language,
         speed=request.voice_speed
     )
-    return VoiceGenerationResponse(**result)
\ No newline at end of file
+    return VoiceGenerationResponse(**result)
+
+
+@router.post("/stream")
+async def stream_voice(request: VoiceGenerationRequest):
+    """
+    Streams audio from text while it is synthesized.
+
+    The body is a WAV file (mono, 16-bit PCM) sent with chunked transfer encoding:
+    a header with unknown length followed by audio chunks as soon as each one is
+    ready, so playback can start after the first sentence instead of the whole story.
+    The voice used is returned in the `X-Voice-Used` header.
+
+    Args:
+        request (VoiceGenerationRequest): Object with text and voice parameters.
+
+    Returns:
+        StreamingResponse: `audio/wav` response.
+    """
+    voice = voice_service.resolve_voice(request.speaker_wav or "")
+
+    async def chunks():
+        try:
+            async for chunk in inference_executor.stream(
+                "tts",
+                voice_service.stream_audio,
+                text=request.text,
+                speaker_wav=voice,
+                language=request.language,
+                speed=request.voice_speed
+            ):
+                yield chunk
+        except Exception as e:
+            # Las cabeceras ya se enviaron: solo queda cortar el audio
+            print(f"Error during audio streaming: {e}")
+
+    return StreamingResponse(
+        chunks(),
+        media_type="audio/wav",
+        headers={"Cache-Control": "no-cache", "X-Voice-Used": os.path.basename(voice)}
+    )
+
+
+
+def _open_audio(path: str) -> Tuple[BinaryIO, os.stat_result]:
+    # Abrir antes de responder: si la retención borra el archivo, el descriptor sigue siendo válido
+    audio = open(path, "rb")
+    return audio, os.fstat(audio.fileno())
+
+
+def _iter_audio(audio: BinaryIO, start: int, length: int) -> Iterator[bytes]:
+    try:
+        audio.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = audio.read(min(AUDIO_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        audio.close()
+
+
+@router.get("/audio/{audio_id}")
+async def get_audio(audio_id: str, request: Request, audio_format: AudioFormat = Query("wav", alias="format")):
+    """
+    Serves a generated audio by the id in `audio_url`, optionally transcoded.
+
+    Compact formats (FLAC, Ogg Vorbis, Opus) are encoded from the original WAV the
+    first time they are requested and cached on disk. Responses support `Range`
+    requests (206 Partial Content) so players can seek, and are streamed in
+    fixed-size chunks. The ETag identifies the stored file, not the id: an
+    artifact removed by retention and synthesized again may have other bytes,
+    so clients revalidate instead of caching it as immutable.
+
+    Args:
+        audio_id (str): Audio id (hash of the generation inputs).
+        request (Request): Incoming request (used for `Range`, `If-Range` and `If-None-Match`).
+        audio_format (AudioFormat): `?format=` "wav" (default), "flac", "ogg" or "opus".
+
+    Returns:
+        Response: The audio, whole or the requested byte range.
+    """
+    if not re.fullmatch(r"[0-9a-f]{64}", audio_id):
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    try:
+        audio_file = await inference_executor.run_io(voice_service.get_audio_file, audio_id, audio_format)
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    if audio_file is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    path, media_type = audio_file
+    try:
+        audio, stat = await inference_executor.run_io(_open_audio, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    etag = etag_for_file(stat)
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    size = stat.st_size
+    if is_not_modified(request, etag):
+        audio.close()
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    # If-Range: solo se respeta el rango si el cliente tiene la misma versión
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        audio.close()
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        return StreamingResponse(
+            _iter_audio(audio, 0, size),
+            media_type=media_type,
+            headers={**headers, "Content-Length": str(size)}
+        )
+
+    start, end = byte_range
+    return StreamingResponse(
+        _iter_audio(audio, start, end - start + 1),
+        status_code=206,
+        media_type=media_type,
+        headers={**headers, "Content-Length": str(end - start + 1), "Content-Range": f"bytes {start}-{end}/{size}"}
+    )
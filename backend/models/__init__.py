@@ -1,9 +1,12 @@
 from .text_model import TextGenerationModel
 from .voice_model import VoiceGenerationModel
 from .pictogram_model import PictogramGenerationModel
+from .model_registry import ModelRegistry, model_registry
 
 __all__ = [
     "TextGenerationModel",
     "VoiceGenerationModel",
-    "PictogramGenerationModel"
+    "PictogramGenerationModel",
+    "ModelRegistry",
+    "model_registry"
 ]
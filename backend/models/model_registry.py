@@ -0,0 +1,137 @@
+"""
+Process-wide registry of AI models.
+Owns one shared instance per checkpoint so every service reuses the same weights.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from backend.config.settings import settings
+from backend.models.text_model import TextGenerationModel
+from backend.models.voice_model import VoiceGenerationModel
+
+
+class ModelRegistry:
+    """
+    Registry that hands out shared model instances keyed by checkpoint name.
+
+    Services ask the registry for a model instead of instantiating their own,
+    so a process holds a single copy of each set of weights no matter how many
+    services or controllers use it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._text_models: Dict[str, TextGenerationModel] = {}
+        self._voice_models: Dict[str, VoiceGenerationModel] = {}
+        # Modelos que deben estar listos para aceptar tráfico (ver `preload`)
+        self._required: Dict[str, str] = {}
+        self._preload_failed = False
+
+    def get_text_model(self, checkpoint: Optional[str] = None) -> TextGenerationModel:
+        """Return the shared text model for a checkpoint.
+
+        Args:
+            checkpoint (Optional[str]): Model checkpoint. Defaults to `settings.text_model_checkpoint`.
+
+        Returns:
+            TextGenerationModel: Shared model instance (weights are loaded lazily).
+        """
+        checkpoint = checkpoint or settings.text_model_checkpoint
+        with self._lock:
+            model = self._text_models.get(checkpoint)
+            if model is None:
+                model = TextGenerationModel(checkpoint)
+                self._text_models[checkpoint] = model
+            return model
+
+    def get_voice_model(self, model_name: Optional[str] = None) -> VoiceGenerationModel:
+        """Return the shared voice model for a TTS model name.
+
+        Args:
+            model_name (Optional[str]): TTS model name. Defaults to `settings.voice_model_name`.
+
+        Returns:
+            VoiceGenerationModel: Shared model instance (weights are loaded lazily).
+        """
+        model_name = model_name or settings.voice_model_name
+        with self._lock:
+            model = self._voice_models.get(model_name)
+            if model is None:
+                model = VoiceGenerationModel(model_name)
+                self._voice_models[model_name] = model
+            return model
+
+    def register_voice_model(self, model: VoiceGenerationModel):
+        """Use `model` as the shared instance for its `model_name`.
+
+        Must be called before services ask for that model, e.g. to plug a stub
+        TTS engine into the benchmarks.
+        """
+        with self._lock:
+            self._voice_models[model.model_name] = model
+
+    def expect(self, kinds: Iterable[str]) -> List[Tuple[str, Union[TextGenerationModel, VoiceGenerationModel]]]:
+        """Mark the default models of `kinds` as required for readiness, without loading them.
+
+        Call it before starting `preload` in the background: from then on
+        `is_ready` stays False until those models are ready, instead of reporting
+        a cold worker as ready while the preload thread has not started yet.
+
+        Args:
+            kinds (Iterable[str]): "text" and/or "voice".
+
+        Returns:
+            List[Tuple[str, Union[TextGenerationModel, VoiceGenerationModel]]]: `(kind, model)` pairs.
+        """
+        models = []
+        for kind in kinds:
+            if kind == "text":
+                models.append((kind, self.get_text_model()))
+            elif kind == "voice":
+                models.append((kind, self.get_voice_model()))
+            else:
+                print(f"Unknown model kind to preload: {kind}")
+        with self._lock:
+            for kind, model in models:
+                self._required[kind] = getattr(model, "model_checkpoint", None) or model.model_name
+        return models
+
+    def preload(self, kinds: Iterable[str] = ("text", "voice"), warmup: bool = True):
+        """Load (and optionally warm up) the default models before serving traffic.
+
+        Until every requested model is ready, `is_ready` returns False, so an
+        orchestrator routes requests only to warm workers.
+
+        Args:
+            kinds (Iterable[str]): Models to preload: "text" and/or "voice".
+            warmup (bool): Run a short dummy generation after loading.
+        """
+        models = self.expect(kinds)
+        for kind, model in models:
+            try:
+                if warmup:
+                    model.warmup()
+                else:
+                    model.load_model()
+                print(f"Model '{kind}' is {model.state}")
+            except Exception as e:
+                print(f"Failed to preload model '{kind}': {e}")
+                self._preload_failed = True
+
+    def status(self) -> Dict[str, Dict[str, str]]:
+        """Return the state of every registered model, by kind and checkpoint."""
+        with self._lock:
+            return {
+                "text": {name: model.state for name, model in self._text_models.items()},
+                "voice": {name: model.state for name, model in self._voice_models.items()}
+            }
+
+    def is_ready(self) -> bool:
+        """True when every model passed to `preload` is loaded and warm."""
+        status = self.status()
+        return not self._preload_failed and all(
+            status[kind].get(name) == "ready" for kind, name in self._required.items()
+        )
+
+
+model_registry = ModelRegistry()
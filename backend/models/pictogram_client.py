@@ -0,0 +1,85 @@
+"""
+Pooled HTTP client for the pictogram API.
+Reuses keep-alive connections (HTTP/2 when `httpx[http2]` is installed) and retries with backoff.
+"""
+import random
+import time
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+    import h2  # noqa: F401  (solo para comprobar que HTTP/2 está disponible)
+except ImportError:
+    httpx = None
+
+
+class PictogramHttpClient:
+    """
+    Thread-safe HTTP client with a shared connection pool.
+
+    Uses `httpx` with HTTP/2 when it is installed together with `h2`, and a
+    `requests.Session` with a sized connection pool otherwise. Both keep TCP/TLS
+    connections alive between requests, so only the first request to the API
+    pays the handshake.
+
+    Retries use exponential backoff with jitter. The wait only blocks the worker
+    thread resolving that request; other sentences keep being fetched in parallel.
+
+    Args:
+        base_url (str): API base URL (e.g. `settings.pictograms_api_base_url` or a local stub server).
+        pool_size (int): Maximum number of pooled connections.
+        retries (int): Attempts per request.
+        backoff (float): Base delay in seconds between attempts.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = 16, retries: int = 2, backoff: float = 0.25):
+        self.base_url = base_url.rstrip("/")
+        self.retries = max(1, retries)
+        self.backoff = backoff
+
+        if httpx is not None:
+            self.http2 = True
+            self._errors = (httpx.HTTPError,)
+            self._client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            )
+        else:
+            self.http2 = False
+            self._errors = (requests.RequestException,)
+            self._client = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self._client.mount("http://", adapter)
+            self._client.mount("https://", adapter)
+
+    def get(self, path: str, timeout: float = 6) -> Optional[Any]:
+        """GET `base_url/path`, retrying network errors and 5xx responses.
+
+        Args:
+            path (str): Path relative to the base URL.
+            timeout (float): Timeout in seconds for each attempt.
+
+        Returns:
+            The response object (`status_code`, `headers`, `content`, `json()`) for any
+            status below 500, or None if every attempt failed.
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        for attempt in range(self.retries):
+            try:
+                resp = self._client.get(url, timeout=timeout)
+                if resp.status_code < 500:
+                    return resp
+                print(f"PictogramHttpClient: {url} returned {resp.status_code} (attempt {attempt+1})")
+            except self._errors as e:
+                print(f"PictogramHttpClient: request to {url} failed (attempt {attempt+1}): {e}")
+
+            if attempt + 1 < self.retries:
+                time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+        return None
+
+    def close(self):
+        self._client.close()
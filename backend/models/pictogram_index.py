@@ -0,0 +1,270 @@
+"""
+Offline pictogram index built from an ARASAAC catalog dump.
+Resolves concepts to pictogram ids with in-memory dictionary lookups and serves the PNG files from disk.
+
+Import a dump (JSON metadata as returned by `GET /pictograms/all/{language}` and a directory
+with the PNG files, named `<id>.png` or `<id>_<size>.png`):
+
+    python -m backend.models.pictogram_index --catalog arasaac_es.json --images ./png \\
+        --output resources/pictograms/index.json --language es
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+
+INDEX_VERSION = 1
+
+# Peso de cada palabra de la búsqueda según coincida con la palabra clave exacta o con una variante
+EXACT_MATCH_WEIGHT = 2
+VARIANT_MATCH_WEIGHT = 1
+
+# Índices ya cargados por ruta absoluta: cada proceso (y el maestro antes del fork) los lee una vez
+_shared_indexes: Dict[str, "LocalPictogramIndex"] = {}
+_shared_lock = threading.Lock()
+
+
+def fold(text: str) -> str:
+    """Lowercase, strip accents and collapse whitespace."""
+    text = unicodedata.normalize('NFKD', text or "").encode('ascii', 'ignore').decode('ascii')
+    return " ".join(text.lower().split())
+
+
+def word_variants(word: str) -> List[str]:
+    """Return the word plus simple singular and infinitive guesses (Spanish).
+
+    The keywords in ARASAAC are singular nouns and infinitive verbs, while the
+    keyword extractor may return plurals ("perros") or conjugated forms ("salta").
+    These heuristics cover the regular cases without a full lemmatizer.
+    """
+    variants = [word]
+    if len(word) > 4 and word.endswith("es"):
+        variants.append(word[:-2])
+    if len(word) > 3 and word.endswith("s"):
+        variants.append(word[:-1])
+    # Formas regulares de tercera persona -> infinitivo
+    for suffix, endings in (("an", ("ar",)), ("en", ("er", "ir")), ("a", ("ar",)), ("e", ("er", "ir"))):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            stem = word[:-len(suffix)]
+            variants.extend(stem + ending for ending in endings)
+            break
+    return variants
+
+
+class LocalPictogramIndex:
+    """
+    Inverted keyword index over a local ARASAAC catalog.
+
+    `search` returns results with the same shape as the API (`_id`, `violence`,
+    `schematic`), in catalog order, so the selection logic of
+    `PictogramGenerationModel._resolve_pictogram_id` applies unchanged.
+
+    Args:
+        data (Dict[str, Any]): Parsed index file.
+        base_dir (str): Directory the image paths in the index are relative to.
+    """
+
+    def __init__(self, data: Dict[str, Any], base_dir: str):
+        self.language: str = data.get("language", "es")
+        self.images_dir: str = os.path.join(base_dir, data.get("images_dir", ""))
+        self.pictograms: Dict[str, Dict[str, Any]] = data.get("pictograms", {})
+        self.keywords: Dict[str, List[str]] = data.get("keywords", {})
+        # Posición de cada pictograma en el catálogo, para desempatar
+        self._positions: Dict[str, int] = {pict_id: i for i, pict_id in enumerate(self.pictograms)}
+
+    @classmethod
+    def load(cls, path: str) -> "LocalPictogramIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported pictogram index version: {data.get('version')}")
+        return cls(data, os.path.dirname(os.path.abspath(path)))
+
+    @classmethod
+    def shared(cls, path: str) -> "LocalPictogramIndex":
+        """Return the process-wide index for `path`, loading it on first use.
+
+        Every model asking for the same file gets the same read-only instance, so
+        the catalog is parsed and held in memory once.
+
+        Raises:
+            OSError, ValueError: If the file cannot be read or has another version.
+        """
+        key = os.path.abspath(path)
+        with _shared_lock:
+            index = _shared_indexes.get(key)
+            if index is None:
+                index = cls.load(key)
+                _shared_indexes[key] = index
+            return index
+
+    def __len__(self) -> int:
+        return len(self.pictograms)
+
+    def search(self, language: str, search_text: str) -> List[Dict[str, Any]]:
+        """Find pictograms for a (folded) search text.
+
+        The whole phrase is tried first; otherwise ids are ranked by how many of
+        the query words they match, an exact keyword counting more than a variant
+        (so "casa" beats "casar" for "casa"). In both cases pictograms with an image
+        on disk come before the ones `read_image` cannot serve.
+
+        Args:
+            language (str): Language code; an index only answers for its own language.
+            search_text (str): Plain search text, e.g. "perro jugar".
+
+        Returns:
+            List[Dict[str, Any]]: API-shaped results, best matches first.
+        """
+        if language != self.language:
+            return []
+
+        query = fold(search_text)
+        if not query:
+            return []
+
+        scores: Dict[str, int] = {}
+        ids = [pict_id for pict_id in self.keywords.get(query, ()) if pict_id in self.pictograms]
+        if not ids:
+            for word in query.split():
+                # Mejor coincidencia de cada pictograma con esta palabra: exacta 2, variante 1
+                best: Dict[str, int] = {}
+                for position, variant in enumerate(word_variants(word)):
+                    weight = EXACT_MATCH_WEIGHT if position == 0 else VARIANT_MATCH_WEIGHT
+                    for pict_id in self.keywords.get(variant, ()):
+                        if pict_id in self.pictograms and best.get(pict_id, 0) < weight:
+                            best[pict_id] = weight
+                for pict_id, weight in best.items():
+                    scores[pict_id] = scores.get(pict_id, 0) + weight
+            ids = list(scores)
+
+        # Primero con imagen, luego más puntuación, luego orden del catálogo
+        ids = sorted(ids, key=lambda pict_id: (
+            not self.pictograms[pict_id].get("image"), -scores.get(pict_id, 0), self._positions[pict_id]
+        ))
+        return [self._result(pict_id) for pict_id in ids]
+
+    def image_path(self, pict_id: Any) -> Optional[str]:
+        entry = self.pictograms.get(str(pict_id))
+        if entry is None or not entry.get("image"):
+            return None
+        return os.path.join(self.images_dir, entry["image"])
+
+    def read_image(self, pict_id: Any) -> Optional[bytes]:
+        path = self.image_path(pict_id)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError as e:
+            print(f"LocalPictogramIndex: cannot read {path}: {e}")
+            return None
+
+    def _result(self, pict_id: str) -> Dict[str, Any]:
+        entry = self.pictograms[pict_id]
+        return {"_id": int(pict_id) if pict_id.isdigit() else pict_id,
+                "violence": entry.get("violence", False),
+                "schematic": entry.get("schematic", False)}
+
+
+def _find_images(images_dir: str) -> Dict[str, str]:
+    # Acepta "<id>.png" y "<id>_<tamaño>.png"; si hay varias, se queda con la de nombre más corto
+    found: Dict[str, str] = {}
+    for filename in sorted(os.listdir(images_dir)):
+        match = re.match(r"^(\d+)(?:_[^.]*)?\.png$", filename, flags=re.IGNORECASE)
+        if not match:
+            continue
+        pict_id = match.group(1)
+        if pict_id not in found or len(filename) < len(found[pict_id]):
+            found[pict_id] = filename
+    return found
+
+
+def build_index(catalog: Iterable[Dict[str, Any]], images_dir: str, output_path: str, language: str = "es") -> Dict[str, Any]:
+    """Build the index file from catalog entries and a directory of PNG files.
+
+    Args:
+        catalog (Iterable[Dict[str, Any]]): ARASAAC pictogram metadata entries.
+        images_dir (str): Directory with the PNG files.
+        output_path (str): Where to write the index JSON.
+        language (str): Catalog language.
+
+    Returns:
+        Dict[str, Any]: The index data that was written.
+    """
+    images = _find_images(images_dir) if os.path.isdir(images_dir) else {}
+    pictograms: Dict[str, Dict[str, Any]] = {}
+    keywords: Dict[str, List[str]] = {}
+
+    def add(term: str, pict_id: str):
+        postings = keywords.setdefault(term, [])
+        if not postings or postings[-1] != pict_id:
+            postings.append(pict_id)
+
+    for entry in catalog:
+        if not isinstance(entry, dict) or entry.get("_id") is None:
+            continue
+        pict_id = str(entry["_id"])
+        terms = []
+        for keyword in entry.get("keywords") or []:
+            if not isinstance(keyword, dict):
+                continue
+            for field in ("keyword", "plural"):
+                term = fold(keyword.get(field) or "")
+                if term and term not in terms:
+                    terms.append(term)
+        if not terms:
+            continue
+
+        pictograms[pict_id] = {
+            "violence": bool(entry.get("violence")),
+            "schematic": bool(entry.get("schematic")),
+            "image": images.get(pict_id, ""),
+            "keywords": terms
+        }
+        for term in terms:
+            add(term, pict_id)
+            # También cada palabra suelta de las expresiones de varias palabras
+            for word in term.split():
+                if word != term and len(word) > 2:
+                    add(word, pict_id)
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    data = {
+        "version": INDEX_VERSION,
+        "language": language,
+        "images_dir": os.path.relpath(os.path.abspath(images_dir), output_dir),
+        "pictograms": pictograms,
+        "keywords": keywords
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import an ARASAAC catalog dump into a local pictogram index")
+    parser.add_argument("--catalog", required=True, help="JSON file with the pictogram metadata")
+    parser.add_argument("--images", required=True, help="Directory with the PNG files")
+    parser.add_argument("--output", default="resources/pictograms/index.json", help="Index file to write")
+    parser.add_argument("--language", default="es", help="Catalog language")
+    args = parser.parse_args()
+
+    with open(args.catalog, "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+
+    data = build_index(catalog, args.images, args.output, language=args.language)
+    with_images = sum(1 for entry in data["pictograms"].values() if entry["image"])
+    print(
+        f"Indexed {len(data['pictograms'])} pictograms ({with_images} with image) "
+        f"and {len(data['keywords'])} keywords into {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,99 @@
 import os
 import base64
+import json
 import re
+import threading
 from io import BytesIO
-from typing import List, Dict, Any, Optional
-import requests
+from typing import List, Dict, Any, Optional, Callable, Tuple
 import unicodedata
-import time
-from urllib.parse import quote
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import quote, unquote
 from PIL import Image, ImageDraw, ImageFont
 from backend.models.text_model import TextGenerationModel
+from backend.models.model_registry import model_registry
+from backend.models.pictogram_client import PictogramHttpClient
+from backend.models.pictogram_index import LocalPictogramIndex
+from backend.cache import DiskCache, LRUCache, TieredCache
 from backend.config.settings import settings as app_settings
+from backend.monitoring.metrics import FALLBACKS, STAGE_SECONDS, track_cache
+
+# Lado en píxeles de las miniaturas que se envían al cliente
+THUMBNAIL_SIZE = 192
+# Máximo de pictogramas por historia
+MAX_PICTOGRAMS = 8
+# Ids de ARASAAC devueltos en respuestas recientes: /pictogram/image solo sirve estos (o los ya cacheados)
+ISSUED_IDS_MAX_ENTRIES = 8192
+# Texto que puede llevar una clave "fallback-<texto>" (ver `_fallback_key`)
+FALLBACK_KEY_PATTERN = re.compile(r"[a-z]{0,12}")
 
 class PictogramGenerationModel:
     """
     Model for generating educational pictograms from text.
     Uses text models to extract keywords and image models to create pictograms.
     """
-    def __init__(self):
-        self.text_model = TextGenerationModel()
+    def __init__(self, text_model: Optional[TextGenerationModel] = None):
+        # Reutiliza el modelo de texto compartido del registro para no cargar otra copia de los pesos
+        self.text_model = text_model or model_registry.get_text_model()
         # URL base del servicio de pictogramas (puede venir de settings o de la variable de entorno)
         self.base_url: str = getattr(app_settings, "pictograms_api_base_url", os.getenv("PICTOGRAMS_API_BASE_URL", "https://api.arasaac.org/api/"))
+        # Cliente HTTP con conexiones persistentes y etapa de descarga concurrente
+        self.http = PictogramHttpClient(
+            self.base_url,
+            pool_size=app_settings.pictogram_http_pool_size,
+            retries=app_settings.pictogram_http_retries,
+            backoff=app_settings.pictogram_http_backoff_seconds
+        )
+        self._fetch_executor = ThreadPoolExecutor(
+            max_workers=max(1, app_settings.pictogram_fetch_concurrency),
+            thread_name_prefix="pictogram-fetch"
+        )
+        # Índice local opcional: "local" no usa la red, "hybrid" consulta la API si no hay coincidencias
+        self.source: str = app_settings.pictogram_source
+        self.local_index: Optional[LocalPictogramIndex] = None
+        if self.source != "api":
+            self.local_index = self._load_local_index(app_settings.pictogram_index_path)
+        # Caché de dos niveles (memoria + disco) para búsquedas e imágenes de ARASAAC
+        self.search_cache: Optional[TieredCache] = None
+        self.image_cache: Optional[TieredCache] = None
+        if app_settings.pictogram_cache_enabled:
+            self.search_cache = self._build_cache("search", app_settings.pictogram_cache_memory_entries)
+            self.image_cache = self._build_cache("images", app_settings.pictogram_cache_memory_entries // 4)
+            track_cache("pictogram_search", self.search_cache)
+            track_cache("pictogram_image", self.image_cache)
+        # Miniaturas ya codificadas (PNG + base64) por (imagen original, tamaño, formato)
+        self.thumbnail_cache: Optional[LRUCache] = None
+        if app_settings.pictogram_thumbnail_cache_entries > 0:
+            self.thumbnail_cache = LRUCache(
+                max_entries=app_settings.pictogram_thumbnail_cache_entries,
+                max_bytes=app_settings.pictogram_thumbnail_cache_max_bytes,
+                size_of=lambda encoded: len(encoded[0]) + len(encoded[1])
+            )
+            track_cache("pictogram_thumbnail", self.thumbnail_cache)
+        # Ids que este proceso ya ha devuelto; evita que /pictogram/image sea un proxy abierto a ARASAAC
+        self._issued_ids = LRUCache(max_entries=ISSUED_IDS_MAX_ENTRIES)
     
+    def _load_local_index(self, path: str) -> Optional[LocalPictogramIndex]:
+        try:
+            index = LocalPictogramIndex.shared(path)
+            print(f"Local pictogram index loaded: {len(index)} pictograms")
+            return index
+        except (OSError, ValueError) as e:
+            print(f"Local pictogram index unavailable ({e}), using the pictogram API")
+            self.source = "api"
+            return None
+
+    def _build_cache(self, namespace: str, memory_entries: int) -> TieredCache:
+        # Cada espacio de nombres tiene su propio directorio y la mitad del presupuesto de disco
+        return TieredCache(
+            memory=LRUCache(max_entries=memory_entries),
+            disk=DiskCache.shared(
+                os.path.join(app_settings.pictogram_cache_dir, namespace),
+                max_bytes=app_settings.pictogram_cache_max_disk_bytes // 2
+            ),
+            ttl=app_settings.pictogram_cache_ttl_seconds,
+            stale_ttl=app_settings.pictogram_cache_stale_seconds
+        )
+
     def load_model(self):
         # Solo necesitamos cargar el modelo de texto (si corresponde). La parte de imágenes
         # se realiza mediante la API externa, por lo que no hay modelos locales para cargar aquí.
@@ -32,88 +105,128 @@ class PictogramGenerationModel:
         sentences = re.split(r'[.!?]+', text)
         return [s.strip() for s in sentences if s.strip() and len(s.strip()) > 8]
     
-    def _extract_key_words(self, sentence: str) -> List[str]:
-        if self.text_model.model is None:
-            self.load_model()
+    def _normalize_tokens(self, text: str) -> List[str]:
+        # Secuencias de letras (incluye acentos) sin puntuación ni dígitos, plegadas
+        # igual que las búsquedas: sin tildes y en minúsculas
+        tokens = re.findall(r"[^\W\d_]+", text, flags=re.UNICODE)
+        cleaned = []
+        for t in tokens:
+            t_norm = unicodedata.normalize('NFKD', t).encode('ascii', 'ignore').decode('ascii')
+            t_norm = t_norm.strip().lower()
+            if t_norm:
+                cleaned.append(t_norm)
+        return cleaned
 
-        if self.text_model.model is None:
-            words = sentence.split()
-            return words[:2] if len(words) >= 2 else words
+    def _sentence_fallback_words(self, sentence: str) -> List[str]:
+        return self._normalize_tokens(sentence)[:2]
 
-        prompt = (
+    def _key_words_prompt(self, sentence: str) -> str:
+        return (
             f"Extract ONLY the main noun (object, animal, person) "
             f"and the main verb from this sentence. Respond with 2 words separated by comma.\n"
             f"Sentence: {sentence}\n"
             f"Response:"
         )
-        
-        try:
-            result = self.text_model.generate(prompt, max_new_tokens=10)
 
-            # Extraer palabras robustamente de la respuesta del modelo. Muchos modelos
-            # pueden responder con etiquetas o texto adicional; aquí buscamos secuencias
-            # de letras (incluye acentos) y tomamos las dos primeras.
-            tokens = re.findall(r"[^\W\d_]+", result, flags=re.UNICODE)
+    def _parse_key_words(self, result: str) -> List[str]:
+        # Extraer palabras robustamente de la respuesta del modelo. Muchos modelos
+        # pueden responder con etiquetas o texto adicional; tomamos las dos primeras.
+        return self._normalize_tokens(result)[:2]
 
-            # Normalizar: quitar tildes y espacios extra, bajar a minúsculas
-            cleaned = []
-            for t in tokens:
-                t_norm = unicodedata.normalize('NFKD', t).encode('ascii', 'ignore').decode('ascii')
-                t_norm = t_norm.strip().lower()
-                if t_norm:
-                    cleaned.append(t_norm)
+    def _extract_key_words(self, sentence: str) -> List[str]:
+        if self.text_model.model is None:
+            self.load_model()
 
+        if self.text_model.model is None:
+            return self._sentence_fallback_words(sentence)
+
+        try:
+            with STAGE_SECONDS.time(stage="keyword_extraction"):
+                result = self.text_model.generate(self._key_words_prompt(sentence), max_new_tokens=10)
+            cleaned = self._parse_key_words(result)
             if cleaned:
-                return cleaned[:2]
+                return cleaned
 
             # Fallback simple si el modelo no devolvió tokens útiles
-            words = sentence.split()
-            return words[:2] if len(words) >= 2 else words
+            return self._sentence_fallback_words(sentence)
 
         except Exception as e:
             print(f"Error extracting keywords: {e}")
-            words = sentence.split()
-            return words[:2] if len(words) >= 2 else words
+            return self._sentence_fallback_words(sentence)
+
+    def _extract_key_words_batch(self, sentences: List[str]) -> List[List[str]]:
+        """Extrae sustantivo y verbo de todas las frases con una sola llamada por lotes al modelo.
+
+        Si el lote falla se usa la extracción frase a frase; si una respuesta concreta
+        no contiene palabras útiles, solo esa frase vuelve al camino individual.
+
+        Args:
+            sentences: frases de la historia.
+
+        Returns:
+            Lista de palabras clave por frase, en el mismo orden.
+        """
+        if not sentences:
+            return []
+
+        if self.text_model.model is None:
+            self.load_model()
+
+        if self.text_model.model is None:
+            return [self._sentence_fallback_words(sentence) for sentence in sentences]
+
+        try:
+            with STAGE_SECONDS.time(stage="keyword_extraction"):
+                results = self.text_model.generate_batch(
+                    [self._key_words_prompt(sentence) for sentence in sentences],
+                    max_new_tokens=10
+                )
+        except Exception as e:
+            print(f"Batched keyword extraction failed, falling back per sentence: {e}")
+            return [self._extract_key_words(sentence) for sentence in sentences]
+
+        key_words = []
+        for sentence, result in zip(sentences, results):
+            cleaned = self._parse_key_words(result)
+            key_words.append(cleaned if cleaned else self._extract_key_words(sentence))
+        return key_words
     
-    def _generate_pictogram(self, key_words: List[str]) -> Image.Image:
-        # Construye texto de búsqueda a partir de las palabras clave y consulta la API externa
+    def _resolve_pictogram_id(self, key_words: List[str]) -> Optional[Any]:
+        """Busca las palabras clave y elige el id del pictograma más adecuado, o None."""
         if not key_words:
-            return self._create_simple_fallback(key_words)
+            return None
         # Crear la cadena de búsqueda con los tokens obtenidos (usar percent-encoding)
         search_text = quote(" ".join(key_words), safe='')
 
-        try:
-            results = self._search_pictograms("es", search_text)
-            if results and len(results) > 0:
-                # Preferir pictogramas sin violencia y esquemáticos si están disponibles.
-                pict_id = None
-                for r in results:
-                    # Asegurarse de que r es dict
-                    if not isinstance(r, dict):
-                        continue
-                    if r.get("violence"):
-                        # ignorar resultados con marca de violencia
-                        continue
-                    if r.get("schematic"):
-                        pict_id = r.get("_id")
-                        break
-                    if pict_id is None:
-                        pict_id = r.get("_id")
-
-                if pict_id is not None:
-                    image = self._download_pictogram_image(pict_id)
-                    if image:
-                        return image
-
-        except Exception as e:
-            print(f"API pictogram generation error: {e}")
+        results = self._search_pictograms("es", search_text)
+        # Preferir pictogramas sin violencia y esquemáticos si están disponibles.
+        pict_id = None
+        for r in results or []:
+            # Asegurarse de que r es dict
+            if not isinstance(r, dict):
+                continue
+            if r.get("violence"):
+                # ignorar resultados con marca de violencia
+                continue
+            if r.get("schematic"):
+                pict_id = r.get("_id")
+                break
+            if pict_id is None:
+                pict_id = r.get("_id")
+        return pict_id
 
-        # Si la API no devuelve nada o falla, usar fallback local
-        return self._create_simple_fallback(key_words)
+    def _normalize_search_text(self, search_text: str) -> str:
+        # Clave estable: sin percent-encoding, sin tildes, en minúsculas y con espacios simples
+        text = unquote(search_text)
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+        return " ".join(text.lower().split())
 
     def _search_pictograms(self, language: str, search_text: str) -> List[Dict[str, Any]]:
         """Consulta la API de pictogramas y devuelve la lista de resultados JSON.
 
+        Los resultados se guardan en la caché por (idioma, texto normalizado); una
+        búsqueda sin resultados también se guarda para no repetirla.
+
         Args:
             language: código de idioma (por ejemplo 'es').
             search_text: texto de búsqueda URL-encoded.
@@ -121,67 +234,113 @@ class PictogramGenerationModel:
         Returns:
             Lista de objetos (diccionarios) devueltos por la API o lista vacía en caso de error.
         """
-        url = f"{self.base_url.rstrip('/')}/pictograms/{language}/search/{search_text}"
-        attempts = 2
-        for attempt in range(attempts):
-            try:
-                resp = requests.get(url, timeout=6)
-                resp.raise_for_status()
-                data = resp.json()
-
-                # Aceptar varios formatos: lista directa o {results: [...] } o {data: [...]}
-                if isinstance(data, list):
-                    return data
-                if isinstance(data, dict):
-                    res = data.get('results')
-                    if isinstance(res, list):
-                        return res
-                    res2 = data.get('data')
-                    if isinstance(res2, list):
-                        return res2
-
-                print(f"_search_pictograms: unexpected response format: {type(data)}")
-                return []
-
-            except requests.RequestException as e:
-                print(f"_search_pictograms request failed (attempt {attempt+1}): {e}")
-                time.sleep(0.5)
+        if self.local_index is not None:
+            results = self.local_index.search(language, unquote(search_text))
+            if results or self.source == "local":
+                return results
+
+        if self.search_cache is None:
+            return self._fetch_search_results(language, search_text) or []
+
+        key = f"search:{language}:{self._normalize_search_text(search_text)}"
+
+        def fetch() -> Optional[bytes]:
+            results = self._fetch_search_results(language, search_text)
+            return json.dumps(results).encode("utf-8") if results is not None else None
+
+        raw = self.search_cache.get_or_fetch(key, fetch)
+        if raw is None:
+            return []
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return []
+
+    def _fetch_search_results(self, language: str, search_text: str) -> Optional[List[Dict[str, Any]]]:
+        """Realiza la búsqueda contra la API.
+
+        Returns:
+            Lista de resultados (posiblemente vacía) o None si la API no respondió correctamente.
+        """
+        with STAGE_SECONDS.time(stage="arasaac_search"):
+            resp = self.http.get(f"pictograms/{language}/search/{search_text}", timeout=6)
+        if resp is None:
+            return None
+        # La API responde 404 cuando no hay coincidencias: es un resultado vacío válido
+        if resp.status_code == 404:
+            return []
+        if resp.status_code >= 400:
+            print(f"_search_pictograms: unexpected status {resp.status_code}")
+            return None
+
+        try:
+            data = resp.json()
+        except ValueError as e:
+            print(f"_search_pictograms: invalid JSON response: {e}")
+            return None
+
+        # Aceptar varios formatos: lista directa o {results: [...] } o {data: [...]}
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict):
+            res = data.get('results')
+            if isinstance(res, list):
+                return res
+            res2 = data.get('data')
+            if isinstance(res2, list):
+                return res2
 
+        print(f"_search_pictograms: unexpected response format: {type(data)}")
         return []
 
     def _download_pictogram_image(self, id_pictogram: Any) -> Optional[Image.Image]:
         """Descarga la imagen PNG del pictograma por su id y la devuelve como PIL.Image.
 
+        Si hay índice local se lee la imagen del disco; si no, los bytes descargados
+        se guardan en la caché por id de pictograma.
+
         Args:
             id_pictogram: identificador del pictograma (tal como lo devuelve la API).
 
         Returns:
             PIL.Image si se descarga correctamente, o None si falla.
         """
-        url = f"{self.base_url.rstrip('/')}/pictograms/{id_pictogram}"
-        attempts = 2
-        for attempt in range(attempts):
-            try:
-                resp = requests.get(url, timeout=8)
-                resp.raise_for_status()
-
-                ctype = resp.headers.get('content-type', '')
-                if not ctype.startswith('image/'):
-                    print(f"_download_pictogram_image: unexpected content-type {ctype}")
-                    return None
-
-                try:
-                    img = Image.open(BytesIO(resp.content))
-                    return img.convert("RGB")
-                except OSError as e:
-                    print(f"_download_pictogram_image: failed to parse image: {e}")
-                    return None
-
-            except requests.RequestException as e:
-                print(f"_download_pictogram_image request failed (attempt {attempt+1}): {e}")
-                time.sleep(0.5)
-
-        return None
+        content = self.local_index.read_image(id_pictogram) if self.local_index is not None else None
+
+        # En modo "local" nunca se sale a la red
+        if content is None and self.source != "local":
+            if self.image_cache is None:
+                content = self._fetch_pictogram_bytes(id_pictogram)
+            else:
+                content = self.image_cache.get_or_fetch(
+                    f"image:{id_pictogram}", lambda: self._fetch_pictogram_bytes(id_pictogram)
+                )
+        if content is None:
+            return None
+
+        try:
+            img = Image.open(BytesIO(content))
+            return img.convert("RGB")
+        except OSError as e:
+            print(f"_download_pictogram_image: failed to parse image: {e}")
+            return None
+
+    def _fetch_pictogram_bytes(self, id_pictogram: Any) -> Optional[bytes]:
+        """Descarga los bytes de la imagen del pictograma, o None si falla."""
+        with STAGE_SECONDS.time(stage="arasaac_download"):
+            resp = self.http.get(f"pictograms/{id_pictogram}", timeout=8)
+        if resp is None:
+            return None
+        if resp.status_code >= 400:
+            print(f"_download_pictogram_image: unexpected status {resp.status_code}")
+            return None
+
+        ctype = resp.headers.get('content-type', '')
+        if not ctype.startswith('image/'):
+            print(f"_download_pictogram_image: unexpected content-type {ctype}")
+            return None
+
+        return resp.content
     
     def _create_simple_fallback(self, key_words: List[str]) -> Image.Image:
         img = Image.new("RGB", (256, 256), (255, 255, 255))
@@ -205,66 +364,221 @@ class PictogramGenerationModel:
         
         return img
     
+    def _encode_image(self, image: Image.Image) -> bytes:
+        with STAGE_SECONDS.time(stage="image_encode"):
+            image_small = image.resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+
+            buffered = BytesIO()
+            image_small.save(buffered, format="PNG", optimize=True)
+            return buffered.getvalue()
+
     def _image_to_base64(self, image: Image.Image) -> str:
-        image_small = image.resize((192, 192), Image.Resampling.LANCZOS)
-        
-        buffered = BytesIO()
-        image_small.save(buffered, format="PNG", optimize=True)
-        return f"data:image/png;base64,{base64.b64encode(buffered.getvalue()).decode()}"
+        return f"data:image/png;base64,{base64.b64encode(self._encode_image(image)).decode()}"
+
+    def _fallback_key(self, key_words: List[str]) -> str:
+        # La imagen de respaldo solo depende del texto que se dibuja
+        return f"fallback-{key_words[0][:12] if key_words else ''}"
+
+    def _encode_pictogram(
+        self,
+        source_key: str,
+        load_image: Callable[[], Optional[Image.Image]]
+    ) -> Optional[Tuple[bytes, str]]:
+        """Devuelve (PNG, data URI base64) de la miniatura, usando la caché de derivados.
+
+        La imagen original solo se carga y se re-codifica cuando la miniatura no está en caché.
+
+        Args:
+            source_key: identifica la imagen original ("arasaac-<id>" o "fallback-<texto>").
+            load_image: carga la imagen original; puede devolver None si no está disponible.
+
+        Returns:
+            Tupla (bytes PNG, data URI) o None si la imagen no se pudo cargar.
+        """
+        cache_key = (source_key, THUMBNAIL_SIZE, "png")
+        encoded = self.thumbnail_cache.get(cache_key) if self.thumbnail_cache is not None else None
+        if encoded is not None:
+            return encoded
+
+        image = load_image()
+        if image is None:
+            return None
+        png = self._encode_image(image)
+        encoded = (png, f"data:image/png;base64,{base64.b64encode(png).decode()}")
+        if self.thumbnail_cache is not None:
+            self.thumbnail_cache.set(cache_key, encoded)
+        return encoded
+
+    def _encode_fallback(self, key_words: List[str]) -> Tuple[bytes, str]:
+        return self._encode_pictogram(self._fallback_key(key_words), lambda: self._create_simple_fallback(key_words))
     
-    def generate(self, text: str) -> Dict[str, Any]:
+    def _build_item(self, idx: int, sentence: str, key_words: List[str]) -> Dict[str, Any]:
+        """Resuelve el pictograma de una frase y construye el item de la respuesta."""
+        encoded = None
+        try:
+            pict_id = self._resolve_pictogram_id(key_words)
+            if pict_id is not None:
+                source_key = f"arasaac-{pict_id}"
+                encoded = self._encode_pictogram(source_key, lambda: self._download_pictogram_image(pict_id))
+                if encoded is not None:
+                    self._issued_ids.set(str(pict_id), True)
+        except Exception as e:
+            print(f"Sentence error {idx + 1}: {e}")
+            # ignored: la API puede fallar por petición HTTP
+
+        # Si la API no devuelve nada o falla, usar fallback local
+        if encoded is None:
+            FALLBACKS.inc(kind="pictogram")
+            source_key = self._fallback_key(key_words)
+            encoded = self._encode_fallback(key_words)
+
+        # Ajustar la estructura para cumplir con el schema PictogramItem:
+        # id (int), sentence (str), concept (str), image (str)
+        concept = " ".join(key_words) if key_words else ""
+        # Añadir label/alt para compatibilidad con el frontend
+        label = concept if concept else sentence
+        return {
+            "id": idx + 1,
+            "sentence": sentence,
+            "concept": concept,
+            "label": label,
+            "alt": label,
+            "image": encoded[1],
+            "image_key": source_key
+        }
+
+    def _build_sentence_item(self, idx: int, sentence: str) -> Dict[str, Any]:
+        return self._build_item(idx, sentence, self._extract_key_words(sentence))
+
+    def pipeline(self, on_item: Callable[[Dict[str, Any]], None]) -> "SentencePipeline":
+        """Start resolving pictograms for a story that is still being written (see `SentencePipeline`)."""
+        if self.text_model.model is None:
+            self.load_model()
+        return SentencePipeline(self, on_item)
+
+    def get_thumbnail(self, image_key: str) -> Optional[bytes]:
+        """Devuelve el PNG de la miniatura identificada por `image_key`.
+
+        Las claves son las mismas que se devuelven en `image_key` de cada item:
+        "arasaac-<id>" o "fallback-<texto>". Si la miniatura ya no está en la caché
+        se vuelve a generar a partir de la clave. Solo se aceptan ids de ARASAAC que
+        este servidor ya haya devuelto o tenga en caché o en el índice local, para no
+        descargar pictogramas arbitrarios a petición de cualquiera.
+
+        Args:
+            image_key: clave de la imagen.
+
+        Returns:
+            Bytes PNG o None si la clave no es válida o la imagen no se pudo obtener.
+        """
+        kind, _, value = image_key.partition("-")
+        if kind == "arasaac" and value.isdigit() and self._is_known_pictogram(value):
+            encoded = self._encode_pictogram(image_key, lambda: self._download_pictogram_image(value))
+        elif kind == "fallback" and FALLBACK_KEY_PATTERN.fullmatch(value):
+            encoded = self._encode_fallback([value] if value else [])
+        else:
+            return None
+        return encoded[0] if encoded is not None else None
+
+    def _is_known_pictogram(self, pict_id: str) -> bool:
+        """True si el id ya se devolvió en una respuesta o su imagen ya está disponible sin salir a la red."""
+        if self._issued_ids.get(pict_id) is not None:
+            return True
+        if self.thumbnail_cache is not None and self.thumbnail_cache.get((f"arasaac-{pict_id}", THUMBNAIL_SIZE, "png")) is not None:
+            return True
+        if self.local_index is not None and self.local_index.image_path(pict_id) is not None:
+            return True
+        # La caché de imágenes en disco es compartida entre workers: cubre ids devueltos por otro proceso
+        return self.image_cache is not None and f"image:{pict_id}" in self.image_cache
+
+    def generate(self, text: str, progress_callback: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
         if self.text_model.model is None:
             self.load_model()
         
         sentences = self._split_into_sentences(text)
         
-        if len(sentences) > 8:
-            step = max(1, len(sentences) // 8)
-            sentences = [sentences[i] for i in range(0, len(sentences), step)][:8]
+        if len(sentences) > MAX_PICTOGRAMS:
+            step = max(1, len(sentences) // MAX_PICTOGRAMS)
+            sentences = [sentences[i] for i in range(0, len(sentences), step)][:MAX_PICTOGRAMS]
         
         pictograms = []
+
+        if app_settings.pictogram_batch_keywords:
+            all_key_words = self._extract_key_words_batch(sentences)
+        else:
+            all_key_words = [self._extract_key_words(sentence) for sentence in sentences]
         
-        for idx, sentence in enumerate(sentences):
-            try:
-                key_words = self._extract_key_words(sentence)
-                
-                image = self._generate_pictogram(key_words)
-                image_b64 = self._image_to_base64(image)
-                
-                # Ajustar la estructura para cumplir con el schema PictogramItem:
-                # id (int), sentence (str), concept (str), image (str)
-                concept = " ".join(key_words) if key_words else ""
-                # Añadir label/alt para compatibilidad con el frontend
-                label = concept if concept else sentence
-                pictograms.append({
-                    "id": idx + 1,
-                    "sentence": sentence,
-                    "concept": concept,
-                    "label": label,
-                    "alt": label,
-                    "image": image_b64
-                })
-                
-                # no cache management necesario cuando se usan imágenes desde la API
-                    
-            except Exception as e:
-                print(f"Sentence error {idx + 1}: {e}")
-                # ignored: la API puede fallar por petición HTTP
-                
-                key_words = self._extract_key_words(sentence)
-                fallback = self._create_simple_fallback(key_words)
-                concept = " ".join(key_words) if key_words else ""
-                label = concept if concept else sentence
-                pictograms.append({
-                    "id": idx + 1,
-                    "sentence": sentence,
-                    "concept": concept,
-                    "label": label,
-                    "alt": label,
-                    "image": self._image_to_base64(fallback)
-                })
+        # Resolver búsqueda y descarga de todas las frases en paralelo, conservando el orden
+        futures = [
+            self._fetch_executor.submit(self._build_item, idx, sentence, all_key_words[idx])
+            for idx, sentence in enumerate(sentences)
+        ]
+        for done, future in enumerate(futures, start=1):
+            pictograms.append(future.result())
+            if progress_callback is not None:
+                progress_callback(done / len(sentences))
         
         return {
             "paragraph": text,
             "items": pictograms
-        }
\ No newline at end of file
+        }
+
+
+class SentencePipeline:
+    """
+    Resolves the pictograms of a story while the story is being generated.
+
+    Text is fed chunk by chunk as the decoder produces it; every sentence is
+    sent to keyword extraction and pictogram lookup as soon as it is complete,
+    so downloads overlap with decoding. Items are handed to `on_item` in story
+    order, each one as soon as it and all the previous ones are ready.
+
+    Unlike `PictogramGenerationModel.generate`, the story length is not known in
+    advance: the first `MAX_PICTOGRAMS` sentences are used instead of a sample
+    spread over the whole story.
+
+    Args:
+        model (PictogramGenerationModel): Model used to resolve each sentence.
+        on_item (Callable[[Dict[str, Any]], None]): Called with each item, in order,
+            from whichever thread completes it.
+    """
+
+    def __init__(self, model: PictogramGenerationModel, on_item: Callable[[Dict[str, Any]], None]):
+        self.model = model
+        self.on_item = on_item
+        self._buffer = ""
+        self._futures: List[Future] = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def feed(self, chunk: str):
+        """Add generated text; complete sentences start resolving immediately."""
+        self._buffer += chunk
+        parts = re.split(r'[.!?]+', self._buffer)
+        # El último fragmento puede ser una frase a medias: se guarda hasta el próximo trozo
+        self._buffer = parts[-1]
+        for sentence in self.model._split_into_sentences(".".join(parts[:-1])):
+            self._submit(sentence)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Resolve the trailing sentence, wait for every item and return them in order."""
+        for sentence in self.model._split_into_sentences(self._buffer):
+            self._submit(sentence)
+        self._buffer = ""
+        return [future.result() for future in self._futures]
+
+    def _submit(self, sentence: str):
+        with self._lock:
+            idx = len(self._futures)
+            if idx >= MAX_PICTOGRAMS:
+                return
+            future = self.model._fetch_executor.submit(self.model._build_sentence_item, idx, sentence)
+            self._futures.append(future)
+        future.add_done_callback(lambda _: self._emit_ready())
+
+    def _emit_ready(self):
+        # Entrega en orden: un item solo sale cuando todos los anteriores ya salieron
+        with self._lock:
+            while self._next < len(self._futures) and self._futures[self._next].done():
+                self.on_item(self._futures[self._next].result())
+                self._next += 1
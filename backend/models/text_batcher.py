@@ -0,0 +1,115 @@
+"""
+Dynamic micro-batching for the text model.
+Groups prompts that arrive within a short window into a single batched `generate` call.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+# (prompt, max_new_tokens, cache_prefix, future)
+_Request = Tuple[str, int, Optional[str], Future]
+
+
+class TextBatchScheduler:
+    """
+    Collects concurrent generation requests and runs them as one batch.
+
+    A single background thread takes the first pending request, waits up to
+    `max_wait_ms` for more to arrive (up to `max_batch_size`), runs them with
+    `run_batch` and resolves each caller's future with its own output.
+
+    Requests whose `max_new_tokens` differ by more than 2x are not mixed in the
+    same batch: the batch decodes until its largest budget, so mixing a 10-token
+    keyword request with a 400-token story would make the short one wait for the
+    long one. Incompatible requests stay pending for the next batch.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[str], List[int], List[Optional[str]]], List[str]],
+        max_batch_size: int = 4,
+        max_wait_ms: int = 20
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._pending: "deque[_Request]" = deque()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, prompt: str, max_new_tokens: int, cache_prefix: Optional[str] = None) -> str:
+        """Queue a prompt and block until its batch has been generated.
+
+        Args:
+            prompt (str): User prompt.
+            max_new_tokens (int): Token budget for this request.
+            cache_prefix (Optional[str]): Shared leading part of the prompt, passed through to `run_batch`.
+
+        Returns:
+            str: Generated text for this prompt.
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((prompt, max_new_tokens, cache_prefix, future))
+        return future.result()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="text-batcher", daemon=True)
+                self._thread.start()
+
+    @staticmethod
+    def _compatible(budget: int, other: int) -> bool:
+        return max(budget, other) <= 2 * min(budget, other)
+
+    def _next_request(self, timeout=None) -> _Request:
+        if self._pending:
+            return self._pending.popleft()
+        if timeout is None:
+            return self._queue.get()
+        return self._queue.get(timeout=timeout)
+
+    def _collect(self) -> List[_Request]:
+        first = self._next_request()
+        batch = [first]
+        skipped = []
+
+        # Primero los que ya esperaban, sin consumir tiempo de la ventana
+        while self._pending and len(batch) < self.max_batch_size:
+            request = self._pending.popleft()
+            (batch if self._compatible(first[1], request[1]) else skipped).append(request)
+
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            (batch if self._compatible(first[1], request[1]) else skipped).append(request)
+
+        self._pending.extendleft(reversed(skipped))
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            prompts = [request[0] for request in batch]
+            budgets = [request[1] for request in batch]
+            prefixes = [request[2] for request in batch]
+            try:
+                results = self.run_batch(prompts, budgets, prefixes)
+                for (_, _, _, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, _, _, future in batch:
+                    future.set_exception(e)
@@ -1,6 +1,104 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM, set_seed
+# torch y transformers se importan al cargar el modelo, no al importar este módulo:
+# así la API arranca y responde (/info, estáticos, health) sin esperar a estas librerías
+import functools
 import os
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+from backend.cache.memory_cache import LRUCache
+from backend.config.settings import settings
+from backend.models.text_batcher import TextBatchScheduler
+from backend.monitoring.metrics import FALLBACKS, STAGE_SECONDS, TOKENS_GENERATED, track_cache
+
+SYSTEM_PROMPT = "Eres un narrador de cuentos infantiles. Crea historias sencillas, positivas y completas en español."
+
+# dtype con el que se cargan los pesos en cada modo (int8 se carga en fp32 y luego se cuantiza)
+PRECISION_DTYPES = {
+    "fp32": "float32",
+    "bf16": "bfloat16",
+    "fp16": "float16",
+    "int8": "float32",
+}
+
+
+def _cpu_supports_bf16() -> bool:
+    """True if the CPU has native bf16 kernels (e.g. AVX512-BF16 or AMX)."""
+    import torch
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def _prefix_entry_nbytes(entry) -> int:
+    # entry = (prefix_ids, past_key_values); solo cuenta el tamaño de los tensores de KV
+    return sum(t.numel() * t.element_size() for layer in entry[1] for t in layer)
+
+
+@functools.lru_cache(maxsize=None)
+def _callback_streamer_class():
+    from transformers import TextStreamer
+
+    class _CallbackStreamer(TextStreamer):
+        """Streamer that times decoding and, with `on_text`, hands each decoded text fragment to a callback.
+
+        Without `on_text` it only records when the first token arrives (end of the
+        prefill) and how many decoding steps ran, so it also works with batches.
+        """
+
+        def __init__(self, tokenizer, on_text: Optional[Callable[[str], None]] = None):
+            super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True)
+            self.on_text = on_text
+            self.started_at = time.perf_counter()
+            self.first_token_at = None
+            self.steps = 0
+
+        def put(self, value):
+            # La primera llamada de generate trae el prompt, las siguientes un token por secuencia
+            if not self.next_tokens_are_prompt:
+                self.steps += 1
+                if self.first_token_at is None:
+                    self.first_token_at = time.perf_counter()
+            if self.on_text is None:
+                self.next_tokens_are_prompt = False
+                return
+            super().put(value)
+
+        def end(self):
+            if self.on_text is not None:
+                super().end()
+
+        def on_finalized_text(self, text: str, stream_end: bool = False):
+            if text:
+                self.on_text(text)
+
+        def record(self, tokens: int):
+            """Observe the prefill and decode durations and count the generated tokens."""
+            if self.first_token_at is not None:
+                STAGE_SECONDS.observe(self.first_token_at - self.started_at, stage="prefill")
+                STAGE_SECONDS.observe(time.perf_counter() - self.first_token_at, stage="decode")
+            TOKENS_GENERATED.inc(tokens)
+
+    return _CallbackStreamer
+
+
+@functools.lru_cache(maxsize=None)
+def _stop_criteria_class():
+    import torch
+    from transformers import StoppingCriteria
+
+    class _EventStoppingCriteria(StoppingCriteria):
+        """Stops generation as soon as `stop_event` is set (checked after every decoding step)."""
+
+        def __init__(self, stop_event: threading.Event):
+            self.stop_event = stop_event
+
+        def __call__(self, input_ids, scores, **kwargs):
+            # Un valor por secuencia: las versiones recientes de transformers esperan un tensor
+            return torch.full((input_ids.shape[0],), self.stop_event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+    return _EventStoppingCriteria
+
 
 class TextGenerationModel:
     """Model class for generating text using transformer-based language models."""
@@ -9,76 +107,157 @@ class TextGenerationModel:
         self.tokenizer = None
         self.model = None
         self.device = "cpu"  # Default to CPU
-        
-        # Check if CUDA is available and has enough memory
-        if torch.cuda.is_available():
-            try:
-                # Try to get GPU memory info
-                torch.cuda.empty_cache()  # Clear cache first
-                gpu_memory = torch.cuda.get_device_properties(0).total_memory
-                gpu_memory_gb = gpu_memory / (1024**3)
-                
-                # Only use CUDA if we have more than 4GB available
-                if gpu_memory_gb > 4:
-                    self.device = "cuda"
-                else:
-                    print(f"GPU memory ({gpu_memory_gb:.2f}GB) insufficient, using CPU")
-            except Exception as e:
-                print(f"GPU check failed: {e}, using CPU")
-        
-        set_seed(2024)
+        self.precision = None  # Resolved when the weights are loaded
+        # "unloaded", "loading", "warming", "ready" o "failed" (se informa en /health/ready)
+        self.state = "unloaded"
+        self._load_lock = threading.Lock()
+        self._batcher = None
+        if settings.text_batching_enabled and settings.text_batch_max_size > 1:
+            self._batcher = TextBatchScheduler(
+                self._generate_batch,
+                max_batch_size=settings.text_batch_max_size,
+                max_wait_ms=settings.text_batch_max_wait_ms
+            )
+        # past_key_values del prefijo compartido de cada combinación de instrucciones
+        self._prefix_cache = None
+        if settings.text_prefix_cache_enabled:
+            self._prefix_cache = LRUCache(
+                max_entries=settings.text_prefix_cache_max_entries,
+                max_bytes=settings.text_prefix_cache_max_bytes,
+                size_of=_prefix_entry_nbytes
+            )
+            track_cache("text_prefix", self._prefix_cache)
+
+    def _select_device(self) -> str:
+        """Return "cuda" if a GPU with more than 4GB is available, otherwise "cpu"."""
+        import torch
+        if not torch.cuda.is_available():
+            return "cpu"
+        try:
+            # Try to get GPU memory info
+            torch.cuda.empty_cache()  # Clear cache first
+            gpu_memory = torch.cuda.get_device_properties(0).total_memory
+            gpu_memory_gb = gpu_memory / (1024**3)
+
+            # Only use CUDA if we have more than 4GB available
+            if gpu_memory_gb > 4:
+                return "cuda"
+            print(f"GPU memory ({gpu_memory_gb:.2f}GB) insufficient, using CPU")
+        except Exception as e:
+            print(f"GPU check failed: {e}, using CPU")
+        return "cpu"
     
     def load_model(self):
-        """Load the text generation model and tokenizer."""
-        if self.model is None:
-            try:
-                self.tokenizer = AutoTokenizer.from_pretrained(
-                    self.model_checkpoint,
-                    trust_remote_code=True
-                )
-                
-                # Load model with appropriate settings based on device
-                if self.device == "cuda":
-                    try:
-                        # Try CUDA with float16
-                        torch.cuda.empty_cache()
-                        self.model = AutoModelForCausalLM.from_pretrained(
-                            self.model_checkpoint,
-                            torch_dtype=torch.float16,
-                            trust_remote_code=True,
-                            low_cpu_mem_usage=True
-                        )
-                        self.model = self.model.to("cuda")
-                        print("Model loaded on CUDA with float16")
-                    except (torch.cuda.OutOfMemoryError, RuntimeError) as e:
-                        print(f"CUDA loading failed: {e}")
-                        print("Falling back to CPU...")
-                        self.device = "cpu"
-                        torch.cuda.empty_cache()
-                        # Load on CPU instead
-                        self.model = AutoModelForCausalLM.from_pretrained(
-                            self.model_checkpoint,
-                            torch_dtype=torch.float16,
-                            trust_remote_code=True,
-                            low_cpu_mem_usage=True
-                        )
-                        print("Model loaded on CPU with float16")
-                else:
-                    # Load directly on CPU
-                    self.model = AutoModelForCausalLM.from_pretrained(
+        """Load the text generation model and tokenizer.
+
+        Guarded by a lock so concurrent callers sharing this instance load the weights only once.
+        """
+        if self.model is not None:
+            return
+
+        with self._load_lock:
+            if self.model is None:
+                self.state = "loading"
+                import torch
+                from transformers import AutoTokenizer, set_seed
+
+                self.device = self._select_device()
+                set_seed(2024)
+                if settings.torch_num_threads > 0:
+                    # Limitar los hilos intra-op para repartir los núcleos entre los pools del ejecutor
+                    torch.set_num_threads(settings.torch_num_threads)
+                try:
+                    self.tokenizer = AutoTokenizer.from_pretrained(
                         self.model_checkpoint,
-                        torch_dtype=torch.float16,
-                        trust_remote_code=True,
-                        low_cpu_mem_usage=True
+                        trust_remote_code=True
                     )
-                    print("Model loaded on CPU with float16")
+                    # Relleno a la izquierda para generar por lotes
+                    self.tokenizer.padding_side = "left"
+                    if self.tokenizer.pad_token is None:
+                        self.tokenizer.pad_token = self.tokenizer.eos_token
+                
+                    # Load model with appropriate settings based on device
+                    if self.device == "cuda":
+                        try:
+                            torch.cuda.empty_cache()
+                            self.precision = self._resolve_precision("cuda")
+                            self.model = self._load_weights(self.precision).to("cuda")
+                            print(f"Model loaded on CUDA with {self.precision}")
+                        except (torch.cuda.OutOfMemoryError, RuntimeError) as e:
+                            print(f"CUDA loading failed: {e}")
+                            print("Falling back to CPU...")
+                            self.device = "cpu"
+                            self.model = None
+                            torch.cuda.empty_cache()
+
+                    if self.device == "cpu":
+                        # Load directly on CPU
+                        self.precision = self._resolve_precision("cpu")
+                        self.model = self._load_weights(self.precision)
+                        print(f"Model loaded on CPU with {self.precision}")
                     
-            except Exception as e:
-                print(f"Failed to load model: {e}")
-                # Keep model as None, will use fallback
-                self.model = None
-                self.tokenizer = None
+                except Exception as e:
+                    print(f"Failed to load model: {e}")
+                    # Keep model as None, will use fallback
+                    self.model = None
+                    self.tokenizer = None
+
+                self.state = "ready" if self.model is not None else "failed"
+
+    def warmup(self):
+        """Load the weights and run a short generation so the first request does not pay for it.
+
+        The first forward pass allocates buffers and selects kernels, and is much
+        slower than the following ones.
+        """
+        self.load_model()
+        if self.model is None:
+            return
+        self.state = "warming"
+        try:
+            self._generate_batch(["Hola"], [8])
+        except Exception as e:
+            print(f"Text model warmup failed: {e}")
+            self.state = "failed"
+            return
+        self.state = "ready"
     
+    def _resolve_precision(self, device: str) -> str:
+        """Choose the precision mode for a device from `settings.text_model_precision`.
+
+        "auto" picks fp16 on CUDA and, on CPU, bf16 when the CPU has native bf16
+        support and fp32 otherwise: fp16 matmuls are emulated on x86 CPUs and are
+        much slower than fp32. int8 (dynamic quantization) is CPU only.
+        """
+        mode = settings.text_model_precision
+        if mode == "auto":
+            if device == "cuda":
+                return "fp16"
+            return "bf16" if _cpu_supports_bf16() else "fp32"
+        if mode == "int8" and device == "cuda":
+            print("int8 dynamic quantization is CPU only, using fp16 on CUDA")
+            return "fp16"
+        if mode == "bf16" and device == "cpu" and not _cpu_supports_bf16():
+            print("CPU has no native bf16 support, using fp32")
+            return "fp32"
+        return mode
+
+    def _load_weights(self, precision: str):
+        """Load the model weights in the given precision mode."""
+        import torch
+        from transformers import AutoModelForCausalLM
+
+        model = AutoModelForCausalLM.from_pretrained(
+            self.model_checkpoint,
+            torch_dtype=getattr(torch, PRECISION_DTYPES[precision]),
+            trust_remote_code=True,
+            low_cpu_mem_usage=True
+        )
+        if precision == "int8":
+            # Pesos de las capas lineales en int8; activaciones cuantizadas al vuelo
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model.eval()
+
     def _simple_fallback(self, prompt: str, max_new_tokens: int = 200) -> str:
         """Simple fallback when model cannot be loaded.
 
@@ -94,63 +273,297 @@ class TextGenerationModel:
         story = f"{lead}. Una pequeña aventura comenzó y el protagonista aprendió sobre la amistad y la curiosidad. Fin."
         return story
     
-    def generate(self, prompt: str, max_new_tokens: int = 400) -> str:
-        """Generate text based on the given prompt."""
+    def _build_chat_text(self, prompt: str) -> str:
+        """Render the chat template (system + user message) for a prompt."""
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        return self.tokenizer.apply_chat_template(
+            messages,
+            tokenize=False,
+            add_generation_prompt=True
+        )
+
+    def _postprocess(self, response: str) -> str:
+        """Cut the response at its last period so it never ends mid-sentence."""
+        last_dot = response.rfind(".")
+        if last_dot != -1:
+            response = response[:last_dot+1]
+        return response.strip()
+
+    def _run_generate(self, inputs, max_new_tokens: int, deterministic: bool = False, **generate_kwargs):
+        import torch
+        # Modo determinista: decodificación greedy, la misma entrada produce siempre el mismo texto
+        if deterministic:
+            generate_kwargs.update(do_sample=False)
+        else:
+            generate_kwargs.update(do_sample=True, temperature=0.7, top_p=0.9)
+        try:
+            return self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                pad_token_id=self.tokenizer.pad_token_id,
+                **generate_kwargs
+            )
+        except torch.cuda.OutOfMemoryError:
+            print("CUDA OOM during generation, clearing cache and retrying on CPU...")
+            torch.cuda.empty_cache()
+            self.device = "cpu"
+            # fp16 en CPU es muy lento: pasar a fp32
+            self.precision = "fp32"
+            self.model = self.model.to("cpu", dtype=torch.float32)
+            inputs = inputs.to("cpu")
+            # Los prefijos guardados están en CUDA y en otra precisión
+            generate_kwargs.pop("past_key_values", None)
+            if self._prefix_cache is not None:
+                self._prefix_cache.clear()
+            return self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                pad_token_id=self.tokenizer.pad_token_id,
+                **generate_kwargs
+            )
+
+    def _prefix_past_key_values(self, text: str, input_ids, cache_prefix: Optional[str]):
+        """Return cached `past_key_values` for the shared start of a single prompt.
+
+        The prefix is the chat text up to the end of `cache_prefix` (system message
+        plus the fixed instruction block). Its KV cache is computed once and kept in
+        an LRU keyed by that text, so only the rest of the prompt is prefilled.
+
+        The last token of the tokenized prefix is dropped, because BPE may merge it
+        with the text that follows (e.g. "." + "\n\n"). The cache is only used when
+        the remaining prefix ids are an exact prefix of `input_ids`.
+
+        Args:
+            text (str): Full chat text of the prompt.
+            input_ids: Token ids of `text`, shape (1, seq_len).
+            cache_prefix (Optional[str]): Leading part of the user message shared between requests.
+
+        Returns:
+            The prefix KV cache in legacy tuple form, or None if it does not apply.
+        """
+        if self._prefix_cache is None or not cache_prefix:
+            return None
+        import torch
+        end = text.find(cache_prefix)
+        if end == -1:
+            return None
+        prefix_text = text[:end + len(cache_prefix)]
+        key = (prefix_text, self.device, self.precision)
+
+        entry = self._prefix_cache.get(key)
+        if entry is None:
+            prefix_ids = self.tokenizer(prefix_text, return_tensors="pt").input_ids[:, :-1]
+            length = prefix_ids.shape[1]
+            if length == 0 or input_ids.shape[1] <= length or not torch.equal(input_ids[0, :length].cpu(), prefix_ids[0]):
+                return None
+            with torch.no_grad(), STAGE_SECONDS.time(stage="prefix_prefill"):
+                past_key_values = self.model(input_ids=prefix_ids.to(self.device), use_cache=True).past_key_values
+            if hasattr(past_key_values, "to_legacy_cache"):
+                past_key_values = past_key_values.to_legacy_cache()
+            # Las tuplas no se modifican durante generate: cada paso concatena tensores nuevos
+            entry = (prefix_ids, past_key_values)
+            self._prefix_cache.set(key, entry)
+
+        prefix_ids, past_key_values = entry
+        length = prefix_ids.shape[1]
+        if input_ids.shape[1] <= length or not torch.equal(input_ids[0, :length].cpu(), prefix_ids[0]):
+            return None
+        return past_key_values
+
+    def _generate_batch(
+        self,
+        prompts: List[str],
+        max_new_tokens: List[int],
+        cache_prefixes: Optional[Sequence[Optional[str]]] = None,
+        deterministic: bool = False
+    ) -> List[str]:
+        """Generate responses for several prompts with a single padded `generate` call.
+
+        Prompts are left-padded so every sequence ends right where decoding starts.
+        The batch decodes up to the largest budget; each output is then truncated
+        to its own `max_new_tokens` before post-processing. A single prompt with a
+        `cache_prefix` reuses the cached KV of that prefix.
+
+        Args:
+            prompts (List[str]): User prompts.
+            max_new_tokens (List[int]): Token budget for each prompt.
+            cache_prefixes (Optional[Sequence[Optional[str]]]): Shared leading part of each prompt.
+            deterministic (bool): Use greedy decoding instead of sampling.
+
+        Returns:
+            List[str]: One generated text per prompt, in the same order.
+        """
+        texts = [self._build_chat_text(prompt) for prompt in prompts]
+
+        # Move inputs to the correct device
+        with STAGE_SECONDS.time(stage="tokenize"):
+            inputs = self.tokenizer(texts, return_tensors="pt", padding=True).to(self.device)
+        generate_kwargs = {}
+        if len(prompts) == 1 and cache_prefixes:
+            past_key_values = self._prefix_past_key_values(texts[0], inputs.input_ids, cache_prefixes[0])
+            if past_key_values is not None:
+                generate_kwargs["past_key_values"] = past_key_values
+        streamer = _callback_streamer_class()(self.tokenizer)
+        outputs = self._run_generate(
+            inputs, max(max_new_tokens), deterministic=deterministic, streamer=streamer, **generate_kwargs
+        )
+
+        prompt_length = inputs.input_ids.shape[1]
+        # Las filas que terminan antes se rellenan con pad_token_id: no cuentan como generados
+        streamer.record(int((outputs[:, prompt_length:] != self.tokenizer.pad_token_id).sum()))
+        responses = []
+        for row, budget in zip(outputs, max_new_tokens):
+            response = self.tokenizer.decode(row[prompt_length:prompt_length + budget], skip_special_tokens=True)
+            responses.append(self._postprocess(response))
+        return responses
+
+    def generate_batch(self, prompts: List[str], max_new_tokens: int = 400) -> List[str]:
+        """Generate text for several prompts in one padded batch.
+
+        Unlike `generate`, errors are raised to the caller so it can choose its
+        own fallback. If the model cannot be loaded, the simple fallback is used
+        for every prompt.
+
+        Args:
+            prompts (List[str]): User prompts.
+            max_new_tokens (int): Token budget shared by every prompt.
+
+        Returns:
+            List[str]: One generated text per prompt, in the same order.
+        """
+        if not prompts:
+            return []
+
+        if self.model is None or self.tokenizer is None:
+            self.load_model()
+
+        if self.model is None or self.tokenizer is None:
+            print("Model not available, using fallback generation")
+            FALLBACKS.inc(len(prompts), kind="story")
+            return [self._simple_fallback(prompt, max_new_tokens) for prompt in prompts]
+
+        return self._generate_batch(prompts, [max_new_tokens] * len(prompts))
+
+    def generate(
+        self,
+        prompt: str,
+        max_new_tokens: int = 400,
+        cache_prefix: Optional[str] = None,
+        deterministic: bool = False
+    ) -> str:
+        """Generate text based on the given prompt.
+
+        When micro-batching is enabled, the request joins the batch scheduler and
+        may share a forward pass with other concurrent prompts. `cache_prefix` is
+        the leading part of `prompt` shared between requests (e.g. the instruction
+        block); when the request runs alone its KV cache is reused.
+
+        Deterministic requests use greedy decoding and skip the batch scheduler:
+        a batch samples with one configuration, and padding next to other prompts
+        could change the greedy output.
+        """
         if self.model is None or self.tokenizer is None:
             self.load_model()
         
         # If model still couldn't be loaded, use fallback
         if self.model is None or self.tokenizer is None:
             print("Model not available, using fallback generation")
+            FALLBACKS.inc(kind="story")
             return self._simple_fallback(prompt, max_new_tokens)
         
         try:
-            messages = [
-                {"role": "system", "content": "Eres un narrador de cuentos infantiles. Crea historias sencillas, positivas y completas en español."},
-                {"role": "user", "content": prompt}
-            ]
-            
-            text = self.tokenizer.apply_chat_template(
-                messages,
-                tokenize=False,
-                add_generation_prompt=True
-            )
-            
-            # Move inputs to the correct device
-            inputs = self.tokenizer([text], return_tensors="pt").to(self.device)
-            
-            try:
-                outputs = self.model.generate(
-                    **inputs,
-                    max_new_tokens=max_new_tokens,
-                    do_sample=True,
-                    temperature=0.7,
-                    top_p=0.9,
-                    pad_token_id=self.tokenizer.eos_token_id
-                )
-            except torch.cuda.OutOfMemoryError:
-                print("CUDA OOM during generation, clearing cache and retrying on CPU...")
-                torch.cuda.empty_cache()
-                self.device = "cpu"
-                self.model = self.model.to("cpu")
-                inputs = inputs.to("cpu")
-                outputs = self.model.generate(
-                    **inputs,
-                    max_new_tokens=max_new_tokens,
-                    do_sample=True,
-                    temperature=0.7,
-                    top_p=0.9,
-                    pad_token_id=self.tokenizer.eos_token_id
-                )
-            
-            response = self.tokenizer.decode(outputs[0][len(inputs.input_ids[0]):], skip_special_tokens=True)
-            
-            last_dot = response.rfind(".")
-            if last_dot != -1:
-                response = response[:last_dot+1]
-            
-            return response.strip()
+            if self._batcher is not None and not deterministic:
+                return self._batcher.submit(prompt, max_new_tokens, cache_prefix)
+            return self._generate_batch([prompt], [max_new_tokens], [cache_prefix], deterministic=deterministic)[0]
             
         except Exception as e:
             print(f"Error during generation: {e}")
-            return self._simple_fallback(prompt, max_new_tokens)
\ No newline at end of file
+            FALLBACKS.inc(kind="story")
+            return self._simple_fallback(prompt, max_new_tokens)
+
+    def generate_stream(
+        self,
+        prompt: str,
+        emit: Callable[[str], None],
+        max_new_tokens: int = 400,
+        cache_prefix: Optional[str] = None,
+        deterministic: bool = False,
+        stop_event: Optional[threading.Event] = None
+    ) -> str:
+        """Generate text and hand it to `emit` sentence by sentence while decoding.
+
+        Text is only emitted up to the last period decoded so far, so the chunks
+        concatenate to exactly what `generate` returns: anything after the final
+        period is dropped, unless the response has no period at all.
+
+        Args:
+            prompt (str): The user prompt.
+            emit (Callable[[str], None]): Called with each completed chunk.
+            max_new_tokens (int): Maximum number of tokens to generate.
+            cache_prefix (Optional[str]): Leading part of `prompt` whose KV cache can be reused.
+            deterministic (bool): Use greedy decoding instead of sampling.
+            stop_event (Optional[threading.Event]): When set, decoding stops after the current
+                step and the text emitted so far is returned.
+
+        Returns:
+            str: The full post-processed response.
+        """
+        if self.model is None or self.tokenizer is None:
+            self.load_model()
+
+        if self.model is None or self.tokenizer is None:
+            print("Model not available, using fallback generation")
+            FALLBACKS.inc(kind="story")
+            story = self._simple_fallback(prompt, max_new_tokens)
+            emit(story)
+            return story
+
+        if stop_event is not None and stop_event.is_set():
+            return ""
+
+        state = {"pending": "", "emitted": ""}
+
+        def on_text(fragment: str):
+            state["pending"] += fragment
+            last_dot = state["pending"].rfind(".")
+            if last_dot == -1:
+                return
+            chunk = state["pending"][:last_dot+1]
+            state["pending"] = state["pending"][last_dot+1:]
+            if not state["emitted"]:
+                chunk = chunk.lstrip()
+            state["emitted"] += chunk
+            emit(chunk)
+
+        try:
+            text = self._build_chat_text(prompt)
+            with STAGE_SECONDS.time(stage="tokenize"):
+                inputs = self.tokenizer([text], return_tensors="pt").to(self.device)
+            generate_kwargs = {}
+            past_key_values = self._prefix_past_key_values(text, inputs.input_ids, cache_prefix)
+            if past_key_values is not None:
+                generate_kwargs["past_key_values"] = past_key_values
+            if stop_event is not None:
+                from transformers import StoppingCriteriaList
+                generate_kwargs["stopping_criteria"] = StoppingCriteriaList([_stop_criteria_class()(stop_event)])
+            streamer = _callback_streamer_class()(self.tokenizer, on_text)
+            self._run_generate(inputs, max_new_tokens, deterministic=deterministic, streamer=streamer, **generate_kwargs)
+            streamer.record(streamer.steps)
+        except Exception as e:
+            print(f"Error during streaming generation: {e}")
+            if not state["emitted"]:
+                FALLBACKS.inc(kind="story")
+                story = self._simple_fallback(prompt, max_new_tokens)
+                emit(story)
+                return story
+            return state["emitted"].strip()
+
+        # Sin ningún punto se devuelve la respuesta completa, igual que en generate
+        if not state["emitted"] and state["pending"].strip():
+            state["emitted"] = state["pending"].strip()
+            emit(state["emitted"])
+
+        return state["emitted"].strip()
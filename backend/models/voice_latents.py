@@ -0,0 +1,138 @@
+"""
+Persistent store of XTTS speaker conditioning latents.
+Bundled voices keep their latents next to the WAV file; custom speakers are cached by content hash.
+
+Precompute the latents of the bundled voices ahead of time (e.g. while building the image):
+
+    python -m backend.models.voice_latents
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from backend.cache.memory_cache import LRUCache
+
+# (gpt_cond_latent, speaker_embedding)
+SpeakerLatents = Tuple[Any, Any]
+
+LATENTS_SUFFIX = ".latents.pt"
+
+
+class VoiceLatentStore:
+    """
+    Two-level cache (memory + disk) of the conditioning latents of each reference WAV.
+
+    Entries are keyed by the SHA-256 of the WAV content, so an uploaded speaker is
+    only processed once however it is named, and a bundled voice whose file is
+    replaced is recomputed. Each file on disk also records the TTS model name:
+    latents computed by a different model are ignored.
+
+    Args:
+        model_name (str): TTS model the latents belong to.
+        voices_dir (Path): Bundled voices; their latents are stored as `<name>.latents.pt` beside them.
+        cache_dir (str): Directory for the latents of custom speakers (`<sha256>.latents.pt`).
+        memory_entries (int): Latents kept in memory.
+    """
+
+    def __init__(self, model_name: str, voices_dir: Path, cache_dir: str, memory_entries: int = 32):
+        self.model_name = model_name
+        self.voices_dir = Path(voices_dir).resolve()
+        self.cache_dir = cache_dir
+        self._memory = LRUCache(max_entries=memory_entries)
+        # Evita volver a leer el WAV para calcular su hash si no cambió: path -> (mtime, size, sha256)
+        self._digests: Dict[str, Tuple[float, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def file_digest(self, wav_path: str) -> str:
+        stat = os.stat(wav_path)
+        known = self._digests.get(wav_path)
+        if known is not None and known[0] == stat.st_mtime and known[1] == stat.st_size:
+            return known[2]
+        with open(wav_path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self._digests[wav_path] = (stat.st_mtime, stat.st_size, digest)
+        return digest
+
+    def latents_path(self, wav_path: str, digest: str) -> str:
+        path = Path(wav_path).resolve()
+        if path.parent == self.voices_dir:
+            return str(path.with_name(path.stem + LATENTS_SUFFIX))
+        return os.path.join(self.cache_dir, digest + LATENTS_SUFFIX)
+
+    def get(self, wav_path: str, compute: Callable[[str], SpeakerLatents], device: Any = "cpu") -> SpeakerLatents:
+        """Return the latents for a reference WAV, computing and persisting them on a miss.
+
+        Args:
+            wav_path (str): Reference speaker WAV.
+            compute (Callable[[str], SpeakerLatents]): Computes the latents from the WAV path.
+            device: Device the returned tensors are loaded on.
+
+        Returns:
+            SpeakerLatents: `(gpt_cond_latent, speaker_embedding)`.
+        """
+        digest = self.file_digest(wav_path)
+        latents = self._memory.get(digest)
+        if latents is not None:
+            return latents
+
+        # Un solo cálculo por voz aunque lleguen varias peticiones a la vez
+        with self._lock:
+            latents = self._memory.get(digest)
+            if latents is not None:
+                return latents
+
+            path = self.latents_path(wav_path, digest)
+            latents = self._read(path, digest, device)
+            if latents is None:
+                latents = compute(wav_path)
+                self._write(path, digest, latents)
+            self._memory.set(digest, latents)
+            return latents
+
+    def _read(self, path: str, digest: str, device: Any) -> Optional[SpeakerLatents]:
+        if not os.path.isfile(path):
+            return None
+        import torch
+        try:
+            data = torch.load(path, map_location=device, weights_only=False)
+        except Exception as e:
+            print(f"VoiceLatentStore: cannot read {path}: {e}")
+            return None
+        if data.get("sha256") != digest or data.get("model_name") != self.model_name:
+            return None
+        return data["gpt_cond_latent"], data["speaker_embedding"]
+
+    def _write(self, path: str, digest: str, latents: SpeakerLatents):
+        import torch
+
+        data = {
+            "sha256": digest,
+            "model_name": self.model_name,
+            "gpt_cond_latent": latents[0].detach().cpu(),
+            "speaker_embedding": latents[1].detach().cpu()
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            torch.save(data, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Sin permisos de escritura se siguen usando desde memoria
+            print(f"VoiceLatentStore: cannot write {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def main():
+    from backend.models.model_registry import model_registry
+
+    model = model_registry.get_voice_model()
+    model.load_model()
+    count = model.precompute_voices()
+    print(f"Precomputed conditioning latents for {count} voices in {model.voices_dir}")
+
+
+if __name__ == "__main__":
+    main()
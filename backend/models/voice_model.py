@@ -1,64 +1,306 @@
-from TTS.api import TTS
+# TTS, torch, numpy y soundfile se importan al cargar o usar el modelo, no al importar el módulo
+import functools
 import os
 import random
-import torch
+import tempfile
+import threading
 from pathlib import Path
+from typing import Callable, List, Optional
+from backend.config.settings import settings
+from backend.models.voice_latents import SpeakerLatents, VoiceLatentStore
+from backend.monitoring.metrics import STAGE_SECONDS
+
+# torch.load es global: un único parche por proceso aunque haya varios modelos de voz
+_torch_load_patch_lock = threading.Lock()
+
 
 class VoiceGenerationModel:
     """
     Model for generating speech from text using TTS.
     Utilizes pre-trained TTS models and allows customization via speaker voices.
+
+    With XTTS the speaker conditioning latents of each reference WAV are computed
+    once and reused (see `VoiceLatentStore`), instead of being recomputed from the
+    WAV on every request.
     """
 
     def __init__(self, model_name: str = "tts_models/multilingual/multi-dataset/xtts_v2"):
         self.model_name = model_name
         self.tts = None
         self.voices_dir = Path(__file__).parent / "voices"
-        self.available_voices = list(self.voices_dir.glob("*.wav"))
-        
-        self._patch_torch_load()
-    
+        self._load_lock = threading.Lock()
+        # "unloaded", "loading", "warming", "ready" o "failed" (se informa en /health/ready)
+        self.state = "unloaded"
+
+    @functools.cached_property
+    def available_voices(self) -> List[Path]:
+        return list(self.voices_dir.glob("*.wav"))
+
+    @functools.cached_property
+    def latents(self) -> VoiceLatentStore:
+        return VoiceLatentStore(
+            self.model_name,
+            self.voices_dir,
+            settings.voice_latents_cache_dir,
+            memory_entries=len(self.available_voices) + settings.voice_custom_latents_entries
+        )
+
     def _patch_torch_load(self):
-        original_load = torch.load
-        def patched_load(*args, **kwargs):
-            kwargs.setdefault('weights_only', False)
-            return original_load(*args, **kwargs)
-        torch.load = patched_load
-    
+        import torch
+        with _torch_load_patch_lock:
+            # Idempotente: tras un fallo de carga se reintenta y no hay que envolver torch.load otra vez
+            if getattr(torch.load, "_cuentista_weights_only_default", False):
+                return
+            original_load = torch.load
+            def patched_load(*args, **kwargs):
+                kwargs.setdefault('weights_only', False)
+                return original_load(*args, **kwargs)
+            patched_load._cuentista_weights_only_default = True
+            torch.load = patched_load
+
     def load_model(self):
+        if self.tts is not None:
+            return
+        # Un solo hilo carga los pesos aunque varios servicios compartan la instancia
+        with self._load_lock:
+            if self.tts is None:
+                self.state = "loading"
+                try:
+                    from TTS.api import TTS
+
+                    self._patch_torch_load()
+                    self.tts = TTS(self.model_name, gpu=True)
+                except Exception:
+                    self.state = "failed"
+                    raise
+                if settings.voice_latents_precompute:
+                    self.precompute_voices()
+                self.state = "ready"
+
+    def warmup(self):
+        """Load the model and synthesize a short sentence so the first request does not pay for it."""
+        self.load_model()
+        if not self.available_voices:
+            return
+        self.state = "warming"
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                self.generate("Hola.", speaker_wav=str(self.available_voices[0]), output_path=os.path.join(tmp_dir, "warmup.wav"))
+        except Exception as e:
+            # Un modelo que no sintetiza no debe anunciarse listo en /health/ready
+            print(f"Voice model warmup failed: {e}")
+            self.state = "failed"
+            return
+        self.state = "ready"
+
+    def _xtts(self):
+        """Return the underlying XTTS model, or None for models without conditioning latents."""
+        tts_model = getattr(getattr(self.tts, "synthesizer", None), "tts_model", None)
+        if tts_model is None or not hasattr(tts_model, "get_conditioning_latents"):
+            return None
+        return tts_model
+
+    def _compute_latents(self, speaker_wav: str) -> SpeakerLatents:
+        # Mismos parámetros que usa XTTS al sintetizar a partir de speaker_wav
+        xtts = self._xtts()
+        config = xtts.config
+        return xtts.get_conditioning_latents(
+            audio_path=[speaker_wav],
+            gpt_cond_len=config.gpt_cond_len,
+            gpt_cond_chunk_len=config.gpt_cond_chunk_len,
+            max_ref_length=config.max_ref_len,
+            sound_norm_refs=config.sound_norm_refs
+        )
+
+    def get_speaker_latents(self, speaker_wav: str) -> SpeakerLatents:
+        """Return `(gpt_cond_latent, speaker_embedding)` for a reference WAV, from cache when possible."""
         if self.tts is None:
-            self.tts = TTS(self.model_name, gpu=True)
-    
+            self.load_model()
+        return self.latents.get(speaker_wav, self._compute_latents, device=self._xtts().device)
+
+    def precompute_voices(self) -> int:
+        """Compute (or load from disk) the latents of every bundled voice.
+
+        Returns:
+            int: Number of voices ready.
+        """
+        if self._xtts() is None:
+            return 0
+        ready = 0
+        for voice in self.available_voices:
+            try:
+                self.get_speaker_latents(str(voice))
+                ready += 1
+            except Exception as e:
+                print(f"Could not precompute latents for {voice.name}: {e}")
+        return ready
+
+    @property
+    def sample_rate(self) -> int:
+        """Output sample rate of the loaded model."""
+        if self.tts is None:
+            self.load_model()
+        xtts = self._xtts()
+        if xtts is not None:
+            return xtts.config.audio.output_sample_rate
+        return self.tts.synthesizer.output_sample_rate
+
+    @staticmethod
+    def _to_pcm16(wav) -> bytes:
+        import numpy as np
+        import torch
+
+        if torch.is_tensor(wav):
+            wav = wav.squeeze().detach().cpu().numpy()
+        wav = np.clip(np.asarray(wav, dtype=np.float32), -1.0, 1.0)
+        return (wav * 32767).astype("<i2").tobytes()
+
+    @staticmethod
+    def _peak_normalize(wav):
+        import numpy as np
+        import torch
+
+        # Como Synthesizer.save_wav (lo que usa tts_to_file): el pico a escala completa
+        if torch.is_tensor(wav):
+            wav = wav.squeeze().detach().cpu().numpy()
+        wav = np.asarray(wav, dtype=np.float32)
+        peak = float(np.max(np.abs(wav))) if wav.size else 0.0
+        return wav / max(0.01, peak)
+
+    def _split_into_sentences(self, text: str):
+        return self.tts.synthesizer.split_into_sentences(text)
+
     def get_random_voice(self) -> str:
         if not self.available_voices:
             raise ValueError("No voice files available in backend/models/voices/")
         return str(random.choice(self.available_voices))
-    
+
     def generate(
-        self, 
-        text: str, 
+        self,
+        text: str,
         speaker_wav: str = "",  # Changed default to empty string for better handling
-        language: str = "es", 
+        language: str = "es",
         output_path: str = "",
         speed: float = 1.0
     ) -> str:
         if self.tts is None:
             self.load_model()
-        
+
         # Validate speaker_wav: if None, empty, or invalid path, use random voice
         if not speaker_wav or not os.path.isfile(speaker_wav):
             speaker_wav = self.get_random_voice()
-        
+
         if output_path is None:
             output_path = "/resources/audio/output/generated_audio.wav"
-        
+
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        self.tts.tts_to_file(
-            text=text,
-            file_path=output_path,
-            speaker_wav=speaker_wav,
-            language=language,
-            speed=speed
+
+        xtts = self._xtts()
+        if xtts is None:
+            # tts_to_file sintetiza y escribe en un solo paso
+            with STAGE_SECONDS.time(stage="tts_synthesis"):
+                self.tts.tts_to_file(
+                    text=text,
+                    file_path=output_path,
+                    speaker_wav=speaker_wav,
+                    language=language,
+                    speed=speed
+                )
+            return output_path
+
+        gpt_cond_latent, speaker_embedding = self.get_speaker_latents(speaker_wav)
+        config = xtts.config
+        with STAGE_SECONDS.time(stage="tts_synthesis"):
+            out = xtts.inference(
+                text,
+                language,
+                gpt_cond_latent,
+                speaker_embedding,
+                temperature=config.temperature,
+                length_penalty=config.length_penalty,
+                repetition_penalty=config.repetition_penalty,
+                top_k=config.top_k,
+                top_p=config.top_p,
+                speed=speed,
+                enable_text_splitting=True
+            )
+        import numpy as np
+        import soundfile as sf
+
+        with STAGE_SECONDS.time(stage="wav_write"):
+            # Normalizar y recortar antes de cuantizar: XTTS puede pasar de [-1, 1]
+            pcm = np.frombuffer(self._to_pcm16(self._peak_normalize(out["wav"])), dtype="<i2")
+            sf.write(output_path, pcm, config.audio.output_sample_rate, subtype="PCM_16")
+        return output_path
+
+    def generate_stream(
+        self,
+        text: str,
+        emit: Callable[[bytes], None],
+        speaker_wav: str = "",
+        language: str = "es",
+        speed: float = 1.0,
+        stop_event: Optional[threading.Event] = None
+    ) -> int:
+        """Synthesize speech and hand mono 16-bit PCM chunks to `emit` as soon as they are ready.
+
+        XTTS uses its streaming inference, which yields audio every
+        `settings.voice_stream_chunk_size` GPT tokens, sentence by sentence. Other
+        models synthesize and emit one sentence at a time.
+
+        Args:
+            text (str): Text to synthesize.
+            emit (Callable[[bytes], None]): Called with each PCM16 little-endian chunk.
+            speaker_wav (str): Reference voice; a random bundled voice if empty or missing.
+            language (str): Language code.
+            speed (float): Speech speed.
+            stop_event (Optional[threading.Event]): When set, synthesis stops after the current chunk.
+
+        Returns:
+            int: Number of audio samples emitted.
+        """
+        if self.tts is None:
+            self.load_model()
+
+        if not speaker_wav or not os.path.isfile(speaker_wav):
+            speaker_wav = self.get_random_voice()
+
+        samples = 0
+        xtts = self._xtts()
+        if xtts is None:
+            with STAGE_SECONDS.time(stage="tts_synthesis"):
+                for sentence in self._split_into_sentences(text):
+                    if stop_event is not None and stop_event.is_set():
+                        break
+                    chunk = self._to_pcm16(self.tts.tts(text=sentence, speaker_wav=speaker_wav, language=language, speed=speed))
+                    samples += len(chunk) // 2
+                    emit(chunk)
+            return samples
+
+        gpt_cond_latent, speaker_embedding = self.get_speaker_latents(speaker_wav)
+        config = xtts.config
+        chunks = xtts.inference_stream(
+            text,
+            language,
+            gpt_cond_latent,
+            speaker_embedding,
+            stream_chunk_size=settings.voice_stream_chunk_size,
+            temperature=config.temperature,
+            length_penalty=config.length_penalty,
+            repetition_penalty=config.repetition_penalty,
+            top_k=config.top_k,
+            top_p=config.top_p,
+            speed=speed,
+            enable_text_splitting=True
         )
-        return output_path
\ No newline at end of file
+        # inference_stream es un generador: la síntesis ocurre al recorrerlo
+        with STAGE_SECONDS.time(stage="tts_synthesis"):
+            for wav_chunk in chunks:
+                chunk = self._to_pcm16(wav_chunk)
+                samples += len(chunk) // 2
+                emit(chunk)
+                # Salir del bucle deja de recorrer el generador, que así no sintetiza más
+                if stop_event is not None and stop_event.is_set():
+                    chunks.close()
+                    break
+        return samples
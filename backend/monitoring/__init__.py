@@ -0,0 +1,29 @@
+from .metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    REGISTRY,
+    STAGE_SECONDS,
+    TOKENS_GENERATED,
+    FALLBACKS,
+    CACHE_REQUESTS,
+    JOB_QUEUE_DEPTH,
+    MODEL_STATE,
+    track_cache
+)
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "REGISTRY",
+    "STAGE_SECONDS",
+    "TOKENS_GENERATED",
+    "FALLBACKS",
+    "CACHE_REQUESTS",
+    "JOB_QUEUE_DEPTH",
+    "MODEL_STATE",
+    "track_cache"
+]
@@ -0,0 +1,249 @@
+"""
+Dependency-free metrics exposed in the Prometheus text format.
+Recording a value only takes a lock and updates a dict; all formatting happens in `render`.
+"""
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Límites de los histogramas en segundos: desde codificar una miniatura hasta sintetizar una historia
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Set of metrics rendered together by `/metrics`."""
+
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric"):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render_samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[MetricsRegistry] = REGISTRY
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, Any] = {}
+        self._collect: Optional[Callable[[], Any]] = None
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, collect: Callable[[], Any]):
+        """Read the values when rendering instead of recording them.
+
+        `collect` returns a number (metric without labels) or a dict mapping
+        label value tuples to numbers.
+        """
+        self._collect = collect
+
+    def _snapshot(self) -> Dict[LabelValues, Any]:
+        if self._collect is None:
+            with self._lock:
+                return dict(self._values)
+        try:
+            values = self._collect()
+        except Exception as e:
+            print(f"Metric {self.name}: collect failed: {e}")
+            return {}
+        return values if isinstance(values, dict) else {(): values}
+
+    def render_samples(self) -> Iterable[str]:
+        for key, value in sorted(self._snapshot().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, e.g. tokens generated."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. queue depth."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any):
+        self.inc(-amount, **labels)
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Histogram(_Metric):
+    """Distribution of durations, with cumulative buckets, sum and count."""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[MetricsRegistry] = REGISTRY
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        # Índice del primer límite >= value; el último contador es +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, **labels: Any) -> _Timer:
+        """Context manager that observes the duration of its block."""
+        return _Timer(self, labels)
+
+    def render_samples(self) -> Iterable[str]:
+        with self._lock:
+            snapshot = {key: (list(series[0]), series[1]) for key, series in self._values.items()}
+        bucket_labels = self.labelnames + ("le",)
+        for key, (counts, total) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(bucket_labels, key + (_format_value(float(bound)),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+STAGE_SECONDS = Histogram(
+    "cuentista_stage_duration_seconds",
+    "Duration of each pipeline stage.",
+    ["stage"]
+)
+TOKENS_GENERATED = Counter(
+    "cuentista_tokens_generated_total",
+    "Tokens generated by the text model."
+)
+FALLBACKS = Counter(
+    "cuentista_fallbacks_total",
+    "Fallbacks taken instead of the model output (story text or pictogram image).",
+    ["kind"]
+)
+CACHE_REQUESTS = Counter(
+    "cuentista_cache_requests_total",
+    "Cache lookups by cache and result (hit, miss, stale).",
+    ["cache", "result"]
+)
+JOB_QUEUE_DEPTH = Gauge(
+    "cuentista_job_queue_depth",
+    "Jobs waiting in the asynchronous job queue."
+)
+MODEL_STATE = Gauge(
+    "cuentista_model_state",
+    "1 for the current load state of each model.",
+    ["kind", "model", "state"]
+)
+
+# nombre -> cachés con contadores `hits`, `misses` y opcionalmente `stale_hits`.
+# Normalmente hay una caché por nombre; si se registran varias, se suman sus contadores.
+_tracked_caches: Dict[str, List[Any]] = {}
+_tracked_lock = threading.Lock()
+
+
+def track_cache(name: str, cache: Any):
+    """Report the hit/miss counters of a cache in `cuentista_cache_requests_total`.
+
+    The counters are read when `/metrics` is rendered, so lookups pay nothing extra.
+    Caches tracked under the same name are added together.
+    """
+    with _tracked_lock:
+        _tracked_caches.setdefault(name, []).append(cache)
+
+
+def _collect_cache_requests() -> Dict[LabelValues, int]:
+    values = {}
+    with _tracked_lock:
+        tracked = {name: list(caches) for name, caches in _tracked_caches.items()}
+    for name, caches in tracked.items():
+        values[(name, "hit")] = sum(cache.hits for cache in caches)
+        values[(name, "miss")] = sum(cache.misses for cache in caches)
+        if all(hasattr(cache, "stale_hits") for cache in caches):
+            values[(name, "stale")] = sum(cache.stale_hits for cache in caches)
+    return values
+
+
+CACHE_REQUESTS.set_function(_collect_cache_requests)
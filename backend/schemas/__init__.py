@@ -1,6 +1,8 @@
 from .text_schemas import TextGenerationRequest, TextGenerationResponse
 from .voice_schemas import VoiceGenerationRequest, VoiceGenerationResponse
 from .pictogram_schemas import PictogramGenerationRequest, PictogramGenerationResponse
+from .story_schemas import StoryBundleRequest, StoryBundleResponse
+from .job_schemas import JobSubmissionResponse, JobStatusResponse
 
 __all__ = [
     "TextGenerationRequest",
@@ -8,5 +10,9 @@ __all__ = [
     "VoiceGenerationRequest",
     "VoiceGenerationResponse",
     "PictogramGenerationRequest",
-    "PictogramGenerationResponse"
+    "PictogramGenerationResponse",
+    "StoryBundleRequest",
+    "StoryBundleResponse",
+    "JobSubmissionResponse",
+    "JobStatusResponse"
 ]
@@ -0,0 +1,36 @@
+"""
+Pydantic schemas for asynchronous generation jobs.
+Defines data structures for job submission and status polling.
+"""
+from pydantic import BaseModel, Field
+from typing import Optional, Literal
+
+
+JobPriority = Literal["interactive", "bulk"]
+JobStatus = Literal["queued", "running", "completed", "failed"]
+
+
+class JobSubmissionResponse(BaseModel):
+    """
+    Response returned right after a job is queued.
+    """
+    job_id: str = Field(..., description="Identificador del trabajo")
+    status: JobStatus = Field(..., description="Estado actual del trabajo")
+    status_url: str = Field(..., description="URL para consultar el estado")
+    result_url: str = Field(..., description="URL para obtener el resultado")
+
+
+class JobStatusResponse(BaseModel):
+    """
+    Current state of a job, used for polling.
+    """
+    job_id: str = Field(..., description="Identificador del trabajo")
+    kind: str = Field(..., description="Tipo de trabajo (text, voice, pictogram, pictogram_from_prompt)")
+    priority: JobPriority = Field(..., description="Clase de prioridad")
+    status: JobStatus = Field(..., description="Estado actual del trabajo")
+    progress: float = Field(0.0, ge=0.0, le=1.0, description="Progreso estimado entre 0 y 1")
+    queue_position: Optional[int] = Field(None, description="Posicion en la cola si aun no ha empezado")
+    created_at: float = Field(..., description="Marca de tiempo de creacion (epoch)")
+    started_at: Optional[float] = Field(None, description="Marca de tiempo de inicio (epoch)")
+    finished_at: Optional[float] = Field(None, description="Marca de tiempo de finalizacion (epoch)")
+    error: Optional[str] = Field(None, description="Mensaje de error si el trabajo fallo")
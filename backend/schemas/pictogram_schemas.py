@@ -3,18 +3,25 @@ Pydantic schemas for pictogram generation and response.
 Defines data structures for requests and responses of the pictogram system.
 """
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Literal, Optional
+
+
+# "base64": la imagen va incrustada en `image`; "url": se envía `image_url` para descargarla aparte
+PictogramImageMode = Literal["base64", "url"]
 
 
 class PictogramItem(BaseModel):
     """
     Represents a pictogram generated from a sentence.
-    Includes identifier, original sentence, visual concept, and base64 image.
+    Includes identifier, original sentence, visual concept, and the image either
+    inline as base64 or as a URL to `/pictogram/image/{key}`.
     """
     id: int = Field(..., description="Identificador secuencial del pictograma")
     sentence: str = Field(..., description="Frase original de la historia")
     concept: str = Field(..., description="Concepto visual extraído")
-    image: str = Field(..., description="Imagen en base64")
+    image: str = Field("", description="Imagen en base64 (vacía en modo url)")
+    image_key: Optional[str] = Field(None, description="Clave estable de la imagen")
+    image_url: Optional[str] = Field(None, description="URL de la imagen (solo en modo url)")
 
 
 class PictogramData(BaseModel):
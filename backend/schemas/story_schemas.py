@@ -0,0 +1,32 @@
+"""
+Pydantic schemas for the story bundle (text, pictograms and narration in one request).
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from backend.schemas.pictogram_schemas import PictogramData
+from backend.schemas.text_schemas import TextGenerationRequest
+from backend.schemas.voice_schemas import VoiceGenerationResponse
+
+
+class StoryBundleRequest(TextGenerationRequest):
+    """
+    Request to generate a story together with its pictograms and narration.
+    Accepts the story parameters of `TextGenerationRequest` plus the voice parameters.
+    """
+    language: str = Field(default="es", description="Idioma del audio")
+    voice_speed: float = Field(default=1.0, ge=0.5, le=2.0, description="Velocidad de la voz")
+    speaker_wav: Optional[str] = Field(None, description="Ruta del archivo de referencia de voz (opcional, si no se especifica usa una aleatoria)")
+
+
+class StoryBundleResponse(BaseModel):
+    """
+    Response containing the story, its pictograms and its narration.
+    """
+    story: str = Field(..., description="Historia generada")
+    pictograms: PictogramData = Field(..., description="Pictogramas de la historia")
+    audio: VoiceGenerationResponse = Field(..., description="Narracion de la historia")
+    metadata: dict = Field(
+        default_factory=dict,
+        description="Tiempos de cada etapa en segundos"
+    )
@@ -38,6 +38,11 @@ class TextGenerationRequest(BaseModel):
         description="Nombre del protagonista (opcional)"
     )
 
+    deterministic: bool = Field(
+        default=False,
+        description="Decodificacion greedy: el mismo pedido produce la misma historia y se sirve desde cache"
+    )
+
 
 class TextGenerationResponse(BaseModel):
     """
@@ -3,7 +3,10 @@ Pydantic schemas for voice generation and response.
 Defines data structures for requests and responses of the audio generation system.
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
+
+# Formatos en los que se puede descargar un audio generado
+AudioFormat = Literal["wav", "flac", "ogg", "opus"]
 
 class VoiceGenerationRequest(BaseModel):
     """
@@ -20,4 +23,5 @@ class VoiceGenerationResponse(BaseModel):
     """
     audio_path: str = Field(..., description="Ruta del archivo de audio generado")
     duration: Optional[float] = Field(None, description="Duracion del audio en segundos")
-    voice_used: str = Field(..., description="Voz utilizada para la generacion")
\ No newline at end of file
+    voice_used: str = Field(..., description="Voz utilizada para la generacion")
+    audio_url: Optional[str] = Field(None, description="URL para reproducir o descargar el audio (admite peticiones Range)")
\ No newline at end of file
@@ -1,9 +1,21 @@
-from .text_service import TextGenerationService
-from .voice_service import VoiceGenerationService
-from .pictogram_service import PictogramGenerationService
+from .text_service import TextGenerationService, text_service
+from .voice_service import VoiceGenerationService, voice_service
+from .pictogram_service import PictogramGenerationService, pictogram_service
+from .inference_executor import InferenceExecutor, inference_executor
+from .job_manager import JobManager, job_manager
+from .audio_store import AudioArtifactStore, audio_store
 
 __all__ = [
     "TextGenerationService",
+    "text_service",
     "VoiceGenerationService",
-    "PictogramGenerationService"
+    "voice_service",
+    "PictogramGenerationService",
+    "pictogram_service",
+    "InferenceExecutor",
+    "inference_executor",
+    "JobManager",
+    "job_manager",
+    "AudioArtifactStore",
+    "audio_store"
 ]
@@ -0,0 +1,311 @@
+"""
+Content-addressed store of synthesized audio files.
+Identical requests share one file, concurrent identical requests share one synthesis.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from backend.config.settings import settings
+
+INDEX_FILE = "index.json"
+# "<sha256>.<extensión>", p. ej. el WAV original y sus versiones transcodificadas
+ARTIFACT_FILE_RE = re.compile(r"^([0-9a-f]{64})\.(\w+)$")
+# Archivos fuera del índice más antiguos que esto se consideran restos (síntesis interrumpida,
+# salidas antiguas). Los más recientes pueden pertenecer a otro proceso que aún no guardó el índice.
+ORPHAN_MIN_AGE_SECONDS = 3600
+
+
+class AudioArtifactStore:
+    """
+    Directory of audio files named by the hash of the inputs that produced them.
+
+    A small JSON index keeps the metadata of each file (duration, sample rate,
+    voice, creation and last access times), so serving an existing artifact
+    never needs to reopen the audio file.
+
+    `get_or_create` is single-flight: while an artifact is being synthesized,
+    other callers asking for the same key wait for that result instead of
+    running the model again. Transcoded variants (`get_variant`) are stored next
+    to the original and follow the same rules.
+
+    `enforce_retention` keeps the directory within a disk quota, removing the
+    least recently used artifacts (with all their variants) first.
+
+    Several processes (e.g. prefork workers) may share the directory: the index
+    is re-read whenever another process has rewritten it.
+
+    Args:
+        root (str): Directory holding the audio files and the index.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        # (mtime_ns, inode) del index.json leído o escrito por este proceso
+        self._index_stamp = None
+        self._in_flight: Dict[str, Future] = {}
+        self._retention_thread: Optional[threading.Thread] = None
+        # Tras un fork el hilo de retención sigue solo en el padre y podría tener el lock tomado
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    @staticmethod
+    def key_for(**inputs: Any) -> str:
+        """Hash of the generation inputs (text, voice, language, speed, model...)."""
+        encoded = json.dumps(inputs, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def path_for(self, key: str, extension: str = "wav") -> str:
+        return os.path.join(self.root, f"{key}.{extension}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the metadata of an existing artifact (with its `path`), or None."""
+        with self._lock:
+            index = self._load_index()
+            meta = index.get(key)
+            if meta is None:
+                return None
+            path = self.path_for(key)
+            if not os.path.isfile(path):
+                # El archivo se borró por fuera: olvidar la entrada
+                del index[key]
+                self._save_index()
+                return None
+            meta["last_access"] = time.time()
+            return {**meta, "path": path}
+
+    def get_or_create(self, key: str, create: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return an artifact, synthesizing it once if it does not exist.
+
+        Args:
+            key (str): Artifact key (see `key_for`).
+            create (Callable[[str], Dict[str, Any]]): Writes the audio to the given path
+                and returns its metadata (duration, sample_rate, voice).
+
+        Returns:
+            Dict[str, Any]: Artifact metadata including `path`.
+        """
+        meta = self.get(key)
+        if meta is not None:
+            return meta
+
+        return self._single_flight(key, lambda: self._create(key, create))
+
+    def get_variant(self, key: str, extension: str, transcode: Callable[[str, str], None]) -> Optional[str]:
+        """Return the path of an alternative encoding of an artifact, creating it once.
+
+        Args:
+            key (str): Artifact key.
+            extension (str): Variant file extension (e.g. "flac", "opus").
+            transcode (Callable[[str, str], None]): Converts the original file (first path)
+                into the variant (second path).
+
+        Returns:
+            Optional[str]: Variant path, or None if the artifact does not exist.
+        """
+        if self.get(key) is None:
+            return None
+        path = self.path_for(key, extension)
+        if os.path.isfile(path):
+            return path
+        return self._single_flight(f"{key}.{extension}", lambda: self._create_variant(key, extension, transcode))
+
+    def enforce_retention(self, max_bytes: int, max_age_seconds: float = 0) -> int:
+        """Delete artifacts until the directory fits in `max_bytes`.
+
+        Artifacts not accessed for `max_age_seconds` (if > 0) are removed first,
+        then the least recently used ones. Files that do not belong to the index
+        (older timestamp-named outputs, stale temporary files) are removed too.
+
+        Returns:
+            int: Number of files removed.
+        """
+        now = time.time()
+        removed = 0
+        with self._lock:
+            index = self._load_index()
+            busy = {flight.split(".")[0] for flight in self._in_flight}
+
+            # Archivos huérfanos: no están en el índice y nadie los está escribiendo
+            for filename in (os.listdir(self.root) if os.path.isdir(self.root) else []):
+                path = os.path.join(self.root, filename)
+                match = ARTIFACT_FILE_RE.match(filename)
+                if filename.startswith(INDEX_FILE) or (match and match.group(1) in index):
+                    continue
+                if match is not None and match.group(1) in busy:
+                    continue
+                try:
+                    if now - os.path.getmtime(path) < ORPHAN_MIN_AGE_SECONDS:
+                        continue
+                except OSError:
+                    continue
+                removed += self._remove_file(path)
+
+            by_age = sorted(index.items(), key=lambda item: item[1].get("last_access", 0))
+            total = sum(self._artifact_bytes(meta) for _, meta in by_age)
+            for key, meta in by_age:
+                expired = max_age_seconds > 0 and now - meta.get("last_access", 0) > max_age_seconds
+                if not expired and total <= max_bytes:
+                    break
+                if key in busy:
+                    continue
+                total -= self._artifact_bytes(meta)
+                for extension in ["wav", *meta.get("variants", {})]:
+                    removed += self._remove_file(self.path_for(key, extension))
+                del index[key]
+
+            # También persiste los últimos accesos para la próxima ejecución
+            self._save_index()
+        return removed
+
+    def start_retention(self, interval_seconds: float, max_bytes: int, max_age_seconds: float = 0):
+        """Run `enforce_retention` every `interval_seconds` on a daemon thread (started once)."""
+        with self._lock:
+            if self._retention_thread is not None:
+                return
+
+            def loop():
+                while True:
+                    try:
+                        removed = self.enforce_retention(max_bytes, max_age_seconds)
+                        if removed:
+                            print(f"AudioArtifactStore: retention removed {removed} files")
+                    except Exception as e:
+                        print(f"AudioArtifactStore: retention failed: {e}")
+                    time.sleep(interval_seconds)
+
+            self._retention_thread = threading.Thread(target=loop, name="audio-retention", daemon=True)
+            self._retention_thread.start()
+
+    def delete(self, key: str):
+        with self._lock:
+            index = self._load_index()
+            meta = index.pop(key, None)
+            if meta is not None:
+                self._save_index()
+        for extension in ["wav", *(meta or {}).get("variants", {})]:
+            self._remove_file(self.path_for(key, extension))
+
+    def _single_flight(self, flight_key: str, run: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._in_flight.get(flight_key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[flight_key] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = run()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(flight_key, None)
+
+    def _create(self, key: str, create: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path_for(key)
+        # Se escribe a un archivo temporal y se renombra: nunca se sirve un audio a medias
+        tmp_path = os.path.join(self.root, f"{key}.{os.getpid()}.{threading.get_ident()}.partial.wav")
+        try:
+            meta = dict(create(tmp_path))
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        now = time.time()
+        meta.update(size=os.path.getsize(path), created_at=now, last_access=now)
+        with self._lock:
+            self._load_index()[key] = meta
+            self._save_index()
+        return {**meta, "path": path}
+
+    def _create_variant(self, key: str, extension: str, transcode: Callable[[str, str], None]) -> Optional[str]:
+        path = self.path_for(key, extension)
+        tmp_path = os.path.join(self.root, f"{key}.{os.getpid()}.{threading.get_ident()}.partial.{extension}")
+        try:
+            transcode(self.path_for(key), tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        with self._lock:
+            meta = self._load_index().get(key)
+            if meta is None:
+                # El original se eliminó mientras se transcodificaba
+                self._remove_file(path)
+                return None
+            meta.setdefault("variants", {})[extension] = os.path.getsize(path)
+            self._save_index()
+        return path
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    @staticmethod
+    def _artifact_bytes(meta: Dict[str, Any]) -> int:
+        return meta.get("size", 0) + sum(meta.get("variants", {}).values())
+
+    @staticmethod
+    def _remove_file(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        stamp = self._index_file_stamp()
+        if self._index is not None and stamp == self._index_stamp:
+            return self._index
+
+        try:
+            with open(os.path.join(self.root, INDEX_FILE), "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        # Conserva los accesos que este proceso registró en memoria y aún no guardó
+        for key, meta in (self._index or {}).items():
+            if key in index:
+                index[key]["last_access"] = max(index[key].get("last_access", 0), meta.get("last_access", 0))
+        self._index = index
+        self._index_stamp = stamp
+        return self._index
+
+    def _index_file_stamp(self):
+        try:
+            stat = os.stat(os.path.join(self.root, INDEX_FILE))
+            return stat.st_mtime_ns, stat.st_ino
+        except OSError:
+            return None
+
+    def _save_index(self):
+        path = os.path.join(self.root, INDEX_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, path)
+            self._index_stamp = self._index_file_stamp()
+        except OSError as e:
+            print(f"AudioArtifactStore: cannot write index: {e}")
+
+
+# Instancia compartida: un único índice y un único single-flight por proceso
+audio_store = AudioArtifactStore(settings.audio_output_dir)
@@ -0,0 +1,117 @@
+"""
+Dedicated thread pools for blocking inference work.
+Controllers await these pools so model calls never run on the asyncio event loop.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict
+
+from backend.config.settings import settings
+
+
+class InferenceExecutor:
+    """
+    Runs blocking work on bounded pools, one per kind of load.
+
+    Pools:
+        - llm: text model generation (CPU/GPU bound).
+        - tts: speech synthesis (CPU/GPU bound).
+        - io: network and disk bound work such as pictogram downloads.
+
+    Sizing each pool from settings keeps the number of concurrent heavy jobs
+    explicit, while light requests (`/info`, static files) keep being served
+    by the event loop.
+    """
+
+    def __init__(self, llm_workers: int = 1, tts_workers: int = 1, io_workers: int = 8):
+        self._pools: Dict[str, ThreadPoolExecutor] = {
+            "llm": ThreadPoolExecutor(max_workers=max(1, llm_workers), thread_name_prefix="llm"),
+            "tts": ThreadPoolExecutor(max_workers=max(1, tts_workers), thread_name_prefix="tts"),
+            "io": ThreadPoolExecutor(max_workers=max(1, io_workers), thread_name_prefix="io"),
+        }
+
+    def pool(self, name: str) -> ThreadPoolExecutor:
+        """Return the underlying pool by name ("llm", "tts" or "io")."""
+        try:
+            return self._pools[name]
+        except KeyError:
+            raise ValueError(f"Unknown inference pool: {name}")
+
+    async def run(self, pool: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `func(*args, **kwargs)` on the given pool and await its result.
+
+        Args:
+            pool (str): Pool name ("llm", "tts" or "io").
+            func (Callable): Blocking callable to execute.
+
+        Returns:
+            Any: The value returned by `func`.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool(pool), functools.partial(func, *args, **kwargs))
+
+    async def run_llm(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        return await self.run("llm", func, *args, **kwargs)
+
+    async def run_tts(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        return await self.run("tts", func, *args, **kwargs)
+
+    async def run_io(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        return await self.run("io", func, *args, **kwargs)
+
+    async def stream(self, pool: str, func: Callable[..., Any], *args, **kwargs) -> AsyncIterator[Any]:
+        """Run `func` on the given pool and yield every item it emits while running.
+
+        `func` receives two extra keyword arguments: `emit`, whose calls from the
+        worker thread are delivered to this async iterator in order, and `stop_event`,
+        a `threading.Event` set when the iterator is closed early (e.g. the client
+        disconnected) so `func` can stop generating instead of running to completion.
+        Exceptions raised by `func` are re-raised once the emitted items are consumed.
+
+        Args:
+            pool (str): Pool name ("llm", "tts" or "io").
+            func (Callable): Blocking callable accepting `emit` and `stop_event` keyword arguments.
+
+        Yields:
+            Any: Items passed to `emit`.
+        """
+        loop = asyncio.get_running_loop()
+        items: asyncio.Queue = asyncio.Queue()
+        done = object()
+        stop_event = threading.Event()
+
+        def emit(item: Any):
+            # Tras cerrar el iterador nadie consume la cola: descartar lo que quede
+            if not stop_event.is_set():
+                loop.call_soon_threadsafe(items.put_nowait, item)
+
+        future = loop.run_in_executor(
+            self.pool(pool), functools.partial(func, *args, emit=emit, stop_event=stop_event, **kwargs)
+        )
+        future.add_done_callback(lambda _: items.put_nowait(done))
+
+        try:
+            while True:
+                item = await items.get()
+                if item is done:
+                    break
+                yield item
+
+            await future
+        finally:
+            # Cliente desconectado o error: avisar al hilo para que deje de generar
+            stop_event.set()
+
+    def shutdown(self, wait: bool = True):
+        """Shut down every pool."""
+        for executor in self._pools.values():
+            executor.shutdown(wait=wait)
+
+
+inference_executor = InferenceExecutor(
+    llm_workers=settings.llm_executor_workers,
+    tts_workers=settings.tts_executor_workers,
+    io_workers=settings.io_executor_workers,
+)
@@ -0,0 +1,224 @@
+"""
+Asynchronous job queue for generation requests.
+Accepts text, voice and pictogram jobs, returns an id right away and runs them on
+background workers ordered by priority class.
+"""
+import asyncio
+import itertools
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from backend.config.settings import settings
+from backend.services.inference_executor import inference_executor
+
+
+# Menor valor = se atiende antes
+PRIORITY_RANKS = {"interactive": 0, "bulk": 1}
+
+# Un handler recibe el payload y un callback de progreso (0..1) y devuelve un resultado serializable
+JobHandler = Callable[[Dict[str, Any], Callable[[float], None]], Any]
+
+
+class JobQueueFullError(Exception):
+    """Raised when the queue already holds `job_queue_max_size` pending jobs."""
+
+
+class Job:
+    """
+    A single queued generation job and its tracked state.
+    """
+
+    def __init__(self, kind: str, payload: Dict[str, Any], priority: str, sequence: int):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.payload = payload
+        self.priority = priority
+        self.sequence = sequence
+        self.status = "queued"
+        self.progress = 0.0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def sort_key(self) -> Tuple[int, int]:
+        return PRIORITY_RANKS[self.priority], self.sequence
+
+    def set_progress(self, value: float):
+        # Llamado desde los hilos del ejecutor; asignar un float es atómico
+        self.progress = min(1.0, max(self.progress, float(value)))
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+
+class JobManager:
+    """
+    Priority job queue served by a fixed number of asyncio workers.
+
+    Each job kind is registered with a handler and the executor pool it runs on.
+    Workers take the highest-priority job (interactive before bulk, FIFO inside a
+    class) and await the handler on that pool, so bursts are absorbed by the queue
+    instead of by open HTTP connections.
+
+    At most `bulk_max_in_flight` bulk jobs run at the same time; a bulk job taken
+    while the cap is reached is parked and re-queued when a running bulk job ends.
+    The cap is kept below `num_workers` (when there is more than one worker), so at
+    least `num_workers - bulk_max_in_flight` workers are always free to start an
+    interactive job as soon as it arrives, however many bulk jobs are pending.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 2,
+        max_queue_size: int = 256,
+        retention_seconds: int = 3600,
+        bulk_max_in_flight: int = 1,
+    ):
+        self.num_workers = max(1, num_workers)
+        self.max_queue_size = max_queue_size
+        self.retention_seconds = retention_seconds
+        # Con un solo worker no se puede reservar capacidad; con más, siempre queda uno libre
+        self.bulk_max_in_flight = max(1, min(bulk_max_in_flight, self.num_workers - 1))
+        self._handlers: Dict[str, Tuple[str, JobHandler]] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._sequence = itertools.count()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: list = []
+        self._bulk_running = 0
+        # Trabajos bulk retirados de la cola mientras se alcanzaba el límite, en orden de llegada
+        self._parked_bulk: list = []
+
+    def register_handler(self, kind: str, pool: str, handler: JobHandler):
+        """Register the handler for a job kind.
+
+        Args:
+            kind (str): Job kind, e.g. "text".
+            pool (str): Executor pool the handler runs on ("llm", "tts" or "io").
+            handler (JobHandler): Blocking callable `(payload, progress) -> result`.
+        """
+        self._handlers[kind] = (pool, handler)
+
+    def start(self):
+        """Start the workers on the running event loop (idempotent)."""
+        if self._workers:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.num_workers)]
+
+    async def stop(self):
+        """Cancel the workers. Pending jobs stay in memory as queued."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._bulk_running = 0
+        self._parked_bulk = []
+
+    def submit(self, kind: str, payload: Dict[str, Any], priority: str = "interactive") -> Job:
+        """Queue a job and return it immediately.
+
+        Args:
+            kind (str): Registered job kind.
+            payload (Dict[str, Any]): Keyword arguments for the handler.
+            priority (str): "interactive" or "bulk".
+
+        Returns:
+            Job: The queued job.
+
+        Raises:
+            ValueError: If the kind or priority is unknown.
+            JobQueueFullError: If too many jobs are pending.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if priority not in PRIORITY_RANKS:
+            raise ValueError(f"Unknown job priority: {priority}")
+
+        self.start()
+        self._prune()
+
+        if self.queue_depth() >= self.max_queue_size:
+            raise JobQueueFullError("Job queue is full, try again later")
+
+        job = Job(kind, payload, priority, next(self._sequence))
+        self._jobs[job.id] = job
+        self._queue.put_nowait((job.sort_key, job.id))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def queue_depth(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == "queued")
+
+    def queue_position(self, job: Job) -> Optional[int]:
+        """Number of queued jobs that will run before this one (None once started)."""
+        if job.status != "queued":
+            return None
+        return sum(
+            1 for other in self._jobs.values()
+            if other.status == "queued" and other.sort_key < job.sort_key
+        )
+
+    async def _worker(self):
+        while True:
+            _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            try:
+                if job is None:
+                    continue
+                if job.priority != "bulk":
+                    await self._run(job)
+                elif self._bulk_running >= self.bulk_max_in_flight:
+                    # Aparcar para no ocupar otro worker; vuelve a la cola al terminar un bulk
+                    self._parked_bulk.append(job)
+                else:
+                    self._bulk_running += 1
+                    try:
+                        await self._run(job)
+                    finally:
+                        self._bulk_running -= 1
+                        if self._parked_bulk and self._queue is not None:
+                            parked = self._parked_bulk.pop(0)
+                            self._queue.put_nowait((parked.sort_key, parked.id))
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        pool, handler = self._handlers[job.kind]
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = await inference_executor.run(pool, handler, job.payload, job.set_progress)
+            job.progress = 1.0
+            job.status = "completed"
+        except Exception as e:
+            print(f"Job {job.id} ({job.kind}) failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        # Olvidar trabajos terminados hace más de `retention_seconds`
+        limit = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at is not None and job.finished_at < limit
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager(
+    num_workers=settings.job_workers,
+    max_queue_size=settings.job_queue_max_size,
+    retention_seconds=settings.job_retention_seconds,
+    bulk_max_in_flight=settings.job_bulk_max_in_flight,
+)
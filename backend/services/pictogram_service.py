@@ -3,27 +3,105 @@ Service for pictogram generation.
 Uses the pictogram model to process text and return generated pictograms.
 """
 
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional, Callable
+from urllib.parse import quote
 
 from backend.models.pictogram_model import PictogramGenerationModel
 
+# Ruta desde la que se sirven las miniaturas en modo "url"
+IMAGE_URL_PREFIX = "/pictogram/image"
+
 
 class PictogramGenerationService:
     """
     Service that uses the pictogram model to generate pictograms from text.
     """
 
-    def __init__(self):
-        self.model = PictogramGenerationModel()
+    def __init__(self, model: Optional[PictogramGenerationModel] = None):
+        self.model = model or PictogramGenerationModel()
 
-    def generate_pictograms(self, text: str) -> Dict[str, Any]:
+    def generate_pictograms(
+        self,
+        text: str,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        image_mode: str = "base64"
+    ) -> Dict[str, Any]:
         """
         Generates pictograms from a given text.
 
         Args:
             text (str): Input text to analyze and generate pictograms.
+            progress_callback (Optional[Callable[[float], None]]): Called with the fraction of sentences processed.
+            image_mode (str): "base64" to inline images, "url" to return `image_url` links instead.
 
         Returns:
             Dict[str, Any]: Dictionary with the generated pictograms.
         """
-        return self.model.generate(text)  # type: ignore
+        result = self.model.generate(text, progress_callback=progress_callback)  # type: ignore
+        if image_mode == "url":
+            for item in result["items"]:
+                self._use_image_url(item)
+        return result
+
+    def stream_pictograms_from_story(
+        self,
+        stream_story: Callable[..., str],
+        emit: Callable[[Dict[str, Any]], None],
+        image_mode: str = "base64",
+        stop_event: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        """
+        Generates a story and its pictograms in a pipeline, emitting events as they are ready.
+
+        Each sentence goes to keyword extraction and pictogram lookup as soon as the
+        text model completes it. Events are dicts: `{"type": "text", "text": chunk}`
+        for story chunks, `{"type": "pictogram", "item": item}` for pictograms (in
+        story order) and a final `{"type": "done", "story": story}`.
+
+        Args:
+            stream_story (Callable[..., str]): Generates the story, calling its `emit`
+                keyword argument with each chunk (e.g. a partial of `TextGenerationService.stream_story`).
+            emit (Callable[[Dict[str, Any]], None]): Called with each event.
+            image_mode (str): "base64" to inline images, "url" to return `image_url` links instead.
+            stop_event (Optional[threading.Event]): Passed on to `stream_story` to stop decoding early.
+
+        Returns:
+            Dict[str, Any]: Dictionary with the story and its pictograms.
+        """
+        def on_item(item: Dict[str, Any]):
+            if image_mode == "url":
+                self._use_image_url(item)
+            emit({"type": "pictogram", "item": item})
+
+        pipeline = self.model.pipeline(on_item)
+
+        def on_chunk(chunk: str):
+            emit({"type": "text", "text": chunk})
+            pipeline.feed(chunk)
+
+        story = stream_story(emit=on_chunk, stop_event=stop_event)
+        items = pipeline.close()
+        emit({"type": "done", "story": story})
+        return {"paragraph": story, "items": items}
+
+    def _use_image_url(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        item["image_url"] = f"{IMAGE_URL_PREFIX}/{quote(item['image_key'], safe='')}"
+        item["image"] = ""
+        return item
+
+    def get_pictogram_image(self, image_key: str) -> Optional[bytes]:
+        """
+        Returns the PNG thumbnail for an `image_key` returned in a previous response.
+
+        Args:
+            image_key (str): Image key ("arasaac-<id>" or "fallback-<text>").
+
+        Returns:
+            Optional[bytes]: PNG bytes, or None if the key is unknown or the image is unavailable.
+        """
+        return self.model.get_thumbnail(image_key)
+
+
+# Instancia compartida: un único modelo (y sus cachés, cliente HTTP y pool de descargas) por proceso
+pictogram_service = PictogramGenerationService()
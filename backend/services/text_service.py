@@ -2,7 +2,37 @@
 Service for generating personalized stories.
 Builds prompts and uses the text model to generate narratives adapted to specific parameters.
 """
+import hashlib
+import json
+import threading
+from typing import Callable, Optional
+
+from backend.cache.disk_cache import DiskCache
+from backend.cache.memory_cache import LRUCache
+from backend.cache.tiered_cache import TieredCache
+from backend.config.settings import settings
+from backend.models.model_registry import model_registry
 from backend.models.text_model import TextGenerationModel
+from backend.monitoring.metrics import STAGE_SECONDS, track_cache
+
+
+def _build_story_cache() -> Optional[TieredCache]:
+    if not settings.story_cache_enabled:
+        return None
+    cache = TieredCache(
+        memory=LRUCache(max_entries=settings.story_cache_memory_entries),
+        disk=DiskCache.shared(settings.story_cache_dir, max_bytes=settings.story_cache_max_disk_bytes)
+        if settings.story_cache_dir else None,
+        ttl=settings.story_cache_ttl_seconds,
+        stale_ttl=0
+    )
+    track_cache("story", cache)
+    return cache
+
+
+# Historias deterministas ya generadas, por hash del pedido completo. Una sola caché por
+# proceso: todas las instancias del servicio comparten entradas y presupuesto
+_story_cache = _build_story_cache()
 
 
 class TextGenerationService:
@@ -10,8 +40,10 @@ class TextGenerationService:
     Service that builds prompts and generates personalized stories using a text model.
     Allows adjusting tone, complexity, story type, and other parameters.
     """
-    def __init__(self):
-        self.model = TextGenerationModel()
+    def __init__(self, model: Optional[TextGenerationModel] = None):
+        # Shared instance from the registry: every service uses the same weights
+        self.model = model or model_registry.get_text_model()
+        self.story_cache: Optional[TieredCache] = _story_cache
         
         self.tone_instructions = {
             "calmo": "Usa un tono tranquilo y pausado. Evita conflictos o tensiones.",
@@ -33,11 +65,15 @@ class TextGenerationService:
         complexity: str = "simple",
         sensory_friendly: bool = True,
         story_type: str = "cotidiana",
-        protagonist_name: str = ""
+        protagonist_name: str = "",
+        deterministic: bool = False
     ) -> str:
         """
         Generates a personalized story from a prompt and optional parameters.
 
+        Deterministic requests use greedy decoding and are cached: repeating the
+        same prompt and parameters returns the stored story without running the model.
+
         Args:
             prompt (str): Initial prompt for the story.
             max_tokens (int): Maximum tokens to generate.
@@ -46,25 +82,175 @@ class TextGenerationService:
             sensory_friendly (bool): Whether to avoid intense sensory stimuli.
             story_type (str): Type of story.
             protagonist_name (str): Name of the protagonist.
+            deterministic (bool): Greedy decoding plus result cache.
 
         Returns:
             str: Generated story.
         """
-        full_prompt = self._build_prompt(
-            prompt, tone, complexity, sensory_friendly, story_type, protagonist_name
+        with STAGE_SECONDS.time(stage="prompt_build"):
+            full_prompt = self._build_prompt(
+                prompt, tone, complexity, sensory_friendly, story_type, protagonist_name
+            )
+            # El bloque de instrucciones se repite entre peticiones: su KV cache se reutiliza
+            instructions = self._build_instructions(tone, complexity, sensory_friendly, story_type)
+
+        def generate() -> str:
+            return self.model.generate(
+                full_prompt, max_new_tokens=max_tokens, cache_prefix=instructions, deterministic=deterministic
+            )
+
+        if not deterministic or self.story_cache is None:
+            return generate()
+
+        key = self._story_cache_key(
+            prompt, max_tokens, tone, complexity, sensory_friendly, story_type, protagonist_name
         )
-        
-        return self.model.generate(full_prompt, max_new_tokens=max_tokens)
-    
-    def _build_prompt(
+        story = self.story_cache.get_or_fetch(key, lambda: self._cacheable(full_prompt, generate()))
+        return story.decode("utf-8") if story is not None else self.model._simple_fallback(full_prompt)
+
+    def cached_story(
         self,
-        user_prompt: str,
+        prompt: str,
+        max_tokens: int = 120,
+        tone: str = "calmo",
+        complexity: str = "simple",
+        sensory_friendly: bool = True,
+        story_type: str = "cotidiana",
+        protagonist_name: str = ""
+    ) -> Optional[str]:
+        """
+        Returns the cached deterministic story for these parameters, without running the model.
+
+        Only reads memory and disk, so controllers call it on the io pool before
+        queueing a generation on the llm pool. A miss is not counted: the
+        `generate_story` or `stream_story` call that follows counts it.
+
+        Args:
+            prompt (str): Initial prompt for the story.
+            max_tokens (int): Maximum tokens to generate.
+            tone (str): Tone of the narrative.
+            complexity (str): Level of language complexity.
+            sensory_friendly (bool): Whether to avoid intense sensory stimuli.
+            story_type (str): Type of story.
+            protagonist_name (str): Name of the protagonist.
+
+        Returns:
+            Optional[str]: The cached story, or None if it is not cached or has expired.
+        """
+        if self.story_cache is None:
+            return None
+        key = self._story_cache_key(
+            prompt, max_tokens, tone, complexity, sensory_friendly, story_type, protagonist_name
+        )
+        cached = self.story_cache.get(key, count_miss=False)
+        return cached.decode("utf-8") if cached is not None else None
+
+    def stream_story(
+        self,
+        prompt: str,
+        emit: Callable[[str], None],
+        max_tokens: int = 120,
+        tone: str = "calmo",
+        complexity: str = "simple",
+        sensory_friendly: bool = True,
+        story_type: str = "cotidiana",
+        protagonist_name: str = "",
+        deterministic: bool = False,
+        stop_event: Optional[threading.Event] = None
+    ) -> str:
+        """
+        Generates a personalized story, emitting it sentence by sentence while it is decoded.
+
+        A deterministic request already in the story cache is emitted as a single chunk.
+
+        Args:
+            prompt (str): Initial prompt for the story.
+            emit (Callable[[str], None]): Called with each completed chunk of the story.
+            max_tokens (int): Maximum tokens to generate.
+            tone (str): Tone of the narrative.
+            complexity (str): Level of language complexity.
+            sensory_friendly (bool): Whether to avoid intense sensory stimuli.
+            story_type (str): Type of story.
+            protagonist_name (str): Name of the protagonist.
+            deterministic (bool): Greedy decoding plus result cache.
+            stop_event (Optional[threading.Event]): Set to stop decoding early (e.g. the client left).
+
+        Returns:
+            str: The complete generated story.
+        """
+        with STAGE_SECONDS.time(stage="prompt_build"):
+            full_prompt = self._build_prompt(
+                prompt, tone, complexity, sensory_friendly, story_type, protagonist_name
+            )
+            instructions = self._build_instructions(tone, complexity, sensory_friendly, story_type)
+
+        if not deterministic or self.story_cache is None:
+            return self.model.generate_stream(
+                full_prompt, emit, max_new_tokens=max_tokens, cache_prefix=instructions, stop_event=stop_event
+            )
+
+        key = self._story_cache_key(
+            prompt, max_tokens, tone, complexity, sensory_friendly, story_type, protagonist_name
+        )
+        # Solo consulta: una entrada ausente o caducada no se genera aquí sino en streaming
+        cached = self.story_cache.get(key)
+        if cached is not None:
+            story = cached.decode("utf-8")
+            emit(story)
+            return story
+
+        story = self.model.generate_stream(
+            full_prompt, emit, max_new_tokens=max_tokens, cache_prefix=instructions, deterministic=True,
+            stop_event=stop_event
+        )
+        # Una historia cortada a medias no se guarda
+        if stop_event is not None and stop_event.is_set():
+            return story
+        value = self._cacheable(full_prompt, story)
+        if value is not None:
+            self.story_cache.set(key, value)
+        return story
+
+    def _story_cache_key(
+        self,
+        prompt: str,
+        max_tokens: int,
         tone: str,
         complexity: str,
         sensory_friendly: bool,
         story_type: str,
         protagonist_name: str
     ) -> str:
+        # Todos los campos del pedido más el modelo y su precisión configurada
+        request = {
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "tone": tone,
+            "complexity": complexity,
+            "sensory_friendly": sensory_friendly,
+            "story_type": story_type,
+            "protagonist_name": protagonist_name,
+            "deterministic": True,
+            "checkpoint": self.model.model_checkpoint,
+            "precision": settings.text_model_precision
+        }
+        encoded = json.dumps(request, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _cacheable(self, full_prompt: str, story: str) -> Optional[bytes]:
+        # La historia de respaldo (modelo no disponible o error) no se guarda en caché
+        if not story or story == self.model._simple_fallback(full_prompt):
+            return None
+        return story.encode("utf-8")
+    
+    def _build_instructions(
+        self,
+        tone: str,
+        complexity: str,
+        sensory_friendly: bool,
+        story_type: str
+    ) -> str:
+        """Fixed instruction block; the same few combinations are shared by every request."""
         instructions = [
             f"Story type: {story_type}.",
             self.tone_instructions.get(tone, ""),
@@ -78,9 +264,24 @@ class TextGenerationService:
 
         instructions.append("Use literal language and avoid complex metaphors.")
 
+        return " ".join(instructions)
+
+    def _build_prompt(
+        self,
+        user_prompt: str,
+        tone: str,
+        complexity: str,
+        sensory_friendly: bool,
+        story_type: str,
+        protagonist_name: str
+    ) -> str:
+        context = self._build_instructions(tone, complexity, sensory_friendly, story_type)
+
         if protagonist_name:
-            instructions.append(f"The protagonist is called {protagonist_name}.")
+            context += f" The protagonist is called {protagonist_name}."
+
+        return f"{context}\n\n{user_prompt}"
 
-        context = " ".join(instructions)
 
-        return f"{context}\n\n{user_prompt}"
\ No newline at end of file
+# Instancia compartida por todos los controladores
+text_service = TextGenerationService()
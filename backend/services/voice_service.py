@@ -1,6 +1,35 @@
+from backend.config.settings import settings
+from backend.models.model_registry import model_registry
 from backend.models.voice_model import VoiceGenerationModel
-from datetime import datetime
+from backend.services.audio_store import AudioArtifactStore, audio_store
+from typing import Callable, Optional, Tuple
 import os
+import struct
+import threading
+
+AUDIO_URL_PREFIX = "/voice/audio"
+
+# formato -> (tipo MIME, extensión, formato y subtipo de soundfile); WAV es el original
+AUDIO_FORMATS = {
+    "wav": ("audio/wav", "wav", None),
+    "flac": ("audio/flac", "flac", ("FLAC", "PCM_16")),
+    "ogg": ("audio/ogg", "ogg", ("OGG", "VORBIS")),
+    "opus": ("audio/ogg; codecs=opus", "opus", ("OGG", "OPUS")),
+}
+
+
+def wav_stream_header(sample_rate: int, channels: int = 1, bits_per_sample: int = 16) -> bytes:
+    """WAV header for a PCM stream whose length is not known yet.
+
+    The RIFF and data sizes are set to 0xFFFFFFFF, which players treat as
+    "read until the end of the stream".
+    """
+    block_align = channels * bits_per_sample // 8
+    return b"".join([
+        b"RIFF", struct.pack("<I", 0xFFFFFFFF), b"WAVE",
+        b"fmt ", struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, bits_per_sample),
+        b"data", struct.pack("<I", 0xFFFFFFFF)
+    ])
 
 
 class VoiceGenerationService:
@@ -9,15 +38,26 @@ class VoiceGenerationService:
 
     Attributes:
         model (VoiceGenerationModel): Instance of the voice generation model.
+        store (AudioArtifactStore): Generated audio, keyed by the hash of the request.
 
     Methods:
         generate_audio(text: str, speaker_wav: str, language: str, speed: float) -> dict:
             Generate audio from text using TTS.
+        stream_audio(text: str, emit: Callable, speaker_wav: str, language: str, speed: float, stop_event) -> int:
+            Stream a WAV header followed by PCM chunks as they are synthesized.
         _get_audio_duration(audio_path: str) -> float:
+            Read the duration of a new audio file (stored in the artifact index).
     """    
 
-    def __init__(self):
-        self.model = VoiceGenerationModel()
+    def __init__(self, model: Optional[VoiceGenerationModel] = None, store: Optional[AudioArtifactStore] = None):
+        self.model = model or model_registry.get_voice_model()
+        self.store = store or audio_store
+        if settings.audio_retention_interval_seconds > 0:
+            self.store.start_retention(
+                settings.audio_retention_interval_seconds,
+                settings.audio_max_disk_bytes,
+                settings.audio_max_age_seconds
+            )
     
     def generate_audio(
         self,
@@ -26,28 +66,124 @@ class VoiceGenerationService:
         language: str = "es",
         speed: float = 1.0
     ) -> dict:
-        """Generate audio from text using TTS."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = f"resources/audio/output/story_{timestamp}.wav"
-        
-        voice_used = speaker_wav if speaker_wav else self.model.get_random_voice()
-        
-        audio_path = self.model.generate(
+        """Generate audio from text using TTS.
+
+        The output is stored by the hash of (text, requested voice, language,
+        speed, model): an identical request reuses the existing file, and
+        concurrent identical requests share a single synthesis. Without a
+        `speaker_wav` the requested voice is "random", so the first voice picked
+        for that text is reused.
+        """
+        if speaker_wav and os.path.isfile(speaker_wav):
+            requested_voice = self.model.latents.file_digest(speaker_wav)
+        else:
+            requested_voice = "random"
+        key = self.store.key_for(
             text=text,
-            speaker_wav=voice_used,
+            voice=requested_voice,
             language=language,
-            output_path=output_path,
-            speed=speed
+            speed=speed,
+            model=self.model.model_name
         )
-        
-        duration = self._get_audio_duration(audio_path)
-        
+
+        def synthesize(output_path: str) -> dict:
+            voice_used = self.resolve_voice(speaker_wav)
+            self.model.generate(
+                text=text,
+                speaker_wav=voice_used,
+                language=language,
+                output_path=output_path,
+                speed=speed
+            )
+            return {
+                "duration": self._get_audio_duration(output_path),
+                "sample_rate": self.model.sample_rate,
+                "voice": os.path.basename(voice_used)
+            }
+
+        artifact = self.store.get_or_create(key, synthesize)
+
         return {
-            "audio_path": audio_path,
-            "duration": duration,
-            "voice_used": os.path.basename(voice_used)
+            "audio_path": artifact["path"],
+            "duration": artifact["duration"],
+            "voice_used": artifact["voice"],
+            "audio_url": f"{AUDIO_URL_PREFIX}/{key}?format={settings.audio_delivery_format}"
         }
+
+    def get_audio_file(self, audio_id: str, audio_format: str = "wav") -> Optional[Tuple[str, str]]:
+        """Return the file of a generated audio in the requested format.
+
+        Compact formats are transcoded from the original WAV with soundfile the
+        first time they are requested and kept next to it.
+
+        Args:
+            audio_id (str): Artifact key from `audio_url`.
+            audio_format (str): "wav", "flac", "ogg" (Vorbis) or "opus".
+
+        Returns:
+            Optional[Tuple[str, str]]: `(path, media_type)`, or None if the audio does not exist.
+
+        Raises:
+            ValueError: The format is unknown or not supported by the installed libsndfile.
+        """
+        if audio_format not in AUDIO_FORMATS:
+            raise ValueError(f"Unsupported audio format: {audio_format}")
+        media_type, extension, codec = AUDIO_FORMATS[audio_format]
+
+        if codec is None:
+            artifact = self.store.get(audio_id)
+            return (artifact["path"], media_type) if artifact is not None else None
+
+        def transcode(source: str, target: str):
+            import soundfile as sf
+
+            data, sample_rate = sf.read(source, dtype="float32")
+            try:
+                sf.write(target, data, sample_rate, format=codec[0], subtype=codec[1])
+            except (RuntimeError, ValueError) as e:
+                raise ValueError(f"Cannot encode {audio_format}: {e}")
+
+        path = self.store.get_variant(audio_id, extension, transcode)
+        return (path, media_type) if path is not None else None
     
+    def resolve_voice(self, speaker_wav: str = "") -> str:
+        """Return the reference voice to use: the given WAV if it exists, otherwise a random bundled voice."""
+        if speaker_wav and os.path.isfile(speaker_wav):
+            return speaker_wav
+        return self.model.get_random_voice()
+
+    def stream_audio(
+        self,
+        text: str,
+        emit: Callable[[bytes], None],
+        speaker_wav: str = "",
+        language: str = "es",
+        speed: float = 1.0,
+        stop_event: Optional[threading.Event] = None
+    ) -> int:
+        """Stream audio from text: a WAV header, then PCM chunks as soon as they are synthesized.
+
+        Args:
+            text (str): Text to synthesize.
+            emit (Callable[[bytes], None]): Called with the header and each audio chunk.
+            speaker_wav (str): Reference voice (see `resolve_voice`).
+            language (str): Language code.
+            speed (float): Speech speed.
+            stop_event (Optional[threading.Event]): Set to stop synthesis early (e.g. the client left).
+
+        Returns:
+            int: Number of audio samples emitted.
+        """
+        emit(wav_stream_header(self.model.sample_rate))
+        return self.model.generate_stream(
+            text=text,
+            emit=emit,
+            speaker_wav=self.resolve_voice(speaker_wav),
+            language=language,
+            speed=speed,
+            stop_event=stop_event
+        )
+
     def _get_audio_duration(self, audio_path: str) -> float:
         """Get the duration of an audio file.
 
@@ -66,4 +202,7 @@ class VoiceGenerationService:
                 duration = frames / float(rate)
                 return round(duration, 2)
         except Exception:
-            return 0.0
\ No newline at end of file
+            return 0.0
+
+# Instancia compartida por todos los controladores
+voice_service = VoiceGenerationService()
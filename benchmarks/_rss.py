@@ -0,0 +1,16 @@
+"""
+Resident memory of the current process, shared by the benchmarks (Linux only).
+"""
+import os
+import resource
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 ** 2)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss está en KiB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
@@ -0,0 +1,399 @@
+"""
+Offline benchmark of the API endpoints under concurrency.
+
+Runs the FastAPI app in-process (httpx ASGITransport, no server) with:
+    - a tiny randomly initialised Qwen2 model and tokenizer built locally instead of Qwen,
+    - a stub TTS engine registered in the model registry instead of XTTS,
+    - a local stub of the ARASAAC API (search + PNG download) on 127.0.0.1.
+
+Needs no GPU and no network, so results can be compared across commits. For
+each endpoint it reports p50/p95/p99 latency, throughput and resident memory
+as JSON.
+
+Usage:
+    python -m benchmarks.endpoint_benchmark --requests 40 --concurrency 4
+    python -m benchmarks.endpoint_benchmark --endpoints text voice --output before.json
+"""
+import argparse
+import array
+import asyncio
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks._rss import current_rss_mb, peak_rss_mb
+
+# Corpus con el que se entrena el tokenizador del modelo de prueba
+CORPUS = [
+    "Había una vez un niño que jugaba en el parque con su perro.",
+    "La niña come una manzana roja en la cocina de su casa.",
+    "El gato duerme tranquilo junto a la ventana.",
+    "Eres un narrador de cuentos infantiles. Crea historias sencillas, positivas y completas en español.",
+    "Usa un tono tranquilo y pausado. Evita conflictos o tensiones.",
+    "Extract ONLY the main noun (object, animal, person) and the main verb from this sentence.",
+    "Respond with 2 words separated by comma. Sentence: Response:",
+]
+
+# Plantilla de chat con el mismo formato que Qwen
+CHAT_TEMPLATE = (
+    "{% for message in messages %}"
+    "{{ '<|im_start|>' + message['role'] + '\n' + message['content'] + '<|im_end|>' + '\n' }}"
+    "{% endfor %}"
+    "{% if add_generation_prompt %}{{ '<|im_start|>assistant\n' }}{% endif %}"
+)
+
+STORY_TEXT = (
+    "El niño juega en el parque con su perro. La niña come una manzana roja. "
+    "El gato duerme junto a la ventana. Todos vuelven a casa contentos."
+)
+
+
+def build_tiny_model(path: str, seed: int = 0) -> str:
+    """Save a randomly initialised Qwen2 model and a locally trained tokenizer to `path`."""
+    import torch
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import PreTrainedTokenizerFast, Qwen2Config, Qwen2ForCausalLM
+
+    special_tokens = ["<|endoftext|>", "<|im_start|>", "<|im_end|>"]
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    tokenizer.train_from_iterator(
+        CORPUS * 8,
+        trainers.BpeTrainer(
+            vocab_size=512,
+            special_tokens=special_tokens,
+            initial_alphabet=pre_tokenizers.ByteLevel.alphabet()
+        )
+    )
+    fast_tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        eos_token="<|im_end|>",
+        pad_token="<|endoftext|>",
+        additional_special_tokens=special_tokens[1:],
+        # Qwen2 no acepta token_type_ids en generate
+        model_input_names=["input_ids", "attention_mask"]
+    )
+    fast_tokenizer.chat_template = CHAT_TEMPLATE
+    fast_tokenizer.save_pretrained(path)
+
+    torch.manual_seed(seed)
+    config = Qwen2Config(
+        vocab_size=len(fast_tokenizer),
+        hidden_size=64,
+        intermediate_size=128,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=2048,
+        tie_word_embeddings=True,
+        eos_token_id=fast_tokenizer.eos_token_id,
+        pad_token_id=fast_tokenizer.pad_token_id
+    )
+    Qwen2ForCausalLM(config).save_pretrained(path)
+    return path
+
+
+class _StubSynthesizer:
+    def __init__(self, sample_rate: int):
+        self.output_sample_rate = sample_rate
+
+    def split_into_sentences(self, text: str):
+        return [s.strip() + "." for s in text.split(".") if s.strip()]
+
+
+class StubTTS:
+    """
+    Stand-in for `TTS.api.TTS`: produces a tone whose length grows with the text.
+
+    Args:
+        sample_rate (int): Output sample rate.
+        seconds_per_char (float): Audio duration per input character.
+        delay_per_char (float): Simulated synthesis time per character, in seconds.
+    """
+
+    def __init__(self, sample_rate: int = 24000, seconds_per_char: float = 0.06, delay_per_char: float = 0.0):
+        self.synthesizer = _StubSynthesizer(sample_rate)
+        self.seconds_per_char = seconds_per_char
+        self.delay_per_char = delay_per_char
+
+    def tts(self, text: str, speaker_wav: str = "", language: str = "es", speed: float = 1.0):
+        if self.delay_per_char:
+            time.sleep(self.delay_per_char * len(text))
+        rate = self.synthesizer.output_sample_rate
+        samples = int(rate * self.seconds_per_char * len(text) / speed)
+        return [0.2 * math.sin(2 * math.pi * 220 * i / rate) for i in range(samples)]
+
+    def tts_to_file(self, text: str, file_path: str, speaker_wav: str = "", language: str = "es", speed: float = 1.0):
+        wav = self.tts(text, speaker_wav=speaker_wav, language=language, speed=speed)
+        pcm = array.array("h", (int(sample * 32767) for sample in wav))
+        if sys.byteorder == "big":
+            pcm.byteswap()
+        with wave.open(file_path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.synthesizer.output_sample_rate)
+            f.writeframes(pcm.tobytes())
+        return file_path
+
+
+def _stub_voice_model(model_name: str, delay_per_char: float):
+    from backend.models.voice_model import VoiceGenerationModel
+
+    class StubVoiceModel(VoiceGenerationModel):
+        """Voice model whose engine is `StubTTS` (no weights, no conditioning latents)."""
+
+        is_stub = True
+
+        def load_model(self):
+            if self.tts is None:
+                self.tts = StubTTS(delay_per_char=delay_per_char)
+                self.state = "ready"
+
+    return StubVoiceModel(model_name)
+
+
+def register_stub_voice(delay_per_char: float = 0.0):
+    """Register the stub TTS engine as the shared voice model, unless it already is.
+
+    Call after `configure_environment` and before anything imports the services:
+    `backend.services` builds the shared voice service, which keeps the model it
+    finds in the registry at that moment.
+    """
+    from backend.config.settings import settings
+    from backend.models.model_registry import model_registry
+
+    if not getattr(model_registry.get_voice_model(), "is_stub", False):
+        model_registry.register_voice_model(_stub_voice_model(settings.voice_model_name, delay_per_char))
+
+
+def _pictogram_png() -> bytes:
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (500, 500), (255, 255, 255))
+    ImageDraw.Draw(image).ellipse([60, 60, 440, 440], fill=(80, 160, 240), outline=(0, 0, 0), width=12)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def start_stub_arasaac(latency_ms: float) -> ThreadingHTTPServer:
+    """Serve `/api/pictograms/{lang}/search/{text}` and `/api/pictograms/{id}` on a free local port."""
+    png = _pictogram_png()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+            parts = self.path.strip("/").split("/")
+            if len(parts) == 5 and parts[:2] == ["api", "pictograms"] and parts[3] == "search":
+                pictogram_id = zlib.crc32(parts[4].encode("utf-8")) % 1000 + 1
+                body = json.dumps([{"_id": pictogram_id, "schematic": True}]).encode("utf-8")
+                self._reply(200, "application/json", body)
+            elif len(parts) == 3 and parts[:2] == ["api", "pictograms"] and parts[2].isdigit():
+                self._reply(200, "image/png", png)
+            else:
+                self._reply(404, "application/json", b"[]")
+
+        def _reply(self, status: int, content_type: str, body: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-arasaac", daemon=True).start()
+    return server
+
+
+def configure_environment(workdir: str, arasaac_url: str, precision: str = "fp32"):
+    """Point the settings at the offline stand-ins, with every file under `workdir`.
+
+    The settings are read when `backend` is first imported, so this must run before that.
+
+    Args:
+        workdir (str): Directory for the tiny model, caches and generated audio.
+        arasaac_url (str): Base URL of the stub ARASAAC API (see `start_stub_arasaac`).
+        precision (str): TEXT_MODEL_PRECISION of the tiny model.
+    """
+    os.environ.update({
+        "HF_HUB_OFFLINE": "1",
+        "TRANSFORMERS_OFFLINE": "1",
+        "TEXT_MODEL_CHECKPOINT": os.path.join(workdir, "tiny-qwen2"),
+        "TEXT_MODEL_PRECISION": precision,
+        "PICTOGRAMS_API_BASE_URL": arasaac_url,
+        "PICTOGRAM_SOURCE": "api",
+        "PICTOGRAM_CACHE_DIR": os.path.join(workdir, "pictograms"),
+        "AUDIO_OUTPUT_DIR": os.path.join(workdir, "audio"),
+        "VOICE_LATENTS_CACHE_DIR": os.path.join(workdir, "voices"),
+        "STORY_CACHE_DIR": "",
+        "PRELOAD_MODELS": "[]",
+    })
+
+
+def load_app(seed: int = 0, tts_delay_per_char: float = 0.0, warmup: bool = True):
+    """Build the tiny model, register the stub TTS engine, preload both and import the app.
+
+    Call after `configure_environment`, before anything else imports the services.
+
+    Returns:
+        Tuple of the FastAPI app and the seconds spent loading the models.
+    """
+    from backend.config.settings import settings
+    from backend.models.model_registry import model_registry
+
+    build_tiny_model(settings.text_model_checkpoint, seed)
+    register_stub_voice(tts_delay_per_char)
+    start = time.perf_counter()
+    model_registry.preload(["text", "voice"], warmup=warmup)
+    load_seconds = time.perf_counter() - start
+
+    import main as app_module
+    return app_module.app, load_seconds
+
+
+def _payloads(max_tokens: int):
+    # Cada petición cambia el texto para que las cachés de resultados no oculten el trabajo
+    return {
+        "text": ("/text/generate", lambda i: {"prompt": f"Un perro en el parque {i}", "max_tokens": max_tokens}),
+        "voice": ("/voice/generate", lambda i: {"text": f"Había una vez un gato número {i}. Jugaba en el parque."}),
+        "pictogram": ("/pictogram/generate", lambda i: {"text": f"{STORY_TEXT} Fin del cuento {i}."}),
+        "from_prompt": ("/pictogram/from_prompt", lambda i: {"prompt": f"Una niña en la playa {i}", "max_tokens": max_tokens}),
+        "bundle": ("/story/bundle", lambda i: {"prompt": f"Un gato en casa {i}", "max_tokens": max_tokens}),
+    }
+
+
+def _percentile(sorted_values, fraction: float) -> float:
+    # Rango más cercano
+    if not sorted_values:
+        return float("nan")
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+async def _run_endpoint(client, path: str, payload, requests: int, concurrency: int, warmup: int) -> dict:
+    for i in range(warmup):
+        await client.post(path, json=payload(-1 - i))
+
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload(i))
+                ok = response.status_code == 200
+            except Exception as e:
+                print(f"{path}: request failed: {e}", file=sys.stderr)
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += 0 if ok else 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "path": path,
+        "requests": requests,
+        "errors": errors,
+        "concurrency": concurrency,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
+        "throughput_rps": round(requests / elapsed, 2) if elapsed > 0 else None,
+        "rss_mb": round(current_rss_mb(), 1),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    endpoints = list(_payloads(0))
+    parser = argparse.ArgumentParser(description="Benchmark the API endpoints offline with stub models")
+    parser.add_argument("--endpoints", nargs="+", choices=endpoints, default=["text", "voice", "pictogram", "from_prompt"])
+    parser.add_argument("--requests", type=int, default=20, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at the same time")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per endpoint")
+    parser.add_argument("--max-tokens", type=int, default=64, help="max_tokens of the story requests")
+    parser.add_argument("--precision", default="fp32", help="TEXT_MODEL_PRECISION of the tiny model")
+    parser.add_argument("--arasaac-latency-ms", type=float, default=20.0, help="Simulated latency of the stub API")
+    parser.add_argument("--tts-delay-per-char", type=float, default=0.0, help="Simulated TTS seconds per character")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="cuentista-bench-")
+    arasaac = start_stub_arasaac(args.arasaac_latency_ms)
+    # La configuración se lee al importar backend: todo el entorno se fija antes
+    configure_environment(workdir, f"http://127.0.0.1:{arasaac.server_address[1]}/api/", args.precision)
+    app, load_seconds = load_app(args.seed, args.tts_delay_per_char)
+
+    import httpx
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            results = {}
+            payloads = _payloads(args.max_tokens)
+            for name in args.endpoints:
+                path, payload = payloads[name]
+                results[name] = await _run_endpoint(client, path, payload, args.requests, args.concurrency, args.warmup)
+                print(f"{name}: p50 {results[name]['p50_ms']} ms, {results[name]['throughput_rps']} req/s", file=sys.stderr)
+            return results
+
+    results = asyncio.run(run())
+    arasaac.shutdown()
+
+    import torch
+    import transformers
+    report = {
+        "commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "transformers": transformers.__version__,
+            "cpu_count": os.cpu_count(),
+            "torch_threads": torch.get_num_threads(),
+        },
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "model_load_seconds": round(load_seconds, 3),
+        "endpoints": results,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
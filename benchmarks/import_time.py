@@ -0,0 +1,95 @@
+"""
+Startup import-time report.
+
+Imports `main` in a fresh interpreter with `python -X importtime`, then reports the
+total import time, the most expensive modules (cumulative and self time) and
+whether any heavy library was imported eagerly.
+
+Usage:
+    python -m benchmarks.import_time --top 15
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Librerías que solo deben importarse al cargar los modelos
+HEAVY_MODULES = ["torch", "transformers", "TTS", "numpy", "soundfile", "diffusers"]
+
+PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import main\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print('__RESULT__', elapsed, ','.join(m for m in {heavy!r} if m in sys.modules))\n"
+)
+
+
+def parse_importtime(stderr: str):
+    """Parse `-X importtime` output into `(module, self_us, cumulative_us, depth)` rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            depth = (len(name) - len(name.lstrip())) // 2
+            rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the import cost of the API entry point")
+    parser.add_argument("--top", type=int, default=15, help="Number of modules to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(heavy=HEAVY_MODULES)],
+        capture_output=True, text=True
+    )
+    result = [line for line in proc.stdout.splitlines() if line.startswith("__RESULT__")]
+    if proc.returncode != 0 or not result:
+        print(proc.stderr.strip()[-2000:], file=sys.stderr)
+        sys.exit(1)
+
+    _, elapsed, eager = (result[-1].split(" ", 2) + [""])[:3]
+    rows = parse_importtime(proc.stderr)
+    # Tiempo acumulado de cada paquete: el de su módulo más costoso (normalmente el raíz)
+    top_level = {}
+    for name, self_us, cumulative_us, depth in rows:
+        package = name.split(".")[0]
+        top_level[package] = max(top_level.get(package, 0), cumulative_us)
+
+    report = {
+        "import_main_seconds": round(float(elapsed), 3),
+        "eager_heavy_modules": [m for m in eager.strip().split(",") if m],
+        "by_package_ms": {
+            package: round(us / 1000, 1)
+            for package, us in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]
+        },
+        "by_module_self_ms": {
+            name: round(self_us / 1000, 1)
+            for name, self_us, _, _ in sorted(rows, key=lambda row: -row[1])[:args.top]
+        },
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"import main: {report['import_main_seconds']:.3f}s")
+    if report["eager_heavy_modules"]:
+        print(f"WARNING: heavy modules imported at startup: {', '.join(report['eager_heavy_modules'])}")
+    print("\nCumulative time by package (ms):")
+    for package, ms in report["by_package_ms"].items():
+        print(f"  {ms:>9.1f}  {package}")
+    print("\nSelf time by module (ms):")
+    for name, ms in report["by_module_self_ms"].items():
+        print(f"  {ms:>9.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
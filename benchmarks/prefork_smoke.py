@@ -0,0 +1,127 @@
+"""
+Smoke check of the prefork deployment (gunicorn.conf.py).
+
+Boots gunicorn with two workers against the tiny offline text model of
+`endpoint_benchmark`, so the master loads the weights before forking, waits for
+`/health/ready` and sends concurrent `/text/generate` requests. A worker that
+hangs in its first parallel torch operation after the fork makes the requests
+time out and the check fail.
+
+Usage (requires the `prefork` extra):
+    python -m benchmarks.prefork_smoke
+    python -m benchmarks.prefork_smoke --precision fp32 --requests 16
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.endpoint_benchmark import build_tiny_model, configure_environment
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _request(url: str, payload=None, timeout: float = 60.0):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def _wait_ready(base_url: str, server: subprocess.Popen, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            # Varias respuestas seguidas: cada una puede atenderla un worker distinto
+            if all(_request(f"{base_url}/health/ready", timeout=5)[0] == 200 for _ in range(4)):
+                return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Boot the prefork server with two workers and generate text")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=8)
+    # int8 cuantiza en el maestro: es la carga que más cálculo hace antes del fork
+    parser.add_argument("--precision", default="int8", help="TEXT_MODEL_PRECISION of the tiny model")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for startup and for each request")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="cuentista-prefork-")
+    # Los pictogramas no se usan: la URL no necesita responder
+    configure_environment(workdir, "http://127.0.0.1:9/api/", args.precision)
+    build_tiny_model(os.environ["TEXT_MODEL_CHECKPOINT"])
+
+    port = _free_port()
+    env = {**os.environ, "PRELOAD_MODELS": '["text"]', "WARMUP_MODELS": "true", "WEB_CONCURRENCY": str(args.workers)}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "main:app", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}"],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    report = {"workers": args.workers, "precision": args.precision, "ready": False, "ok": 0, "failed": 0}
+    try:
+        report["ready"] = _wait_ready(base_url, server, args.timeout)
+        if report["ready"]:
+            def generate(i):
+                try:
+                    status, body = _request(
+                        f"{base_url}/text/generate",
+                        {"prompt": f"Un perro en el parque {i}", "max_tokens": 50},
+                        timeout=args.timeout
+                    )
+                    if status != 200:
+                        print(f"Request {i} returned {status}", file=sys.stderr)
+                    return status == 200 and bool(body["text"])
+                except OSError as e:
+                    print(f"Request {i} failed: {e}", file=sys.stderr)
+                    return False
+
+            # Más peticiones concurrentes que workers para que todos atiendan alguna
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.workers * 2) as pool:
+                results = list(pool.map(generate, range(args.requests)))
+            report["seconds"] = round(time.perf_counter() - start, 3)
+            report["ok"] = sum(results)
+            report["failed"] = len(results) - report["ok"]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            log, _ = server.communicate(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            log, _ = server.communicate()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report["booted_workers"] = log.count("Booting worker")
+    report["worker_timeouts"] = log.count("WORKER TIMEOUT")
+    passed = report["ready"] and report["failed"] == 0 and report["ok"] == args.requests and not report["worker_timeouts"]
+    if not passed:
+        print(log[-4000:], file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark of the text model precision modes.
+
+Loads the text model once per precision mode, each in a fresh subprocess so
+resident memory is measured in isolation, generates a fixed number of tokens
+and reports tokens/sec and memory as JSON.
+
+Usage:
+    python -m benchmarks.text_precision --modes fp32 bf16 int8 --new-tokens 64 --runs 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks._rss import current_rss_mb, peak_rss_mb
+
+PROMPT = "Escribe una historia corta sobre un perro que aprende a nadar."
+
+
+def run_worker(mode: str, new_tokens: int, runs: int) -> dict:
+    """Measure one precision mode inside the current process."""
+    os.environ["TEXT_MODEL_PRECISION"] = mode
+    os.environ["TEXT_BATCHING_ENABLED"] = "false"
+
+    import torch
+    from backend.models.text_model import TextGenerationModel
+    from backend.config.settings import settings
+
+    model = TextGenerationModel(settings.text_model_checkpoint)
+    start = time.perf_counter()
+    model.load_model()
+    load_seconds = time.perf_counter() - start
+    if model.model is None:
+        return {"mode": mode, "error": "model could not be loaded"}
+
+    inputs = model.tokenizer([model._build_chat_text(PROMPT)], return_tensors="pt").to(model.device)
+
+    def generate():
+        with torch.inference_mode():
+            # min_new_tokens fija la cantidad de tokens para que las medidas sean comparables
+            model.model.generate(
+                **inputs,
+                max_new_tokens=new_tokens,
+                min_new_tokens=new_tokens,
+                do_sample=False,
+                pad_token_id=model.tokenizer.pad_token_id
+            )
+
+    generate()  # calentamiento
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        generate()
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    return {
+        "mode": mode,
+        "resolved_precision": model.precision,
+        "device": model.device,
+        "load_seconds": round(load_seconds, 2),
+        "new_tokens": new_tokens,
+        "tokens_per_second": round(new_tokens / best, 2),
+        "seconds_per_run": [round(t, 3) for t in timings],
+        "rss_mb": round(current_rss_mb(), 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text model precision modes")
+    parser.add_argument("--modes", nargs="+", default=["fp32", "bf16", "int8"],
+                        choices=["auto", "fp32", "bf16", "fp16", "int8"])
+    parser.add_argument("--new-tokens", type=int, default=64)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.new_tokens, args.runs)))
+        return
+
+    results = []
+    for mode in args.modes:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.text_precision", "--worker", mode,
+             "--new-tokens", str(args.new_tokens), "--runs", str(args.runs)],
+            capture_output=True, text=True
+        )
+        # La última línea de la salida del proceso hijo es el resultado JSON
+        lines = proc.stdout.strip().splitlines()
+        try:
+            results.append(json.loads(lines[-1]))
+        except (IndexError, ValueError):
+            results.append({"mode": mode, "error": proc.stderr.strip()[-500:]})
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
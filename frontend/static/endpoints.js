@@ -18,6 +18,35 @@ btnPictogram.addEventListener('click', () => generatePictogram());
 btnAudio.addEventListener('click', () => generateVoice());
 btnText.addEventListener('click', () => generateStory());
 
+// Lee una respuesta text/event-stream y llama a onEvent(evento, datos) por cada evento recibido
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let separator;
+        while ((separator = buffer.indexOf("\n\n")) !== -1) {
+            const rawEvent = buffer.slice(0, separator);
+            buffer = buffer.slice(separator + 2);
+
+            let eventName = "message";
+            const dataLines = [];
+            rawEvent.split("\n").forEach(line => {
+                if (line.startsWith("event:")) eventName = line.slice(6).trim();
+                else if (line.startsWith("data:")) dataLines.push(line.slice(5).trim());
+            });
+            if (dataLines.length > 0) {
+                onEvent(eventName, JSON.parse(dataLines.join("\n")));
+            }
+        }
+    }
+}
+
 async function generateStory() {
     const prompt = document.querySelector(".main-card-textarea").value;
     const formValues = getFormValues();
@@ -27,8 +56,10 @@ async function generateStory() {
         ...formValues
     };
 
+    const output = document.getElementById("output");
+
     try {
-        const response = await fetch("http://127.0.0.1:8000/text/generate", {
+        const response = await fetch("http://127.0.0.1:8000/text/stream", {
             method: "POST",
             headers: {
                 "Content-Type": "application/json"
@@ -40,11 +71,18 @@ async function generateStory() {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
 
-        const data = await response.json();
-        document.getElementById("output").textContent = data.text;
+        // Mostrar la historia a medida que llegan las frases
+        output.textContent = "";
+        await readEventStream(response, (eventName, data) => {
+            if (eventName === "message") {
+                output.textContent += data.text;
+            } else if (eventName === "error") {
+                throw new Error(data.detail);
+            }
+        });
     } catch (error) {
         console.error("Error:", error);
-        document.getElementById("output").textContent = `Error al generar la historia: ${error.message}`;
+        output.textContent = `Error al generar la historia: ${error.message}`;
     }
 }
 
@@ -71,7 +109,13 @@ async function generateVoice() {
         }
 
         const data = await response.json();
-        document.getElementById("output").textContent = data.audio_path;
+        // Reproducir el audio servido por la API (formato comprimido, admite saltos con Range)
+        const output = document.getElementById("output");
+        output.innerHTML = "";
+        const audio = document.createElement("audio");
+        audio.controls = true;
+        audio.src = "http://127.0.0.1:8000" + data.audio_url;
+        output.appendChild(audio);
     } catch (error) {
         console.error("Error:", error);
         document.getElementById("output").textContent = `Error al generar la voz: ${error.message}`;
@@ -88,7 +132,7 @@ async function generatePictogram() {
     };
 
     try {
-        const response = await fetch("http://127.0.0.1:8000/pictogram/from_prompt", {
+        const response = await fetch("http://127.0.0.1:8000/pictogram/from_prompt?image_mode=url", {
             method: "POST",
             headers: {
                 "Content-Type": "application/json"
@@ -127,7 +171,8 @@ async function generatePictogram() {
                 pictogramCard.style.cssText = "text-align: center; padding: 0.5rem; border: 1px solid #ddd; border-radius: 8px;";
                 
                 const img = document.createElement("img");
-                img.src = item.image;
+                // En modo url la imagen se descarga aparte y el navegador la guarda en caché
+                img.src = item.image_url ? `http://127.0.0.1:8000${item.image_url}` : item.image;
                 img.alt = item.alt || item.label;
                 img.style.cssText = "width: 100%; height: auto; border-radius: 4px;";
                 
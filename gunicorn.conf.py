@@ -0,0 +1,66 @@
+"""
+Prefork deployment: several uvicorn workers sharing one copy of the model weights.
+
+The master process imports the app and loads the CPU weights *before* forking the
+workers, so every worker maps the same physical pages (copy-on-write) instead of
+loading its own copy. Usage (requires the `prefork` extra):
+
+    gunicorn main:app -c gunicorn.conf.py
+
+GPU weights cannot be shared across processes: when CUDA is available the master
+does not touch the models and each worker loads them on the GPU at startup.
+"""
+import gc
+import multiprocessing
+import os
+
+# Comprobar CUDA con NVML: no inicializa el driver en el maestro, que rompería CUDA en los hijos
+os.environ.setdefault("PYTORCH_NVML_BASED_CUDA_CHECK", "1")
+# En producción los modelos se precargan y calientan antes de recibir tráfico (en desarrollo van perezosos)
+os.environ.setdefault("PRELOAD_MODELS", '["text","voice"]')
+os.environ.setdefault("WARMUP_MODELS", "true")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Importar la app (y cargar los pesos) en el maestro antes del fork
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+
+
+def on_starting(server):
+    from backend.config.settings import settings
+    from backend.models.model_registry import model_registry
+
+    if not settings.preload_models:
+        return
+
+    import torch
+    if torch.cuda.is_available():
+        server.log.info("CUDA available: each worker loads its own copy of the models on the GPU")
+        return
+
+    # Un solo hilo en el maestro: un pool de OpenMP creado antes del fork deja a los hijos bloqueados
+    # en su primera operación paralela. Cargar los pesos (conversión de tipos, cuantización) ya usa
+    # ese pool, así que se limita antes de cargar; post_fork fija los hilos de cada worker.
+    torch.set_num_threads(1)
+    worker_threads = settings.torch_num_threads
+    settings.torch_num_threads = 0
+    try:
+        # Sin calentamiento: cada worker calienta su copia compartida en el lifespan
+        model_registry.preload(settings.preload_models, warmup=False)
+    finally:
+        settings.torch_num_threads = worker_threads
+    # Los objetos ya cargados no se recorren en el GC de los hijos, así sus páginas siguen compartidas
+    gc.freeze()
+    server.log.info(f"Models loaded in the master process: {model_registry.status()}")
+
+
+def post_fork(server, worker):
+    from backend.config.settings import settings
+
+    import torch
+    # Repartir los núcleos entre los workers en lugar de que cada uno use todos
+    threads = settings.torch_num_threads or max(1, multiprocessing.cpu_count() // workers)
+    torch.set_num_threads(threads)
@@ -1,16 +1,41 @@
+import threading
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from backend.controllers import text_router, voice_router, pictogram_router
+from backend.controllers import text_router, voice_router, pictogram_router, job_router, health_router, story_router, metrics_router
 from backend.config import settings
+from backend.models.model_registry import model_registry
+from backend.services.inference_executor import inference_executor
+from backend.services.job_manager import job_manager
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_manager.start()
+    if settings.preload_models:
+        # Registrar antes de arrancar el hilo: /health/ready no debe dar 200 con los modelos sin cargar
+        model_registry.expect(settings.preload_models)
+        # Carga en segundo plano: el puerto queda abierto y /health/ready responde 503 mientras tanto
+        threading.Thread(
+            target=model_registry.preload,
+            args=(settings.preload_models, settings.warmup_models),
+            name="model-preload",
+            daemon=True
+        ).start()
+    yield
+    await job_manager.stop()
+    inference_executor.shutdown(wait=False)
 
 
 app = FastAPI(
     title=settings.app_name,
     description="API para generacion de contenido adaptado a ninos con autismo usando 3 IAs locales",
-    version=settings.app_version
+    version=settings.app_version,
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -24,6 +49,10 @@ app.add_middleware(
 app.include_router(text_router)
 app.include_router(voice_router)
 app.include_router(pictogram_router)
+app.include_router(job_router)
+app.include_router(health_router)
+app.include_router(story_router)
+app.include_router(metrics_router)
 
 app.mount("/frontend/static", StaticFiles(directory="frontend/static"), name="static")
 
@@ -39,7 +68,11 @@ async def root():
         "endpoints": {
             "text": "/text/generate",
             "voice": "/voice/generate",
-            "pictogram": "/pictogram/generate"
+            "pictogram": "/pictogram/generate",
+            "story": "/story/bundle",
+            "jobs": "/jobs/{job_id}",
+            "health": "/health/ready",
+            "metrics": "/metrics"
         }
     }
 
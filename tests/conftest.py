@@ -0,0 +1,43 @@
+"""
+Shared fixtures. The endpoint tests run the app in-process with the offline stand-ins of
+`benchmarks/endpoint_benchmark.py`: a tiny Qwen2 model, a stub TTS engine and a stub ARASAAC API.
+"""
+import shutil
+import tempfile
+
+import pytest
+
+from benchmarks.endpoint_benchmark import configure_environment, load_app, register_stub_voice, start_stub_arasaac
+
+_workdir = None
+_arasaac = None
+
+
+def pytest_configure(config):
+    # La configuración se lee al importar backend, y los módulos de test lo importan al recogerlos
+    global _workdir, _arasaac
+    _workdir = tempfile.mkdtemp(prefix="cuentista-tests-")
+    _arasaac = start_stub_arasaac(latency_ms=0)
+    configure_environment(_workdir, f"http://127.0.0.1:{_arasaac.server_address[1]}/api/")
+    # Antes de que un módulo de test importe backend.services y cree el servicio de voz compartido
+    register_stub_voice()
+
+
+def pytest_unconfigure(config):
+    if _arasaac is not None:
+        _arasaac.shutdown()
+    if _workdir is not None:
+        shutil.rmtree(_workdir, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient over the app with the stub models loaded; the lifespan (job workers) runs once per session."""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    pytest.importorskip("tokenizers")
+    from fastapi.testclient import TestClient
+
+    app, _ = load_app(warmup=False)
+    with TestClient(app) as test_client:
+        yield test_client
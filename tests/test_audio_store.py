@@ -0,0 +1,132 @@
+"""
+Tests for AudioArtifactStore: one synthesis per key, transcoded variants and the
+retention that keeps the audio directory within its disk quota.
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from backend.services.audio_store import ORPHAN_MIN_AGE_SECONDS, AudioArtifactStore
+
+
+def _writer(calls, size=100, release=None):
+    def create(path):
+        calls.append(path)
+        if release is not None:
+            release.wait(5)
+        with open(path, "wb") as f:
+            f.write(b"\0" * size)
+        return {"duration": 1.0, "sample_rate": 24000, "voice": "ana.wav"}
+    return create
+
+
+def _transcode(source, target):
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        dst.write(src.read()[:10])
+
+
+def _touch(store, key, last_access):
+    # Fijar el último acceso sin esperar de verdad
+    with store._lock:
+        store._load_index()[key]["last_access"] = last_access
+        store._save_index()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AudioArtifactStore(str(tmp_path / "audio"))
+
+
+def test_existing_artifact_is_not_synthesized_again(store):
+    calls = []
+    key = AudioArtifactStore.key_for(text="Hola", voice="ana.wav")
+
+    first = store.get_or_create(key, _writer(calls))
+    second = store.get_or_create(key, _writer(calls))
+
+    assert len(calls) == 1
+    assert first["path"] == second["path"] == store.path_for(key)
+    assert second["size"] == 100
+    # Otra instancia sobre el mismo directorio (otro worker) lee el índice guardado
+    assert AudioArtifactStore(store.root).get(key)["duration"] == 1.0
+
+
+def test_concurrent_requests_share_one_synthesis(store):
+    calls = []
+    release = threading.Event()
+    key = AudioArtifactStore.key_for(text="Hola")
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(store.get_or_create(key, _writer(calls, release=release))))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert [result["path"] for result in results] == [store.path_for(key)] * 3
+
+
+def test_variant_is_created_once_and_missing_artifacts_have_none(store):
+    key = AudioArtifactStore.key_for(text="Hola")
+    store.get_or_create(key, _writer([]))
+    transcodes = []
+
+    def transcode(source, target):
+        transcodes.append(target)
+        _transcode(source, target)
+
+    assert store.get_variant(key, "flac", transcode) == store.path_for(key, "flac")
+    assert store.get_variant(key, "flac", transcode) == store.path_for(key, "flac")
+    assert len(transcodes) == 1
+    assert store.get_variant(AudioArtifactStore.key_for(text="Otro"), "flac", transcode) is None
+
+
+def test_retention_removes_least_recently_used_artifacts_with_their_variants(store):
+    now = time.time()
+    keys = [AudioArtifactStore.key_for(text=f"cuento {i}") for i in range(3)]
+    for key in keys:
+        store.get_or_create(key, _writer([]))
+    # get_variant también cuenta como acceso: se fijan los accesos después
+    store.get_variant(keys[0], "flac", _transcode)
+    for i, key in enumerate(keys):
+        _touch(store, key, now - 100 + i)
+
+    # 3 x 100 bytes + 10 de la variante; caben 200
+    removed = store.enforce_retention(max_bytes=200)
+
+    assert removed == 2
+    assert store.get(keys[0]) is None
+    assert not os.path.exists(store.path_for(keys[0], "flac"))
+    assert store.get(keys[1]) is not None and store.get(keys[2]) is not None
+
+
+def test_retention_removes_expired_artifacts_and_old_orphans(store):
+    now = time.time()
+    old, recent = AudioArtifactStore.key_for(text="viejo"), AudioArtifactStore.key_for(text="nuevo")
+    store.get_or_create(old, _writer([]))
+    store.get_or_create(recent, _writer([]))
+    _touch(store, old, now - 7200)
+
+    orphan = os.path.join(store.root, "story_20251107_235333.wav")
+    fresh_orphan = os.path.join(store.root, f"{'a' * 64}.123.456.partial.wav")
+    for path in (orphan, fresh_orphan):
+        with open(path, "wb") as f:
+            f.write(b"\0")
+    stale = now - ORPHAN_MIN_AGE_SECONDS - 1
+    os.utime(orphan, (stale, stale))
+
+    removed = store.enforce_retention(max_bytes=10 ** 9, max_age_seconds=3600)
+
+    assert removed == 2
+    assert store.get(old) is None
+    assert store.get(recent) is not None
+    assert not os.path.exists(orphan)
+    # Puede ser una síntesis en curso de otro proceso
+    assert os.path.exists(fresh_orphan)
@@ -0,0 +1,152 @@
+"""
+Tests for the byte caches: DiskCache persistence and eviction, TieredCache freshness
+(TTL, stale-while-revalidate), plain lookups and single-flight fetches.
+"""
+import os
+import threading
+import time
+
+from backend.cache.disk_cache import DiskCache
+from backend.cache.memory_cache import LRUCache
+from backend.cache.tiered_cache import TieredCache
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_disk_cache_survives_a_new_instance(tmp_path):
+    DiskCache(str(tmp_path)).set("k", b"value")
+
+    cache = DiskCache(str(tmp_path))
+
+    assert cache.get("k") == b"value"
+    assert cache.total_bytes == len(b"value")
+    assert cache.get("missing") is None
+
+
+def test_disk_cache_entry_age_comes_from_the_file(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.set("k", b"value")
+    stored_at = time.time() - 3600
+    os.utime(cache.path_for("k"), (stored_at, stored_at))
+
+    value, entry_stored_at = cache.get_entry("k")
+
+    assert value == b"value"
+    assert entry_stored_at == stored_at
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=30)
+    cache.set("a", b"a" * 10)
+    cache.set("b", b"b" * 10)
+    cache.set("c", b"c" * 10)
+    # Leer "a" la convierte en la más reciente: la siguiente escritura expulsa "b"
+    time.sleep(0.01)
+    assert cache.get("a") is not None
+
+    cache.set("d", b"d" * 10)
+
+    assert cache.get("b") is None
+    assert not os.path.exists(cache.path_for("b"))
+    assert [cache.get(key) is not None for key in ("a", "c", "d")] == [True, True, True]
+    assert cache.total_bytes == 30
+
+    # Un valor mayor que el presupuesto entero no se guarda
+    cache.set("huge", b"x" * 31)
+    assert cache.get("huge") is None
+
+
+def test_fresh_entries_are_served_without_fetching():
+    cache = TieredCache(LRUCache(max_entries=4), ttl=60, stale_ttl=60)
+    cache.set("k", b"v1")
+
+    assert cache.get_or_fetch("k", lambda: b"v2") == b"v1"
+    assert (cache.hits, cache.stale_hits, cache.misses) == (1, 0, 0)
+
+
+def test_stale_entry_is_served_while_it_is_refreshed():
+    cache = TieredCache(LRUCache(max_entries=4), ttl=60, stale_ttl=60)
+    cache.memory.set("k", b"old", stored_at=time.time() - 90)
+
+    assert cache.get_or_fetch("k", lambda: b"new") == b"old"
+    assert cache.stale_hits == 1
+    assert _wait_until(lambda: cache.get("k") == b"new")
+
+
+def test_expired_entry_is_fetched_synchronously():
+    cache = TieredCache(LRUCache(max_entries=4), ttl=60, stale_ttl=60)
+    cache.memory.set("k", b"old", stored_at=time.time() - 121)
+
+    assert cache.get("k") is None
+    assert cache.get_or_fetch("k", lambda: b"new") == b"new"
+    assert cache.misses == 2
+
+
+def test_disk_level_is_promoted_with_its_original_age(tmp_path):
+    disk = DiskCache(str(tmp_path))
+    disk.set("k", b"value")
+    stored_at = time.time() - 90
+    os.utime(disk.path_for("k"), (stored_at, stored_at))
+    cache = TieredCache(LRUCache(max_entries=4), disk=disk, ttl=60, stale_ttl=60)
+
+    assert cache.get("k") == b"value"
+    assert cache.stale_hits == 1
+    assert cache.memory.get_entry("k") == (b"value", stored_at)
+
+
+def test_get_does_not_fetch_and_counts_misses():
+    cache = TieredCache(LRUCache(max_entries=4))
+
+    assert cache.get("a") is None
+    assert cache.get("a", count_miss=False) is None
+    assert cache.misses == 1
+    assert "a" not in cache
+
+    cache.set("a", b"1")
+
+    assert cache.get("a") == b"1"
+    assert cache.hits == 1
+    assert "a" in cache
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = TieredCache(LRUCache(max_entries=4))
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(threading.current_thread().name)
+        release.wait(5)
+        return b"story"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_fetch("k", fetch)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    # Dar tiempo a que todos los hilos lleguen a la clave en vuelo antes de liberar la carga
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [b"story"] * 4
+    assert len(calls) == 1
+    assert cache.get_or_fetch("k", fetch) == b"story"
+    assert len(calls) == 1
+
+
+def test_failed_fetch_is_not_cached_and_is_retried():
+    cache = TieredCache(LRUCache(max_entries=4))
+    values = iter([None, b"ok"])
+
+    assert cache.get_or_fetch("k", lambda: next(values)) is None
+    assert cache.get_or_fetch("k", lambda: next(values)) == b"ok"
+    assert cache.get("k") == b"ok"
@@ -0,0 +1,336 @@
+"""
+End-to-end tests of the HTTP endpoints with the offline stub models (see conftest.py):
+status codes and response shapes, not the quality of the generated content.
+"""
+import base64
+import json
+import struct
+import time
+
+import pytest
+
+STORY_TEXT = (
+    "El niño juega en el parque con su perro. La niña come una manzana roja. "
+    "El gato duerme junto a la ventana."
+)
+
+
+def _assert_pictogram_data(data, image_mode="base64"):
+    assert isinstance(data["paragraph"], str)
+    assert isinstance(data["items"], list) and data["items"]
+    for position, item in enumerate(data["items"], start=1):
+        assert item["id"] == position
+        assert item["sentence"]
+        assert isinstance(item["concept"], str)
+        assert item["image_key"].startswith(("arasaac-", "fallback-"))
+        if image_mode == "url":
+            assert item["image"] == ""
+            assert item["image_url"].startswith("/pictogram/image/")
+        else:
+            assert item["image"].startswith("data:image/png;base64,")
+
+
+def _assert_voice_response(data):
+    assert data["audio_path"]
+    assert data["voice_used"]
+    assert data["duration"] > 0
+    assert data["audio_url"].startswith("/voice/audio/")
+
+
+def _wait_for_job(client, status_url, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get(status_url)
+        assert response.status_code == 200
+        status = response.json()
+        if status["status"] in ("completed", "failed") or time.monotonic() > deadline:
+            return status
+        time.sleep(0.05)
+
+
+def test_text_generate(client):
+    response = client.post("/text/generate", json={"prompt": "Un perro en el parque", "max_tokens": 50})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert isinstance(body["text"], str) and body["text"]
+    assert body["metadata"]["tone"] == "calmo"
+
+
+def _sse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+def test_text_stream(client):
+    response = client.post("/text/stream", json={"prompt": "Un perro en el parque", "max_tokens": 50})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(response.text)
+    chunks = [data["text"] for event, data in events if event == "message"]
+    assert chunks and "".join(chunks).strip()
+    assert events[-1] == ("done", {"metadata": {"tone": "calmo", "complexity": "simple", "story_type": "cotidiana"}})
+
+
+def test_deterministic_story_is_served_from_cache(client, monkeypatch):
+    from backend.services.inference_executor import inference_executor
+    from backend.services.text_service import text_service
+
+    payload = {"prompt": "Un pez en el río", "max_tokens": 50, "deterministic": True}
+    story = "El pez nada despacio. Fin."
+    key = text_service._story_cache_key(
+        payload["prompt"], 50, "calmo", "simple", True, "cotidiana", "Protagonist"
+    )
+    text_service.story_cache.set(key, story.encode("utf-8"))
+
+    # Un acierto de la caché no pasa por el pool del LLM, ni en /generate ni en /stream
+    def no_llm(*args, **kwargs):
+        raise AssertionError("cache hit dispatched to the llm pool")
+
+    monkeypatch.setattr(inference_executor, "run_llm", no_llm)
+    monkeypatch.setattr(inference_executor, "stream", no_llm)
+
+    response = client.post("/text/generate", json=payload)
+    assert response.status_code == 200
+    assert response.json()["text"] == story
+
+    stream = client.post("/text/stream", json=payload)
+    assert stream.status_code == 200
+    assert stream.text.startswith(f'data: {{"text": "{story}"}}')
+    assert "event: done" in stream.text
+
+
+def test_text_generate_rejects_invalid_request(client):
+    response = client.post("/text/generate", json={"prompt": "Un perro", "max_tokens": 5})
+
+    assert response.status_code == 422
+
+
+def test_voice_generate_and_download(client):
+    response = client.post("/voice/generate", json={"text": "Había una vez un gato. Jugaba en el parque."})
+
+    assert response.status_code == 200
+    body = response.json()
+    _assert_voice_response(body)
+
+    # audio_url usa el formato de entrega configurado; ?format=wav devuelve el original
+    audio = client.get(body["audio_url"])
+    assert audio.status_code == 200
+    assert audio.headers["content-type"].startswith("audio/")
+    assert audio.content
+
+    wav = client.get(body["audio_url"].split("?")[0], params={"format": "wav"})
+    assert wav.status_code == 200
+    assert wav.content[:4] == b"RIFF"
+
+
+def test_voice_audio_ranges_and_validators(client):
+    body = client.post("/voice/generate", json={"text": "El perro corre por la playa."}).json()
+    url = body["audio_url"].split("?")[0]
+    full = client.get(url, params={"format": "wav"})
+    etag = full.headers["etag"]
+    size = len(full.content)
+
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.headers["content-length"] == str(size)
+    assert "immutable" not in full.headers["cache-control"]
+
+    partial = client.get(url, params={"format": "wav"}, headers={"Range": "bytes=4-11"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 4-11/{size}"
+    assert partial.content == full.content[4:12]
+
+    suffix = client.get(url, params={"format": "wav"}, headers={"Range": "bytes=-10"})
+    assert suffix.status_code == 206
+    assert suffix.content == full.content[-10:]
+
+    unsatisfiable = client.get(url, params={"format": "wav"}, headers={"Range": f"bytes={size}-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{size}"
+
+    not_modified = client.get(url, params={"format": "wav"}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    # If-Range con otra versión: se ignora el rango y se envía el archivo completo
+    stale = client.get(url, params={"format": "wav"}, headers={"Range": "bytes=0-3", "If-Range": '"other"'})
+    assert stale.status_code == 200
+    assert stale.content == full.content
+    current = client.get(url, params={"format": "wav"}, headers={"Range": "bytes=0-3", "If-Range": etag})
+    assert current.status_code == 206
+    assert current.content == b"RIFF"
+
+
+def test_voice_audio_etag_changes_when_the_file_is_regenerated(client):
+    from backend.services.audio_store import audio_store
+
+    body = client.post("/voice/generate", json={"text": "La tortuga camina despacio."}).json()
+    url = body["audio_url"].split("?")[0]
+    first = client.get(url, params={"format": "wav"})
+
+    # Misma id, otro archivo (p. ej. borrado por la retención y sintetizado de nuevo)
+    path = audio_store.path_for(url.rsplit("/", 1)[1])
+    with open(path, "ab") as f:
+        f.write(b"\0\0")
+    second = client.get(url, params={"format": "wav"}, headers={"If-None-Match": first.headers["etag"]})
+
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    assert len(second.content) == len(first.content) + 2
+
+
+def test_voice_stream(client):
+    response = client.post("/voice/stream", json={"text": "Había una vez un gato. Jugaba en el parque."})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/wav"
+    assert response.headers["x-voice-used"].endswith(".wav")
+    audio = response.content
+    assert audio[:4] == b"RIFF" and audio[8:16] == b"WAVEfmt "
+    audio_format, channels, _, _, _, bits = struct.unpack("<HHIIHH", audio[20:36])
+    assert (audio_format, channels, bits) == (1, 1, 16)
+    # Cabecera de 44 bytes y después muestras de 16 bits
+    assert len(audio) > 44 and (len(audio) - 44) % 2 == 0
+
+
+def test_pictogram_generate(client):
+    response = client.post("/pictogram/generate", json={"text": STORY_TEXT})
+
+    assert response.status_code == 200
+    data = response.json()["pictogram_data"]
+    _assert_pictogram_data(data)
+    assert data["paragraph"] == STORY_TEXT
+    png = base64.b64decode(data["items"][0]["image"].split(",", 1)[1])
+    assert png.startswith(b"\x89PNG")
+
+
+def test_pictogram_image_urls_are_served(client):
+    response = client.post("/pictogram/generate", params={"image_mode": "url"}, json={"text": STORY_TEXT})
+
+    assert response.status_code == 200
+    data = response.json()["pictogram_data"]
+    _assert_pictogram_data(data, image_mode="url")
+
+    image = client.get(data["items"][0]["image_url"])
+    assert image.status_code == 200
+    assert image.headers["content-type"] == "image/png"
+    assert image.content.startswith(b"\x89PNG")
+
+
+def test_pictogram_image_rejects_unknown_ids(client):
+    response = client.get("/pictogram/image/arasaac-987654321")
+
+    assert response.status_code == 404
+
+
+def test_pictogram_from_prompt(client):
+    response = client.post("/pictogram/from_prompt", json={"prompt": "Una niña en la playa", "max_tokens": 50})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert isinstance(body["story"], str) and body["story"]
+    assert body["pictograms"]["paragraph"] == body["story"]
+    assert isinstance(body["pictograms"]["items"], list)
+
+
+def test_pictogram_from_prompt_stream(client):
+    response = client.post(
+        "/pictogram/from_prompt/stream", params={"image_mode": "url"}, json={"prompt": "Una niña en la playa", "max_tokens": 50}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[-1]["type"] == "done"
+    text = "".join(event["text"] for event in events if event["type"] == "text")
+    assert text.strip() == events[-1]["story"]
+    items = [event["item"] for event in events if event["type"] == "pictogram"]
+    assert items and [item["id"] for item in items] == list(range(1, len(items) + 1))
+    assert all(item["image_url"].startswith("/pictogram/image/") for item in items)
+
+
+def test_story_bundle(client):
+    response = client.post("/story/bundle", json={"prompt": "Un gato en casa", "max_tokens": 50})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert isinstance(body["story"], str) and body["story"]
+    assert body["pictograms"]["paragraph"] == body["story"]
+    assert isinstance(body["pictograms"]["items"], list)
+    _assert_voice_response(body["audio"])
+    assert isinstance(body["metadata"], dict)
+
+
+@pytest.mark.parametrize("path, payload, result_keys", [
+    ("/jobs/text", {"prompt": "Un perro en el parque", "max_tokens": 50}, {"text", "metadata"}),
+    ("/jobs/voice", {"text": "Había una vez un gato."}, {"audio_path", "duration", "voice_used", "audio_url"}),
+    ("/jobs/pictogram", {"text": STORY_TEXT}, {"pictogram_data"}),
+    ("/jobs/pictogram/from_prompt", {"prompt": "Una niña en la playa", "max_tokens": 50}, {"story", "pictograms"}),
+])
+def test_jobs_run_to_completion(client, path, payload, result_keys):
+    response = client.post(path, params={"priority": "bulk"}, json=payload)
+
+    assert response.status_code == 202
+    submission = response.json()
+    assert submission["status"] == "queued"
+    assert submission["status_url"] == f"/jobs/{submission['job_id']}"
+    assert submission["result_url"] == f"/jobs/{submission['job_id']}/result"
+
+    status = _wait_for_job(client, submission["status_url"])
+    assert status["status"] == "completed", status.get("error")
+    assert status["priority"] == "bulk"
+    assert status["progress"] == 1.0
+    assert status["finished_at"] >= status["started_at"] >= status["created_at"]
+
+    result = client.get(submission["result_url"])
+    assert result.status_code == 200
+    assert result_keys <= set(result.json())
+
+
+def test_health_probes(client):
+    live = client.get("/health/live")
+    ready = client.get("/health/ready")
+
+    assert live.status_code == 200 and live.json() == {"status": "alive"}
+    assert ready.status_code == 200
+    body = ready.json()
+    assert body["status"] == "ready"
+    assert set(body["models"]["text"].values()) == {"ready"}
+    assert set(body["models"]["voice"].values()) == {"ready"}
+
+
+def test_unknown_job_is_not_found(client):
+    assert client.get("/jobs/does-not-exist").status_code == 404
+    assert client.get("/jobs/does-not-exist/result").status_code == 404
+
+
+def test_metrics(client):
+    client.post("/text/generate", json={"prompt": "Un perro en el parque", "max_tokens": 50})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    for name in (
+        "cuentista_stage_duration_seconds",
+        "cuentista_tokens_generated_total",
+        "cuentista_cache_requests_total",
+        "cuentista_job_queue_depth",
+        "cuentista_model_state",
+    ):
+        assert f"# TYPE {name} " in body
+    assert 'cuentista_stage_duration_seconds_count{stage="decode"}' in body
+
+
+def test_controllers_share_one_voice_service(client):
+    from backend.controllers import job_controller, story_controller, voice_controller
+    from backend.services import voice_service
+
+    assert job_controller.voice_service is voice_service
+    assert story_controller.voice_service is voice_service
+    assert voice_controller.voice_service is voice_service
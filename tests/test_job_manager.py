@@ -0,0 +1,135 @@
+"""
+Tests for JobManager scheduling: interactive jobs run before queued bulk jobs, and
+the bulk in-flight cap keeps a worker free for interactive traffic.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.services.job_manager import JobManager, JobQueueFullError
+
+
+class _BlockingHandler:
+    """Job handler that records start order and blocks until its job is released."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = []
+        self.running_bulk = 0
+        self.max_running_bulk = 0
+        self.releases = {}
+
+    def release(self, name):
+        self._event(name).set()
+
+    def _event(self, name):
+        with self.lock:
+            return self.releases.setdefault(name, threading.Event())
+
+    def __call__(self, payload, progress):
+        name, bulk = payload["name"], payload["priority"] == "bulk"
+        with self.lock:
+            self.started.append(name)
+            if bulk:
+                self.running_bulk += 1
+                self.max_running_bulk = max(self.max_running_bulk, self.running_bulk)
+        if not payload.get("instant"):
+            self._event(name).wait(5)
+        progress(0.5)
+        if bulk:
+            with self.lock:
+                self.running_bulk -= 1
+        return {"name": name}
+
+
+async def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+def _submit(manager, name, priority, **payload):
+    return manager.submit("work", {"name": name, "priority": priority, **payload}, priority=priority)
+
+
+def test_interactive_jobs_run_before_queued_bulk_jobs():
+    async def scenario():
+        handler = _BlockingHandler()
+        manager = JobManager(num_workers=1)
+        manager.register_handler("work", "io", handler)
+        try:
+            first = _submit(manager, "bulk-1", "bulk")
+            await _wait_for(lambda: handler.started == ["bulk-1"])
+            bulk = _submit(manager, "bulk-2", "bulk")
+            interactive = _submit(manager, "interactive-1", "interactive")
+            assert manager.queue_position(interactive) == 0
+            assert manager.queue_position(bulk) == 1
+
+            for name in ("bulk-1", "interactive-1", "bulk-2"):
+                handler.release(name)
+            await _wait_for(lambda: all(job.finished for job in (first, bulk, interactive)))
+
+            assert handler.started == ["bulk-1", "interactive-1", "bulk-2"]
+            assert interactive.status == "completed" and interactive.result == {"name": "interactive-1"}
+            assert interactive.progress == 1.0
+        finally:
+            await manager.stop()
+
+    asyncio.run(scenario())
+
+
+def test_bulk_cap_keeps_a_worker_free_for_interactive_jobs():
+    async def scenario():
+        handler = _BlockingHandler()
+        # El límite pedido (5) se reduce a num_workers - 1
+        manager = JobManager(num_workers=3, bulk_max_in_flight=5)
+        manager.register_handler("work", "io", handler)
+        assert manager.bulk_max_in_flight == 2
+        try:
+            bulks = [_submit(manager, f"bulk-{i}", "bulk") for i in range(5)]
+            await _wait_for(lambda: len(handler.started) == 2)
+            await asyncio.sleep(0.05)
+            assert len(handler.started) == 2
+
+            # Con todos los bulk bloqueados, un interactivo sigue empezando enseguida
+            interactive = _submit(manager, "interactive-1", "interactive", instant=True)
+            await _wait_for(lambda: interactive.finished)
+            assert interactive.status == "completed"
+
+            for i in range(5):
+                handler.release(f"bulk-{i}")
+            await _wait_for(lambda: all(job.finished for job in bulks))
+            assert handler.max_running_bulk == 2
+            assert sorted(name for name in handler.started if name.startswith("bulk")) == [f"bulk-{i}" for i in range(5)]
+        finally:
+            await manager.stop()
+
+    asyncio.run(scenario())
+
+
+def test_submit_validates_kind_priority_and_queue_size():
+    async def scenario():
+        handler = _BlockingHandler()
+        manager = JobManager(num_workers=1, max_queue_size=1)
+        manager.register_handler("work", "io", handler)
+        try:
+            with pytest.raises(ValueError):
+                manager.submit("unknown", {})
+            with pytest.raises(ValueError):
+                _submit(manager, "x", "urgent")
+
+            _submit(manager, "running", "interactive")
+            await _wait_for(lambda: handler.started == ["running"])
+            _submit(manager, "queued", "interactive")
+            with pytest.raises(JobQueueFullError):
+                _submit(manager, "rejected", "interactive")
+            handler.release("running")
+            handler.release("queued")
+        finally:
+            await manager.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,66 @@
+"""
+Tests for the readiness reported by ModelRegistry while models are preloaded.
+"""
+import threading
+from types import SimpleNamespace
+
+from backend.config.settings import settings
+from backend.models.model_registry import ModelRegistry
+from backend.models.voice_model import VoiceGenerationModel
+
+
+class _SlowModel:
+    """Voice model stand-in whose loading blocks until `release` is set."""
+
+    def __init__(self):
+        self.model_name = settings.voice_model_name
+        self.state = "unloaded"
+        self.release = threading.Event()
+
+    def load_model(self):
+        self.state = "loading"
+        self.release.wait(5)
+        self.state = "ready"
+
+    def warmup(self):
+        self.load_model()
+
+
+def test_not_ready_from_expect_until_the_preload_finishes():
+    registry = ModelRegistry()
+    model = _SlowModel()
+    registry.register_voice_model(model)
+    assert registry.is_ready()
+
+    # Lo que hace el lifespan: registrar antes de lanzar el hilo de carga
+    registry.expect(["voice"])
+    assert not registry.is_ready()
+
+    thread = threading.Thread(target=registry.preload, args=(["voice"], False))
+    thread.start()
+    assert not registry.is_ready()
+    model.release.set()
+    thread.join(5)
+
+    assert registry.is_ready()
+    assert registry.status()["voice"] == {settings.voice_model_name: "ready"}
+
+
+def test_failed_voice_warmup_is_not_ready(tmp_path):
+    def broken_tts_to_file(**kwargs):
+        raise RuntimeError("synthesis failed")
+
+    voices = tmp_path / "voices"
+    voices.mkdir()
+    (voices / "ana.wav").write_bytes(b"RIFF")
+    model = VoiceGenerationModel(settings.voice_model_name)
+    model.voices_dir = voices
+    model.tts = SimpleNamespace(synthesizer=None, tts_to_file=broken_tts_to_file)
+    model.state = "ready"
+    registry = ModelRegistry()
+    registry.register_voice_model(model)
+
+    registry.preload(["voice"], warmup=True)
+
+    assert model.state == "failed"
+    assert not registry.is_ready()
@@ -0,0 +1,163 @@
+"""
+Tests for PictogramHttpClient against a local HTTP server: retries with backoff,
+timeouts and keep-alive connection reuse, for both HTTP backends.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend.models import pictogram_client
+from backend.models.pictogram_client import PictogramHttpClient
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 para que el servidor mantenga la conexión abierta entre peticiones
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.client_address))
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+
+        if self.path.startswith("/slow"):
+            # Event.wait y no time.sleep, que los tests sustituyen para medir el backoff
+            server.release.wait(server.slow_seconds)
+            status = 200
+        elif self.path.startswith("/flaky"):
+            status = 503 if hits <= server.failures else 200
+        elif self.path.startswith("/down"):
+            status = 503
+        elif self.path.startswith("/missing"):
+            status = 404
+        else:
+            status = 200
+
+        body = json.dumps({"path": self.path, "hits": hits}).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente ya abandonó la petición por timeout
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.hits = {}
+    server.failures = 2
+    server.slow_seconds = 0.5
+    server.release = threading.Event()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["requests", "httpx"])
+def make_client(request, monkeypatch, stub_server):
+    if request.param == "requests":
+        monkeypatch.setattr(pictogram_client, "httpx", None)
+    elif pictogram_client.httpx is None:
+        pytest.skip("httpx with h2 is not installed")
+
+    clients = []
+
+    def factory(**kwargs):
+        client = PictogramHttpClient(f"http://127.0.0.1:{stub_server.server_address[1]}", **kwargs)
+        clients.append(client)
+        return client
+
+    yield factory
+    for client in clients:
+        client.close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Registrar las esperas del backoff sin dormir de verdad; jitter fijo en 1.0
+    delays = []
+    monkeypatch.setattr(pictogram_client.time, "sleep", delays.append)
+    monkeypatch.setattr(pictogram_client.random, "random", lambda: 0.5)
+    return delays
+
+
+def test_returns_successful_response(make_client, stub_server):
+    client = make_client()
+
+    resp = client.get("ok/1")
+
+    assert resp.status_code == 200
+    assert resp.json() == {"path": "/ok/1", "hits": 1}
+
+
+def test_client_errors_are_returned_without_retrying(make_client, stub_server, sleeps):
+    client = make_client(retries=3)
+
+    resp = client.get("missing")
+
+    assert resp.status_code == 404
+    assert stub_server.hits["/missing"] == 1
+    assert sleeps == []
+
+
+def test_retries_server_errors_with_exponential_backoff(make_client, stub_server, sleeps):
+    stub_server.failures = 2
+    client = make_client(retries=3, backoff=0.1)
+
+    resp = client.get("flaky")
+
+    assert resp.status_code == 200
+    assert stub_server.hits["/flaky"] == 3
+    assert sleeps == pytest.approx([0.1, 0.2])
+
+
+def test_returns_none_after_exhausting_retries(make_client, stub_server, sleeps):
+    client = make_client(retries=3, backoff=0.1)
+
+    assert client.get("down") is None
+    assert stub_server.hits["/down"] == 3
+    # No se espera después del último intento
+    assert sleeps == pytest.approx([0.1, 0.2])
+
+
+def test_timeout_is_retried_then_gives_up(make_client, stub_server, sleeps):
+    stub_server.slow_seconds = 1.0
+    client = make_client(retries=2, backoff=0.1)
+
+    started = time.monotonic()
+    resp = client.get("slow", timeout=0.2)
+    elapsed = time.monotonic() - started
+
+    assert resp is None
+    assert stub_server.hits["/slow"] == 2
+    assert sleeps == pytest.approx([0.1])
+    assert elapsed < 2 * stub_server.slow_seconds
+
+
+def test_reuses_the_connection_between_requests(make_client, stub_server):
+    client = make_client()
+
+    for i in range(5):
+        assert client.get(f"ok/{i}").status_code == 200
+
+    # Mismo puerto de origen en todas las peticiones = una sola conexión TCP
+    ports = {address[1] for _, address in stub_server.requests}
+    assert len(stub_server.requests) == 5
+    assert len(ports) == 1
@@ -0,0 +1,119 @@
+"""
+Tests for the offline pictogram index: building it from a catalog dump, keyword
+ranking (exact matches over variants, pictograms with an image first) and sharing.
+"""
+import json
+
+import pytest
+
+from backend.models.pictogram_index import LocalPictogramIndex, build_index, fold, word_variants
+
+PNG = b"\x89PNG\r\n\x1a\nstub"
+
+
+def _entry(pict_id, *keywords, violence=False, schematic=False):
+    return {
+        "_id": pict_id,
+        "violence": violence,
+        "schematic": schematic,
+        "keywords": [{"keyword": keyword} for keyword in keywords],
+    }
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    images = tmp_path / "png"
+    images.mkdir()
+    # 30 no tiene imagen; 20 tiene dos tamaños y se usa el de nombre más corto
+    for filename in ("10.png", "20_500.png", "20.png", "40_300.png", "50.png", "notes.txt"):
+        (images / filename).write_bytes(PNG)
+    catalog = [
+        _entry(10, "casar"),
+        _entry(20, "Casa", "hogar"),
+        _entry(30, "perro"),
+        _entry(40, "perro"),
+        _entry(50, "jugar al fútbol", violence=True),
+        {"_id": 60, "keywords": []},
+        {"keywords": [{"keyword": "sin id"}]},
+    ]
+    data = build_index(catalog, str(images), str(tmp_path / "index.json"), language="es")
+    return tmp_path, data
+
+
+def test_fold_strips_accents_and_case():
+    assert fold("  Árbol   GRANDE ") == "arbol grande"
+
+
+def test_word_variants_guess_singular_and_infinitive():
+    assert word_variants("perros")[:2] == ["perros", "perro"]
+    assert word_variants("salta") == ["salta", "saltar"]
+    assert word_variants("comen") == ["comen", "comer", "comir"]
+
+
+def test_build_index_writes_keywords_and_images(index_dir):
+    tmp_path, data = index_dir
+
+    assert data["version"] == 1
+    assert set(data["pictograms"]) == {"10", "20", "30", "40", "50"}
+    assert data["pictograms"]["20"]["image"] == "20.png"
+    assert data["pictograms"]["30"]["image"] == ""
+    assert data["pictograms"]["40"]["image"] == "40_300.png"
+    assert data["keywords"]["casa"] == ["20"]
+    # Las expresiones de varias palabras también se indexan por palabra
+    assert data["keywords"]["futbol"] == ["50"]
+    assert json.loads((tmp_path / "index.json").read_text(encoding="utf-8")) == data
+
+
+def test_exact_phrase_match(index_dir):
+    tmp_path, _ = index_dir
+    index = LocalPictogramIndex.load(str(tmp_path / "index.json"))
+
+    results = index.search("es", "jugar al futbol")
+
+    assert results == [{"_id": 50, "violence": True, "schematic": False}]
+
+
+def test_exact_keyword_ranks_above_variant(index_dir):
+    tmp_path, _ = index_dir
+    index = LocalPictogramIndex.load(str(tmp_path / "index.json"))
+
+    # "casar" (10) va antes en el catálogo, pero "casa" (20) es la coincidencia exacta
+    ids = [result["_id"] for result in index.search("es", "casa perro")]
+
+    assert ids.index(20) < ids.index(10)
+
+
+def test_pictograms_with_image_rank_first(index_dir):
+    tmp_path, _ = index_dir
+    index = LocalPictogramIndex.load(str(tmp_path / "index.json"))
+
+    ids = [result["_id"] for result in index.search("es", "perro")]
+
+    assert ids == [40, 30]
+    assert index.read_image(40) == PNG
+    assert index.read_image(30) is None
+
+
+def test_other_language_and_empty_query(index_dir):
+    tmp_path, _ = index_dir
+    index = LocalPictogramIndex.load(str(tmp_path / "index.json"))
+
+    assert index.search("en", "perro") == []
+    assert index.search("es", "  ") == []
+
+
+def test_load_rejects_other_versions(tmp_path):
+    path = tmp_path / "index.json"
+    path.write_text(json.dumps({"version": 99}), encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        LocalPictogramIndex.load(str(path))
+
+
+def test_shared_returns_one_instance_per_path(index_dir):
+    tmp_path, _ = index_dir
+
+    first = LocalPictogramIndex.shared(str(tmp_path / "index.json"))
+    second = LocalPictogramIndex.shared(str(tmp_path / "png" / ".." / "index.json"))
+
+    assert first is second
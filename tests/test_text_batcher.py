@@ -0,0 +1,83 @@
+"""
+Tests for TextBatchScheduler: concurrent prompts share a batch, requests with very
+different token budgets are kept apart, and errors reach every caller.
+"""
+import threading
+import time
+
+import pytest
+
+from backend.models.text_batcher import TextBatchScheduler
+
+
+class _Recorder:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, prompts, budgets, prefixes):
+        self.batches.append(list(zip(prompts, budgets, prefixes)))
+        if self.fail:
+            raise RuntimeError("generate failed")
+        return [f"{prompt}:{budget}" for prompt, budget in zip(prompts, budgets)]
+
+
+def _submit_all(scheduler, requests):
+    results = {}
+
+    def submit(prompt, budget):
+        try:
+            results[prompt] = scheduler.submit(prompt, budget, cache_prefix="instr")
+        except Exception as e:
+            results[prompt] = e
+
+    threads = [threading.Thread(target=submit, args=request) for request in requests]
+    for thread in threads:
+        thread.start()
+        # Orden de llegada estable
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_compatible_requests_share_a_batch():
+    run_batch = _Recorder()
+    scheduler = TextBatchScheduler(run_batch, max_batch_size=4, max_wait_ms=300)
+
+    results = _submit_all(scheduler, [("a", 100), ("b", 150), ("c", 200)])
+
+    assert results == {"a": "a:100", "b": "b:150", "c": "c:200"}
+    assert run_batch.batches == [[("a", 100, "instr"), ("b", 150, "instr"), ("c", 200, "instr")]]
+
+
+def test_budgets_more_than_2x_apart_are_not_mixed():
+    run_batch = _Recorder()
+    scheduler = TextBatchScheduler(run_batch, max_batch_size=4, max_wait_ms=300)
+
+    results = _submit_all(scheduler, [("story", 400), ("keywords", 10), ("story2", 300), ("keywords2", 16)])
+
+    assert results["keywords"] == "keywords:10"
+    assert [[prompt for prompt, _, _ in batch] for batch in run_batch.batches] == [
+        ["story", "story2"],
+        ["keywords", "keywords2"],
+    ]
+
+
+def test_batch_size_is_capped():
+    run_batch = _Recorder()
+    scheduler = TextBatchScheduler(run_batch, max_batch_size=2, max_wait_ms=300)
+
+    _submit_all(scheduler, [("a", 100), ("b", 100), ("c", 100)])
+
+    assert [len(batch) for batch in run_batch.batches] == [2, 1]
+
+
+def test_errors_are_raised_to_every_caller_of_the_batch():
+    scheduler = TextBatchScheduler(_Recorder(fail=True), max_batch_size=4, max_wait_ms=300)
+
+    results = _submit_all(scheduler, [("a", 100), ("b", 100)])
+
+    assert all(isinstance(error, RuntimeError) for error in results.values())
+    with pytest.raises(RuntimeError):
+        scheduler.submit("c", 100)
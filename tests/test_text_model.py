@@ -0,0 +1,70 @@
+"""
+Tests for TextGenerationModel with the tiny offline Qwen2 model: per-request budgets
+inside a batch and reuse of the KV cache of the shared instruction prefix.
+"""
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("tokenizers")
+
+from benchmarks.endpoint_benchmark import build_tiny_model
+from backend.models.text_model import TextGenerationModel
+
+INSTRUCTIONS = "Story type: cotidiana. Usa un tono tranquilo y pausado."
+
+
+@pytest.fixture(scope="module")
+def checkpoint(tmp_path_factory):
+    return build_tiny_model(str(tmp_path_factory.mktemp("tiny-qwen2")))
+
+
+@pytest.fixture
+def model(checkpoint):
+    model = TextGenerationModel(checkpoint)
+    model.load_model()
+    assert model.state == "ready"
+    return model
+
+
+def test_each_prompt_of_a_batch_is_cut_to_its_own_budget(model, monkeypatch):
+    decoded_lengths = []
+    decode = model.tokenizer.decode
+
+    def spy(token_ids, **kwargs):
+        decoded_lengths.append(len(token_ids))
+        return decode(token_ids, **kwargs)
+
+    monkeypatch.setattr(model.tokenizer, "decode", spy)
+
+    # Sin eos forzado el lote decodifica hasta el presupuesto mayor (12)
+    model.model.generation_config.eos_token_id = None
+    responses = model._generate_batch(["Un perro", "Una niña en la playa"], [4, 12], deterministic=True)
+
+    assert len(responses) == 2
+    assert decoded_lengths == [4, 12]
+
+
+def test_prefix_kv_cache_is_reused_and_gives_the_same_output(model, checkpoint):
+    prompts = [f"{INSTRUCTIONS}\n\nUn perro en el parque", f"{INSTRUCTIONS}\n\nUn gato en casa"]
+
+    cached = [model.generate(prompt, max_new_tokens=12, cache_prefix=INSTRUCTIONS, deterministic=True) for prompt in prompts]
+
+    # Un solo prefijo calculado para los dos pedidos
+    assert len(model._prefix_cache) == 1
+    key = next(iter(model._prefix_cache._data))
+    assert key[0].endswith(INSTRUCTIONS)
+
+    uncached_model = TextGenerationModel(checkpoint)
+    uncached_model._prefix_cache = None
+    uncached = [uncached_model.generate(prompt, max_new_tokens=12, deterministic=True) for prompt in prompts]
+    assert cached == uncached
+
+
+def test_prefix_not_in_the_prompt_is_not_cached(model):
+    text = model._build_chat_text("Un perro en el parque")
+    input_ids = model.tokenizer(text, return_tensors="pt").input_ids
+
+    assert model._prefix_past_key_values(text, input_ids, "Otra instrucción") is None
+    assert model._prefix_past_key_values(text, input_ids, None) is None
+    assert len(model._prefix_cache) == 0
@@ -0,0 +1,95 @@
+"""
+Tests for the deterministic story cache of TextGenerationService, with a stub text model:
+repeated requests are served from the cache, fallback stories are never cached.
+"""
+import threading
+import uuid
+
+import pytest
+
+from backend.services.text_service import TextGenerationService
+
+
+class _StubTextModel:
+    model_checkpoint = "stub-text"
+
+    def __init__(self, story="El perro juega en el parque. Fin.", fallback=False):
+        self.story = story
+        self.fallback = fallback
+        self.calls = 0
+
+    def _simple_fallback(self, prompt, max_new_tokens=200):
+        return f"Respaldo: {prompt.splitlines()[0]}"
+
+    def generate(self, prompt, max_new_tokens=400, cache_prefix=None, deterministic=False):
+        self.calls += 1
+        return self._simple_fallback(prompt) if self.fallback else self.story
+
+    def generate_stream(self, prompt, emit, max_new_tokens=400, cache_prefix=None, deterministic=False, stop_event=None):
+        self.calls += 1
+        story = self._simple_fallback(prompt) if self.fallback else self.story
+        for sentence in story.split(" "):
+            emit(sentence)
+            if stop_event is not None:
+                stop_event.set()
+        return story
+
+
+@pytest.fixture
+def prompt():
+    # La caché de historias es compartida por el proceso: un prompt nuevo en cada test
+    return f"Un perro en el parque {uuid.uuid4().hex}"
+
+
+def test_deterministic_story_is_generated_once(prompt):
+    model = _StubTextModel()
+    service = TextGenerationService(model)
+
+    assert service.cached_story(prompt) is None
+    first = service.generate_story(prompt, deterministic=True)
+    second = service.generate_story(prompt, deterministic=True)
+
+    assert first == second == model.story
+    assert model.calls == 1
+    assert service.cached_story(prompt) == model.story
+    # Otros parámetros son otra entrada
+    assert service.cached_story(prompt, tone="energico") is None
+
+
+def test_stream_serves_a_cached_story_as_one_chunk(prompt):
+    model = _StubTextModel()
+    service = TextGenerationService(model)
+    service.generate_story(prompt, deterministic=True)
+    chunks = []
+
+    story = service.stream_story(prompt, chunks.append, deterministic=True)
+
+    assert chunks == [model.story] and story == model.story
+    assert model.calls == 1
+
+
+def test_fallback_story_is_not_cached(prompt):
+    model = _StubTextModel(fallback=True)
+    service = TextGenerationService(model)
+
+    first = service.generate_story(prompt, deterministic=True)
+    service.generate_story(prompt, deterministic=True)
+
+    assert first.startswith("Respaldo:")
+    assert model.calls == 2
+    assert service.cached_story(prompt) is None
+
+
+def test_sampled_and_interrupted_stories_are_not_cached(prompt):
+    model = _StubTextModel()
+    service = TextGenerationService(model)
+
+    service.generate_story(prompt)
+    assert service.cached_story(prompt) is None
+
+    stop_event = threading.Event()
+    service.stream_story(prompt, lambda chunk: None, deterministic=True, stop_event=stop_event)
+    assert service.cached_story(prompt) is None
+
+    service.stream_story(prompt, lambda chunk: None, deterministic=True)
+    assert service.cached_story(prompt) == model.story
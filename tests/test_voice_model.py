@@ -0,0 +1,139 @@
+"""
+Tests for the XTTS path of VoiceGenerationModel with a fake XTTS model: conditioning
+latents computed once per reference WAV and reused from disk, and the written audio.
+"""
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+np = pytest.importorskip("numpy")
+sf = pytest.importorskip("soundfile")
+
+from backend.models.voice_latents import LATENTS_SUFFIX
+from backend.models.voice_model import VoiceGenerationModel
+
+SAMPLE_RATE = 24000
+
+
+class FakeXTTS:
+    """Stand-in for TTS.tts.models.xtts.Xtts exposing the methods the voice model calls."""
+
+    def __init__(self, peak=1.5):
+        self.device = "cpu"
+        self.peak = peak
+        self.latent_calls = []
+        self.config = SimpleNamespace(
+            gpt_cond_len=6,
+            gpt_cond_chunk_len=6,
+            max_ref_len=10,
+            sound_norm_refs=False,
+            temperature=0.7,
+            length_penalty=1.0,
+            repetition_penalty=2.0,
+            top_k=50,
+            top_p=0.8,
+            audio=SimpleNamespace(output_sample_rate=SAMPLE_RATE),
+        )
+
+    def get_conditioning_latents(self, audio_path, **kwargs):
+        self.latent_calls.append(audio_path[0])
+        return torch.ones(1, 4, 8), torch.full((1, 16, 1), 0.5)
+
+    def _wave(self, samples):
+        # Onda que sobrepasa [-1, 1] para comprobar la normalización
+        return torch.sin(torch.linspace(0, 20, samples)) * self.peak
+
+    def inference(self, text, language, gpt_cond_latent, speaker_embedding, **kwargs):
+        assert gpt_cond_latent.shape == (1, 4, 8)
+        return {"wav": self._wave(2400)}
+
+    def inference_stream(self, text, language, gpt_cond_latent, speaker_embedding, **kwargs):
+        for _ in range(4):
+            yield self._wave(800)
+
+
+def _model(voices_dir, xtts):
+    model = VoiceGenerationModel()
+    model.voices_dir = voices_dir
+    model.tts = SimpleNamespace(synthesizer=SimpleNamespace(tts_model=xtts))
+    return model
+
+
+@pytest.fixture
+def voices_dir(tmp_path):
+    voices = tmp_path / "voices"
+    voices.mkdir()
+    sf.write(str(voices / "ana.wav"), np.zeros(2400, dtype=np.float32), SAMPLE_RATE)
+    return voices
+
+
+def test_latents_are_computed_once_and_reloaded_from_disk(voices_dir, tmp_path):
+    xtts = FakeXTTS()
+    model = _model(voices_dir, xtts)
+    speaker = str(voices_dir / "ana.wav")
+
+    for i in range(3):
+        model.generate("Hola.", speaker_wav=speaker, output_path=str(tmp_path / f"out{i}.wav"))
+
+    assert xtts.latent_calls == [speaker]
+    assert (voices_dir / ("ana" + LATENTS_SUFFIX)).is_file()
+
+    # Otro proceso (otra instancia) lee los latents guardados en lugar de recalcularlos
+    other = FakeXTTS()
+    gpt_cond_latent, speaker_embedding = _model(voices_dir, other).get_speaker_latents(speaker)
+
+    assert other.latent_calls == []
+    assert torch.equal(gpt_cond_latent, torch.ones(1, 4, 8))
+    assert torch.equal(speaker_embedding, torch.full((1, 16, 1), 0.5))
+
+
+def test_changed_voice_file_recomputes_latents(voices_dir):
+    xtts = FakeXTTS()
+    speaker = str(voices_dir / "ana.wav")
+    _model(voices_dir, xtts).get_speaker_latents(speaker)
+
+    sf.write(speaker, np.ones(2400, dtype=np.float32) * 0.1, SAMPLE_RATE)
+    other = FakeXTTS()
+    _model(voices_dir, other).get_speaker_latents(speaker)
+
+    assert other.latent_calls == [speaker]
+
+
+def test_generate_writes_peak_normalized_pcm16(voices_dir, tmp_path):
+    model = _model(voices_dir, FakeXTTS(peak=1.5))
+    output = model.generate("Hola.", speaker_wav=str(voices_dir / "ana.wav"), output_path=str(tmp_path / "out.wav"))
+
+    audio, rate = sf.read(output, dtype="int16")
+    info = sf.info(output)
+
+    assert rate == SAMPLE_RATE
+    assert info.subtype == "PCM_16"
+    assert len(audio) == 2400
+    # Sin saturar: el pico queda en escala completa, no recortado a lo largo de toda la onda
+    assert np.abs(audio.astype(np.int32)).max() >= 32000
+    assert np.count_nonzero(np.abs(audio.astype(np.int32)) >= 32767) <= 2
+
+
+def test_generate_stream_emits_clipped_pcm_and_honours_stop_event(voices_dir):
+    model = _model(voices_dir, FakeXTTS(peak=1.5))
+    speaker = str(voices_dir / "ana.wav")
+    chunks = []
+
+    samples = model.generate_stream("Hola.", chunks.append, speaker_wav=speaker)
+
+    assert samples == 4 * 800
+    assert [len(chunk) for chunk in chunks] == [1600] * 4
+    pcm = np.frombuffer(b"".join(chunks), dtype="<i2")
+    assert pcm.max() == 32767
+
+    stop_event = threading.Event()
+    stopped = []
+
+    def emit(chunk):
+        stopped.append(chunk)
+        stop_event.set()
+
+    assert model.generate_stream("Hola.", emit, speaker_wav=speaker, stop_event=stop_event) == 800
+    assert len(stopped) == 1